@@ -0,0 +1,88 @@
+"""
+Benchmark skalowania widoków odczytu pod rosnącą liczbą równoległych klientów.
+
+Ten sam zestaw adresów odpytywany jest przy kolejnych poziomach współbieżności, co pozwala porównać
+serwer ASGI (widoki asynchroniczne) z serwerem WSGI z pulą wątków. Przykład (z katalogu final_project):
+
+    # ASGI, jeden proces
+    uvicorn final_project.asgi:application --port 8000 --workers 1
+    # WSGI, jeden proces z 8 wątkami
+    gunicorn final_project.wsgi:application --bind 127.0.0.1:8001 --workers 1 --threads 8
+
+    python benchmarks/bench_async_views.py --base-url http://127.0.0.1:8000 --username admin --password ...
+    python benchmarks/bench_async_views.py --base-url http://127.0.0.1:8001 --username admin --password ...
+"""
+import argparse
+import http.cookiejar
+import re
+import statistics
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_PATHS = ('/courses/', '/courses/today/')
+
+
+def login(base_url, username, password):
+    jar = http.cookiejar.CookieJar()
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar))
+    page = opener.open(base_url + '/login/').read().decode()
+    token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', page).group(1)
+    data = urllib.parse.urlencode({
+        'username': username,
+        'password': password,
+        'csrfmiddlewaretoken': token,
+    }).encode()
+    request = urllib.request.Request(base_url + '/login/', data=data, headers={'Referer': base_url + '/login/'})
+    opener.open(request).read()
+    cookies = {cookie.name: cookie.value for cookie in jar}
+    if 'sessionid' not in cookies:
+        raise SystemExit('Logowanie nie powiodło się.')
+    return '; '.join(f'{name}={value}' for name, value in cookies.items())
+
+
+def fetch(url, cookie):
+    start = time.perf_counter()
+    request = urllib.request.Request(url, headers={'Cookie': cookie})
+    with urllib.request.urlopen(request) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def run_level(urls, cookie, concurrency, total):
+    targets = [urls[i % len(urls)] for i in range(total)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(lambda url: fetch(url, cookie), targets))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'rps': total / elapsed,
+        'p50': statistics.median(latencies) * 1000,
+        'p95': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--username', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--paths', nargs='+', default=list(DEFAULT_PATHS))
+    parser.add_argument('--concurrency', default='1,8,32,64')
+    parser.add_argument('--requests', type=int, default=400, help='liczba żądań na poziom współbieżności')
+    args = parser.parse_args()
+
+    base_url = args.base_url.rstrip('/')
+    cookie = login(base_url, args.username, args.password)
+    urls = [base_url + path for path in args.paths]
+
+    print(f'{"concurrency":>11} {"req/s":>9} {"p50 ms":>8} {"p95 ms":>8}')
+    for level in (int(value) for value in args.concurrency.split(',')):
+        result = run_level(urls, cookie, level, args.requests)
+        print(f'{level:>11} {result["rps"]:>9.1f} {result["p50"]:>8.1f} {result["p95"]:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
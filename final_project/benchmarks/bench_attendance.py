@@ -0,0 +1,112 @@
+"""
+Benchmark raportu frekwencji (trainings.analytics) na dużej liczbie zapisów.
+
+Porównywane są: pętla w Pythonie po wierszach zapisów z danymi szkolenia (tak liczyłby się raport
+bez modułu analytics), obliczenie wektorowe NumPy oraz odczyt raportu z cache.
+Dane wstawiane są bezpośrednio zapytaniami SQL do tymczasowej bazy testowej.
+
+Uruchomienie (z katalogu final_project):
+    python benchmarks/bench_attendance.py [--enrollments 2000000] [--per-course 50]
+"""
+import argparse
+import os
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'final_project.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from trainings.analytics import attendance_stats, compute_attendance_stats, invalidate_attendance_stats  # noqa: E402
+from trainings.models import ENROLLMENT_ACTIVE, Enrollment  # noqa: E402
+
+COACHES = 200
+
+
+def create_data(enrollments, per_course):
+    courses = -(-enrollments // per_course)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "WITH RECURSIVE seq(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM seq WHERE i < %s) "
+            "INSERT INTO trainings_employee (id, first_name, last_name, gender, e_mail, phone_number, position, "
+            "company, team, team_leader, supervisor) "
+            "SELECT i, 'Trener', 'Nr ' || i, 1, 'trener' || i || '@example.com', i, 'Trener', "
+            "'Spółka ' || (i %% 7), 'T', 'L', 'S' FROM seq", [COACHES])
+        cursor.execute(
+            "WITH RECURSIVE seq(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM seq WHERE i < %s) "
+            "INSERT INTO trainings_participant (id, first_name, last_name, gender, e_mail, phone_number) "
+            "SELECT i, 'Uczestnik', 'Nr ' || i, 1, 'u' || i || '@example.com', i FROM seq", [per_course])
+        cursor.execute(
+            "WITH RECURSIVE seq(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM seq WHERE i < %s) "
+            "INSERT INTO trainings_trainingcourse (id, topic, start_time, end_time, category, path, formula, "
+            "participants_limit, coach_id, took_place, materials) "
+            "SELECT i, 'Szkolenie ' || i, datetime('2023-01-01', '+' || (i %% 700) || ' days'), "
+            "datetime('2023-01-01', '+' || (i %% 700) || ' days', '+2 hours'), "
+            "1 + i %% 4, 1 + i %% 4, 1 + i %% 2, %s, 1 + i %% %s, 1, NULL FROM seq",
+            [courses, per_course, COACHES])
+        cursor.execute(
+            "WITH RECURSIVE seq(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM seq WHERE i < %s - 1) "
+            "INSERT INTO trainings_enrollment (participant_id, training_course_id, enrolled_at, present, status) "
+            "SELECT 1 + i %% %s, 1 + i / %s, '2023-01-01 00:00:00', "
+            "CASE i %% 5 WHEN 0 THEN NULL WHEN 1 THEN 0 ELSE 1 END, 1 + (i %% 50 = 0) FROM seq",
+            [enrollments, per_course, per_course])
+
+
+def python_loop_stats():
+    """
+    Punkt odniesienia: jedna pętla po zapisach, z licznikami w słownikach dla każdego podziału.
+    """
+    counters = defaultdict(lambda: [0, 0, 0])
+    rows = Enrollment.objects.filter(status=ENROLLMENT_ACTIVE).values_list(
+        'present', 'training_course__path', 'training_course__category', 'training_course__formula',
+        'training_course__coach_id', 'training_course__start_time', 'training_course__coach__company')
+    for present, path, category, formula, coach_id, start_time, company in rows.iterator(chunk_size=10000):
+        month = f'{timezone.localtime(start_time):%Y-%m}'
+        for key in (('path', path), ('category', category), ('formula', formula), ('coach', coach_id),
+                    ('month', month), ('company', company)):
+            counter = counters[key]
+            counter[0] += 1
+            if present is not None:
+                counter[1] += 1
+                counter[2] += present
+    return counters
+
+
+def measure(label, func):
+    start = time.perf_counter()
+    func()
+    print(f'{label:32s} {time.perf_counter() - start:8.3f} s')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--enrollments', type=int, default=2_000_000)
+    parser.add_argument('--per-course', type=int, default=50)
+    parser.add_argument('--skip-loop', action='store_true', help="Pomija powolny wariant z pętlą w Pythonie.")
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        create_data(args.enrollments, args.per_course)
+        print(f'Zapisy: {args.enrollments}, szkolenia: {-(-args.enrollments // args.per_course)}')
+        if not args.skip_loop:
+            measure('pętla w Pythonie', python_loop_stats)
+        measure('NumPy (bez cache)', compute_attendance_stats)
+        invalidate_attendance_stats()
+        attendance_stats()
+        measure('NumPy (z cache)', attendance_stats)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
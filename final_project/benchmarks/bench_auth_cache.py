@@ -0,0 +1,117 @@
+"""
+Benchmark liczby zapytań i czasu obsługi widoku CoursesForTodayView dla różnych trybów sesji
+i z pamięcią podręczną zalogowanych użytkowników lub bez niej.
+
+Widok odpytywany jest klientem testowym Django w tym samym procesie, na tymczasowej bazie testowej.
+Widok jest asynchroniczny, więc zapytania liczone są we wszystkich wątkach (CursorWrapper), a nie tylko
+na połączeniu wątku głównym.
+
+Uruchomienie (z katalogu final_project):
+    python benchmarks/bench_auth_cache.py [--requests 500] [--courses 20]
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'final_project.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.db.backends.utils import CursorWrapper  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from trainings import user_cache  # noqa: E402
+from trainings.models import Employee, TrainingCourse  # noqa: E402
+
+MODES = (
+    ('db, bez cache użytkownika', 'django.contrib.sessions.backends.db', 0),
+    ('db + cache użytkownika', 'django.contrib.sessions.backends.db', 30),
+    ('cached_db + cache użytkownika', 'django.contrib.sessions.backends.cached_db', 30),
+    ('signed_cookies + cache użytkownika', 'django.contrib.sessions.backends.signed_cookies', 30),
+)
+
+
+@contextmanager
+def count_queries():
+    """
+    Zlicza zapytania SQL wykonane we wszystkich wątkach procesu.
+    """
+    queries = []
+    lock = threading.Lock()
+    original = CursorWrapper._execute
+
+    def _execute(self, sql, params, *ignored_wrapper_args):
+        with lock:
+            queries.append(sql)
+        return original(self, sql, params, *ignored_wrapper_args)
+
+    CursorWrapper._execute = _execute
+    try:
+        yield queries
+    finally:
+        CursorWrapper._execute = original
+
+
+def create_data(courses):
+    User.objects.create_user(username='bench', password='bench')
+    coach = Employee.objects.create(first_name='Jan', last_name='Kowalski', gender=2, e_mail='jan@example.com',
+                                    phone_number=123456789, position='Trener', company='ABC', team='T',
+                                    team_leader='L', supervisor='S')
+    now = timezone.now()
+    TrainingCourse.objects.bulk_create([
+        TrainingCourse(topic=f'Szkolenie {i}', category=1, path=1, formula=1, participants_limit=10, coach=coach,
+                       start_time=now + timedelta(minutes=i), end_time=now + timedelta(minutes=i + 30))
+        for i in range(courses)])
+
+
+def run(session_engine, ttl, requests):
+    with override_settings(SESSION_ENGINE=session_engine, AUTH_USER_CACHE_TTL=ttl):
+        user_cache.clear()
+        client = Client()
+        client.login(username='bench', password='bench')
+        url = reverse('courses_today')
+        client.get(url)
+
+        with count_queries() as queries:
+            client.get(url)
+        latencies = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            client.get(url)
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return len(queries), statistics.median(latencies) * 1000, latencies[int(len(latencies) * 0.95) - 1] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--courses', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        create_data(args.courses)
+        for label, session_engine, ttl in MODES:
+            queries, p50, p95 = run(session_engine, ttl, args.requests)
+            print(f'{label:38s} zapytania={queries:2d} p50={p50:6.2f} ms p95={p95:6.2f} ms')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
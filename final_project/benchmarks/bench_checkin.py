@@ -0,0 +1,124 @@
+"""
+Benchmark rejestracji obecności kodami QR (trainings.checkin) na SQLite w trybie WAL.
+
+Mierzona jest liczba rejestracji na sekundę przez punkt końcowy checkin (klient testowy Django,
+z pełnym łańcuchem middleware), dla pojedynczych skanów i porcji wysyłanych przez stronę skanera,
+także z kilku stanowisk (wątków) jednocześnie. Baza testowa jest plikiem z ustawieniami produkcyjnymi
+(pragmy settings.PRODUCTION_SQLITE_PRAGMAS i trwałe połączenia jak dla DJANGO_DB_PROFILE=production),
+bo WAL nie działa w bazie w pamięci.
+
+Uruchomienie (z katalogu final_project):
+    python benchmarks/bench_checkin.py [--participants 5000] [--batch 50] [--threads 4]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'final_project.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from trainings.checkin import participant_token, scanner_key  # noqa: E402
+
+COURSE_ID = 1
+
+
+def create_data(participants):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO trainings_employee (id, first_name, last_name, gender, e_mail, phone_number, position, "
+            "company, team, team_leader, supervisor) "
+            "VALUES (1, 'Trener', 'Nr 1', 1, 'trener@example.com', 1, 'Trener', 'Spółka', 'T', 'L', 'S')")
+        cursor.execute(
+            "INSERT INTO trainings_trainingcourse (id, topic, start_time, end_time, category, path, formula, "
+            "participants_limit, coach_id, took_place, materials) "
+            "VALUES (%s, 'Szkolenie', datetime('now'), datetime('now', '+2 hours'), 1, 1, 1, %s, 1, NULL, NULL)",
+            [COURSE_ID, participants])
+        cursor.execute(
+            "WITH RECURSIVE seq(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM seq WHERE i < %s) "
+            "INSERT INTO trainings_participant (id, first_name, last_name, gender, e_mail, phone_number) "
+            "SELECT i, 'Uczestnik', 'Nr ' || i, 1, 'u' || i || '@example.com', i FROM seq", [participants])
+        cursor.execute(
+            "INSERT INTO trainings_enrollment (participant_id, training_course_id, enrolled_at, present, status) "
+            "SELECT id, %s, datetime('now'), NULL, 1 FROM trainings_participant", [COURSE_ID])
+
+
+def reset_presence():
+    with connection.cursor() as cursor:
+        cursor.execute("UPDATE trainings_enrollment SET present = NULL")
+
+
+def scan(batches):
+    """
+    Wysyła porcje tokenów do punktu końcowego checkin (jedno stanowisko).
+    """
+    client = Client()
+    url = reverse('checkin')
+    key = scanner_key(COURSE_ID)
+    present = 0
+    try:
+        for batch in batches:
+            response = client.post(url, {'key': key, 'tokens': batch}, content_type='application/json')
+            present += len(response.json()['present'])
+    finally:
+        # Wątek zamyka własne połączenie z bazą
+        connections.close_all()
+    return present
+
+
+def measure(label, tokens, batch_size, threads):
+    reset_presence()
+    batches = [tokens[start:start + batch_size] for start in range(0, len(tokens), batch_size)]
+    start = time.perf_counter()
+    if threads == 1:
+        present = scan(batches)
+    else:
+        with ThreadPoolExecutor(threads) as executor:
+            present = sum(executor.map(scan, [batches[i::threads] for i in range(threads)]))
+    elapsed = time.perf_counter() - start
+    assert present == len(tokens), (present, len(tokens))
+    print(f'{label:40s} {len(tokens) / elapsed:10.0f} rejestracji/s')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--participants', type=int, default=5000)
+    parser.add_argument('--batch', type=int, default=50)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    settings.SQLITE_PRAGMAS = settings.PRODUCTION_SQLITE_PRAGMAS
+    settings.DEBUG = False
+    with tempfile.TemporaryDirectory() as directory:
+        connection.settings_dict['TEST']['NAME'] = os.path.join(directory, 'bench_checkin.sqlite3')
+        connection.settings_dict['CONN_MAX_AGE'] = 600
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                print(f'journal_mode: {cursor.fetchone()[0]}, uczestnicy: {args.participants}')
+            create_data(args.participants)
+            tokens = [participant_token(participant_id) for participant_id in range(1, args.participants + 1)]
+            measure('pojedyncze skany', tokens, 1, 1)
+            measure(f'porcje po {args.batch}', tokens, args.batch, 1)
+            measure(f'pojedyncze skany, {args.threads} stanowiska', tokens, 1, args.threads)
+            measure(f'porcje po {args.batch}, {args.threads} stanowiska', tokens, args.batch, args.threads)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+Benchmark schematu osób: dziedziczenie wielotabelowe po Human (przed migracją 0005) vs samodzielne
+tabele Employee i Participant (po migracji).
+
+Oba schematy są budowane w bazach SQLite w pamięci z tymi samymi danymi, a następnie mierzone są
+te same operacje: lista pracowników, wstawianie uczestników i odczyt listy obecności szkolenia.
+
+Uruchomienie (z katalogu final_project):
+    python benchmarks/bench_flat_people.py [--people 50000] [--courses 2000] [--repeat 5]
+"""
+import argparse
+import random
+import sqlite3
+import time
+
+HUMAN_COLUMNS = 'first_name TEXT, last_name TEXT, gender INTEGER, e_mail TEXT, phone_number INTEGER'
+EMPLOYEE_COLUMNS = 'position TEXT, company TEXT, team TEXT, team_leader TEXT, supervisor TEXT'
+
+INHERITED_SCHEMA = f"""
+CREATE TABLE human (id INTEGER PRIMARY KEY AUTOINCREMENT, {HUMAN_COLUMNS});
+CREATE TABLE employee (human_ptr_id INTEGER PRIMARY KEY REFERENCES human(id), {EMPLOYEE_COLUMNS});
+CREATE TABLE participant (human_ptr_id INTEGER PRIMARY KEY REFERENCES human(id));
+CREATE TABLE course (id INTEGER PRIMARY KEY, topic TEXT, coach_id INTEGER REFERENCES employee(human_ptr_id));
+CREATE TABLE enrollment (id INTEGER PRIMARY KEY, participant_id INTEGER REFERENCES participant(human_ptr_id),
+                         course_id INTEGER REFERENCES course(id), present INTEGER);
+CREATE UNIQUE INDEX enrollment_unique ON enrollment (participant_id, course_id);
+CREATE INDEX enrollment_course ON enrollment (course_id);
+"""
+
+FLAT_SCHEMA = f"""
+CREATE TABLE employee (id INTEGER PRIMARY KEY AUTOINCREMENT, {HUMAN_COLUMNS}, {EMPLOYEE_COLUMNS});
+CREATE TABLE participant (id INTEGER PRIMARY KEY AUTOINCREMENT, {HUMAN_COLUMNS});
+CREATE TABLE course (id INTEGER PRIMARY KEY, topic TEXT, coach_id INTEGER REFERENCES employee(id));
+CREATE TABLE enrollment (id INTEGER PRIMARY KEY, participant_id INTEGER REFERENCES participant(id),
+                         course_id INTEGER REFERENCES course(id), present INTEGER);
+CREATE UNIQUE INDEX enrollment_unique ON enrollment (participant_id, course_id);
+CREATE INDEX enrollment_course ON enrollment (course_id);
+"""
+
+QUERIES = {
+    'inherited': {
+        'list_employees': 'SELECT h.id, h.first_name, h.last_name, h.gender, h.e_mail, h.phone_number, e.position, '
+                          'e.company, e.team, e.team_leader, e.supervisor '
+                          'FROM employee e INNER JOIN human h ON h.id = e.human_ptr_id',
+        'presence': 'SELECT en.present, h.first_name, h.last_name, h.e_mail FROM enrollment en '
+                    'INNER JOIN participant p ON p.human_ptr_id = en.participant_id '
+                    'INNER JOIN human h ON h.id = p.human_ptr_id WHERE en.course_id = ?',
+    },
+    'flat': {
+        'list_employees': 'SELECT id, first_name, last_name, gender, e_mail, phone_number, position, company, team, '
+                          'team_leader, supervisor FROM employee',
+        'presence': 'SELECT en.present, p.first_name, p.last_name, p.e_mail FROM enrollment en '
+                    'INNER JOIN participant p ON p.id = en.participant_id WHERE en.course_id = ?',
+    },
+}
+
+
+def person(i):
+    return (f'Imię{i}', f'Nazwisko{i}', 1 + i % 2, f'osoba{i}@example.com', 100000000 + i)
+
+
+def insert_participants(conn, schema, start, count):
+    rows = [person(i) for i in range(start, start + count)]
+    with conn:
+        if schema == 'inherited':
+            for row in rows:
+                human_id = conn.execute('INSERT INTO human (first_name, last_name, gender, e_mail, phone_number) '
+                                        'VALUES (?, ?, ?, ?, ?)', row).lastrowid
+                conn.execute('INSERT INTO participant (human_ptr_id) VALUES (?)', (human_id,))
+        else:
+            conn.executemany('INSERT INTO participant (first_name, last_name, gender, e_mail, phone_number) '
+                             'VALUES (?, ?, ?, ?, ?)', rows)
+
+
+def build(schema, people, courses):
+    conn = sqlite3.connect(':memory:')
+    conn.executescript(INHERITED_SCHEMA if schema == 'inherited' else FLAT_SCHEMA)
+    employees = max(people // 50, 1)
+    with conn:
+        for i in range(employees):
+            if schema == 'inherited':
+                human_id = conn.execute('INSERT INTO human (first_name, last_name, gender, e_mail, phone_number) '
+                                        'VALUES (?, ?, ?, ?, ?)', person(i)).lastrowid
+                conn.execute('INSERT INTO employee VALUES (?, ?, ?, ?, ?, ?)',
+                             (human_id, 'Trener', 'Spółka', 'Zespół', 'Lider', 'Przełożony'))
+            else:
+                conn.execute('INSERT INTO employee (first_name, last_name, gender, e_mail, phone_number, position, '
+                             'company, team, team_leader, supervisor) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                             person(i) + ('Trener', 'Spółka', 'Zespół', 'Lider', 'Przełożony'))
+    coach_ids = [row[0] for row in conn.execute(
+        'SELECT human_ptr_id FROM employee' if schema == 'inherited' else 'SELECT id FROM employee')]
+    with conn:
+        conn.executemany('INSERT INTO course (id, topic, coach_id) VALUES (?, ?, ?)',
+                         [(i, f'Szkolenie {i}', random.choice(coach_ids)) for i in range(1, courses + 1)])
+    insert_participants(conn, schema, employees, people)
+    participant_ids = [row[0] for row in conn.execute(
+        'SELECT human_ptr_id FROM participant' if schema == 'inherited' else 'SELECT id FROM participant')]
+    rng = random.Random(1)
+    pairs = {(rng.choice(participant_ids), rng.randint(1, courses)) for _ in range(people * 3)}
+    with conn:
+        conn.executemany('INSERT INTO enrollment (participant_id, course_id, present) VALUES (?, ?, ?)',
+                         [(p, c, rng.randint(0, 1)) for p, c in pairs])
+    return conn
+
+
+def timed(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--people', type=int, default=50000)
+    parser.add_argument('--courses', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f'{"schema":>10} {"list employees ms":>18} {"insert 5k ms":>13} {"presence x200 ms":>17}')
+    for schema in ('inherited', 'flat'):
+        random.seed(0)
+        conn = build(schema, args.people, args.courses)
+        queries = QUERIES[schema]
+        list_ms = timed(lambda: conn.execute(queries['list_employees']).fetchall(), args.repeat)
+        counter = iter(range(10 ** 9))
+        insert_ms = timed(lambda: insert_participants(conn, schema, 10 ** 7 + next(counter) * 5000, 5000),
+                          args.repeat)
+        presence_ms = timed(lambda: [conn.execute(queries['presence'], (course_id,)).fetchall()
+                                     for course_id in range(1, 201)], args.repeat)
+        print(f'{schema:>10} {list_ms:>18.2f} {insert_ms:>13.2f} {presence_ms:>17.2f}')
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
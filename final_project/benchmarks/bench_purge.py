@@ -0,0 +1,163 @@
+"""
+Benchmark usuwania cyklu szkoleń z zapisami uczestników na SQLite w trybie WAL.
+
+Porównywane są: usunięcie przez ORM (QuerySet.delete() - Collector wczytuje zapisy, wysyła sygnały
+i usuwa wszystko w jednej transakcji) oraz purge_deleted (oznaczenie jako usunięte i usuwanie porcjami
+w krótkich transakcjach). W tym czasie osobny wątek zapisuje obecność na innym szkoleniu (jak
+rejestracja obecności) i mierzy najdłuższy czas oczekiwania pojedynczego zapisu. Baza testowa jest
+plikiem z pragmami profilu produkcyjnego (settings.PRODUCTION_SQLITE_PRAGMAS), bo WAL nie działa
+w bazie w pamięci.
+
+Uruchomienie (z katalogu final_project):
+    python benchmarks/bench_purge.py [--courses 50] [--participants 2000] [--batch 200]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'final_project.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from trainings import purge  # noqa: E402
+from trainings.models import Enrollment, TrainingCourse  # noqa: E402
+
+LIVE_COURSE_ID = 1
+
+
+def create_data(courses, participants):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO trainings_employee (id, first_name, last_name, gender, e_mail, phone_number, position, "
+            "company, team, team_leader, supervisor) "
+            "VALUES (1, 'Trener', 'Nr 1', 1, 'trener@example.com', 1, 'Trener', 'Spółka', 'T', 'L', 'S')")
+        # Szkolenie 1 trwa (zapisy obecności), szkolenia 2..courses+1 to usuwany cykl
+        cursor.execute(
+            "WITH RECURSIVE seq(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM seq WHERE i < %s) "
+            "INSERT INTO trainings_trainingcourse (id, topic, start_time, end_time, category, path, formula, "
+            "participants_limit, coach_id, took_place, materials) "
+            "SELECT i, 'Cykl ' || i, datetime('now', '+' || i || ' days'), datetime('now', '+' || i || ' days', "
+            "'+2 hours'), 1, 1, 1, %s, 1, NULL, NULL FROM seq", [courses + 1, participants])
+        cursor.execute(
+            "WITH RECURSIVE seq(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM seq WHERE i < %s) "
+            "INSERT INTO trainings_participant (id, first_name, last_name, gender, e_mail, phone_number) "
+            "SELECT i, 'Uczestnik', 'Nr ' || i, 1, 'u' || i || '@example.com', i FROM seq", [participants])
+        cursor.execute(
+            "INSERT INTO trainings_enrollment (participant_id, training_course_id, enrolled_at, present, status) "
+            "SELECT p.id, c.id, datetime('now'), NULL, 1 FROM trainings_participant p, trainings_trainingcourse c")
+
+
+def clear():
+    with connection.cursor() as cursor:
+        for table in ('trainings_enrollment', 'trainings_trainingcourse', 'trainings_participant',
+                      'trainings_employee'):
+            cursor.execute(f'DELETE FROM {table}')
+
+
+class AttendanceWriter(threading.Thread):
+    """
+    Zapisuje obecność kolejnych uczestników trwającego szkolenia (osobne połączenie) i mierzy czas zapisów.
+    """
+    def __init__(self, participants):
+        super().__init__()
+        self.participants = participants
+        self.stop = threading.Event()
+        self.latencies = []
+
+    def run(self):
+        try:
+            participant_id = 0
+            while not self.stop.is_set():
+                participant_id = participant_id % self.participants + 1
+                start = time.perf_counter()
+                Enrollment.objects.filter(training_course_id=LIVE_COURSE_ID, participant_id=participant_id).update(
+                    present=participant_id % 2 == 0, present_changed_at=timezone.now())
+                self.latencies.append(time.perf_counter() - start)
+                time.sleep(0.001)
+        finally:
+            connections.close_all()
+
+
+def measure(label, func, participants):
+    writer = AttendanceWriter(participants)
+    writer.start()
+    time.sleep(0.1)
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    time.sleep(0.1)
+    writer.stop.set()
+    writer.join()
+    latencies = sorted(writer.latencies)
+    print(f'{label:36s} {elapsed:8.2f} s, zapisy obecności: {len(latencies)}, '
+          f'mediana {latencies[len(latencies) // 2] * 1000:.1f} ms, maks. {latencies[-1] * 1000:.1f} ms')
+
+
+def orm_delete():
+    TrainingCourse.all_objects.exclude(pk=LIVE_COURSE_ID).delete()
+
+
+def soft_delete_and_purge(batch):
+    longest = []
+    delete_batch = purge._delete_batch
+
+    def timed(sql, params):
+        start = time.perf_counter()
+        try:
+            return delete_batch(sql, params)
+        finally:
+            longest.append(time.perf_counter() - start)
+
+    def run():
+        start = time.perf_counter()
+        TrainingCourse.objects.exclude(pk=LIVE_COURSE_ID).update(deleted_at=timezone.now())
+        print(f'{"  oznaczenie jako usunięte":36s} {(time.perf_counter() - start) * 1000:8.1f} ms')
+        purge._delete_batch = timed
+        try:
+            result = purge.purge_deleted(batch_size=batch, pause=settings.PURGE_PAUSE)
+        finally:
+            purge._delete_batch = delete_batch
+        longest.sort()
+        print(f'{"  transakcje usuwania":36s} mediana {longest[len(longest) // 2] * 1000:.1f} ms, '
+              f'maks. {longest[-1] * 1000:.1f} ms ({result["batches"]} transakcji, zapisy: {result["enrollments"]})')
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--courses', type=int, default=50)
+    parser.add_argument('--participants', type=int, default=2000)
+    parser.add_argument('--batch', type=int, default=settings.PURGE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    settings.SQLITE_PRAGMAS = settings.PRODUCTION_SQLITE_PRAGMAS
+    settings.SNAPSHOTS_ENABLED = False
+    settings.DEBUG = False
+    with tempfile.TemporaryDirectory() as directory:
+        connection.settings_dict['TEST']['NAME'] = os.path.join(directory, 'bench_purge.sqlite3')
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0)
+        try:
+            print(f'Cykl: {args.courses} szkoleń po {args.participants} zapisów')
+            create_data(args.courses, args.participants)
+            measure('QuerySet.delete()', orm_delete, args.participants)
+            clear()
+            create_data(args.courses, args.participants)
+            measure(f'purge_deleted (porcje po {args.batch})', soft_delete_and_purge(args.batch), args.participants)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
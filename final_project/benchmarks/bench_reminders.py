@@ -0,0 +1,130 @@
+"""
+Benchmark wysyłki przypomnień o szkoleniach (trainings.reminders).
+
+Porównywane są: wysyłka "naiwna" (zapytanie o zapisy dla każdego szkolenia, send_mail - czyli nowe
+połączenie z serwerem poczty - i zapis postępu dla każdej wiadomości) oraz send_reminders (jedno
+połączenie, zapisy pobrane jednym zapytaniem prefetch, postęp zapisywany porcjami). Wiadomości trafiają
+do backendu locmem (sam koszt Django) lub file (otwarcie pliku przy każdym połączeniu, jak nawiązanie
+połączenia SMTP). Wypisywany jest też plan zapytania o szkolenia z przedziału czasu.
+
+Uruchomienie (z katalogu final_project):
+    python benchmarks/bench_reminders.py [--courses 50000] [--due 100] [--per-course 30] [--backend file]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'final_project.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core import mail  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.template.loader import render_to_string  # noqa: E402
+from django.test.utils import CaptureQueriesContext, setup_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from trainings.models import ENROLLMENT_ACTIVE, Enrollment  # noqa: E402
+from trainings.reminders import due_courses, send_reminders  # noqa: E402
+
+LEAD_TIME = timedelta(hours=24)
+
+
+def create_data(courses, due, per_course):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO trainings_employee (id, first_name, last_name, gender, e_mail, phone_number, position, "
+            "company, team, team_leader, supervisor) "
+            "VALUES (1, 'Trener', 'Nr 1', 1, 'trener@example.com', 1, 'Trener', 'Spółka', 'T', 'L', 'S')")
+        # Pierwsze due szkoleń rozpoczyna się w ciągu najbliższych godzin, pozostałe w ciągu dwóch lat
+        cursor.execute(
+            "WITH RECURSIVE seq(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM seq WHERE i < %s) "
+            "INSERT INTO trainings_trainingcourse (id, topic, start_time, end_time, category, path, formula, "
+            "participants_limit, coach_id, took_place, materials) "
+            "SELECT i, 'Szkolenie ' || i, "
+            "CASE WHEN i <= %s THEN datetime('now', '+' || (i %% 20 + 1) || ' hours') "
+            "ELSE datetime('now', '+' || (2 + i %% 700) || ' days') END, "
+            "datetime('now', '+' || (2 + i %% 700) || ' days', '+2 hours'), 1, 1, 1, %s, 1, NULL, NULL FROM seq",
+            [courses, due, per_course])
+        cursor.execute(
+            "WITH RECURSIVE seq(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM seq WHERE i < %s) "
+            "INSERT INTO trainings_participant (id, first_name, last_name, gender, e_mail, phone_number) "
+            "SELECT i, 'Uczestnik', 'Nr ' || i, 1, 'u' || i || '@example.com', i FROM seq", [due * per_course])
+        cursor.execute(
+            "INSERT INTO trainings_enrollment (participant_id, training_course_id, enrolled_at, present, status) "
+            "SELECT id, 1 + (id - 1) / %s, datetime('now'), NULL, 1 FROM trainings_participant", [per_course])
+
+
+def reset():
+    Enrollment.objects.update(reminder_sent_at=None)
+    mail.outbox = []
+
+
+def naive_reminders():
+    """
+    Punkt odniesienia: zapytanie o zapisy dla każdego szkolenia i send_mail dla każdej wiadomości.
+    """
+    now = timezone.now()
+    for course in due_courses(now, LEAD_TIME).select_related('coach'):
+        enrollments = course.enrollment_set.filter(status=ENROLLMENT_ACTIVE, reminder_sent_at__isnull=True)
+        for enrollment in enrollments.select_related('participant'):
+            context = {'participant': enrollment.participant, 'course': course}
+            subject = ' '.join(render_to_string('email/reminder_subject.txt', context).split())
+            mail.send_mail(subject, render_to_string('email/reminder.txt', context), None,
+                           [enrollment.participant.e_mail])
+            enrollment.reminder_sent_at = now
+            enrollment.save(update_fields=['reminder_sent_at'])
+
+
+def measure(label, func, expected):
+    reset()
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+    sent = Enrollment.objects.filter(reminder_sent_at__isnull=False).count()
+    assert sent == expected, (sent, expected)
+    print(f'{label:40s} {sent / elapsed:10.0f} wiadomości/s, zapytania: {len(queries)}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--courses', type=int, default=50000)
+    parser.add_argument('--due', type=int, default=100)
+    parser.add_argument('--per-course', type=int, default=30)
+    parser.add_argument('--batch', type=int, default=100)
+    parser.add_argument('--backend', choices=['locmem', 'file'], default='file')
+    args = parser.parse_args()
+
+    setup_test_environment()
+    # Zapis postępu w wariancie naiwnym wysyła sygnały - bez publikowania migawek w tle
+    settings.SNAPSHOTS_ENABLED = False
+    settings.EMAIL_BACKEND = f'django.core.mail.backends.{"locmem" if args.backend == "locmem" else "filebased"}' \
+                             f'.EmailBackend'
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            settings.EMAIL_FILE_PATH = directory
+            create_data(args.courses, args.due, args.per_course)
+            expected = args.due * args.per_course
+
+            query = due_courses(timezone.now(), LEAD_TIME)
+            print(f'Szkolenia: {args.courses}, w przedziale: {query.count()}, wiadomości: {expected}, '
+                  f'backend: {args.backend}')
+            print('Plan:', query.explain())
+            measure('naiwnie (send_mail dla każdej wiadomości)', naive_reminders, expected)
+            measure(f'send_reminders (porcje po {args.batch})',
+                    lambda: send_reminders(lead_time=LEAD_TIME, batch_size=args.batch, rate=0), expected)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark równoległych odczytów i zapisów SQLite: domyślne ustawienia vs profil produkcyjny.
+
+Uruchomienie (z katalogu final_project):
+    python benchmarks/bench_sqlite_profile.py [--writers 4] [--readers 4] [--ops 500]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'final_project.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+
+from trainings.signals import apply_sqlite_pragmas  # noqa: E402
+
+
+def run(pragmas, timeout, writers, readers, ops):
+    fd, path = tempfile.mkstemp(suffix='.sqlite3')
+    os.close(fd)
+    conn = sqlite3.connect(path)
+    apply_sqlite_pragmas(conn, pragmas)
+    conn.execute('CREATE TABLE presence (id INTEGER PRIMARY KEY, course INTEGER, present INTEGER)')
+    conn.commit()
+    conn.close()
+
+    errors = []
+    done = []
+
+    def writer():
+        c = sqlite3.connect(path, timeout=timeout)
+        apply_sqlite_pragmas(c, pragmas)
+        for i in range(ops):
+            try:
+                with c:
+                    c.execute('INSERT INTO presence (course, present) VALUES (?, 1)', (i % 10,))
+                done.append(1)
+            except sqlite3.OperationalError as e:
+                errors.append(str(e))
+        c.close()
+
+    def reader():
+        c = sqlite3.connect(path, timeout=timeout)
+        apply_sqlite_pragmas(c, pragmas)
+        for i in range(ops):
+            try:
+                c.execute('SELECT COUNT(*) FROM presence WHERE course = ?', (i % 10,)).fetchone()
+                done.append(1)
+            except sqlite3.OperationalError as e:
+                errors.append(str(e))
+        c.close()
+
+    threads = [threading.Thread(target=writer) for _ in range(writers)] + \
+              [threading.Thread(target=reader) for _ in range(readers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    return len(done), len(errors), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--ops', type=int, default=500)
+    args = parser.parse_args()
+
+    profiles = (
+        # timeout=0: brak oczekiwania na blokadę, jak przy domyślnym połączeniu pod obciążeniem
+        ('default (rollback journal, timeout=0)', {}, 0),
+        ('production (WAL + pragmas)', settings.PRODUCTION_SQLITE_PRAGMAS, 20),
+    )
+    for label, pragmas, timeout in profiles:
+        ok, errors, elapsed = run(pragmas, timeout, args.writers, args.readers, args.ops)
+        print(f'{label:40s} ops={ok:6d} locked_errors={errors:5d} '
+              f'time={elapsed:6.2f}s throughput={ok / elapsed:8.0f} ops/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -9,6 +9,27 @@ from django.urls import reverse
 from trainings.models import Employee, TrainingCourse, Participant
 
 
+@pytest.fixture(autouse=True)
+def static_storage(settings):
+    # Testy nie uruchamiają collectstatic - szablony używają zwykłego magazynu plików statycznych bez manifestu
+    settings.STORAGES = {
+        **settings.STORAGES,
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    }
+
+
+@pytest.fixture(autouse=True)
+def snapshots_disabled(settings):
+    # Migawki stron są publikowane w wątku w tle - testy włączają je tylko tam, gdzie są sprawdzane
+    settings.SNAPSHOTS_ENABLED = False
+
+
+@pytest.fixture(autouse=True)
+def noshow_model_path(settings, tmp_path):
+    # Model prognozy nieobecności nie jest dopasowany, dopóki test nie uruchomi fit_noshow_model
+    settings.NOSHOW_MODEL_PATH = tmp_path / 'noshow_model.json'
+
+
 @pytest.fixture
 def user(db):
     # Użytkownik do testów
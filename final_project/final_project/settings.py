@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,10 +43,11 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'trainings.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'trainings.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -74,6 +76,12 @@ WSGI_APPLICATION = 'final_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# Profil bazy danych wybierany zmienną środowiskową DJANGO_DB_PROFILE ('development' lub 'production').
+# Profil produkcyjny włącza tryb WAL i pragmy SQLite (nakładane w trainings.signals przy każdym
+# nowym połączeniu) oraz trwałe połączenia, dzięki czemu równoległe zapisy nie kończą się
+# błędem "database is locked", a odczyty nie blokują zapisów.
+DB_PROFILE = os.environ.get('DJANGO_DB_PROFILE', 'development')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
@@ -81,6 +89,28 @@ DATABASES = {
     }
 }
 
+# Pragmy profilu produkcyjnego (testy i benchmarki korzystają z tego samego słownika)
+PRODUCTION_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,              # milisekundy
+    'cache_size': -64000,               # ujemna wartość = rozmiar w KiB (64 MB)
+    'mmap_size': 268435456,             # 256 MB
+    'temp_store': 'MEMORY',
+}
+
+SQLITE_PRAGMAS = {}
+
+if DB_PROFILE == 'production':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': 600,            # trwałe połączenia (sekundy)
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': 20,              # czas oczekiwania sterownika sqlite3 na zwolnienie blokady (sekundy)
+        },
+    })
+    SQLITE_PRAGMAS = PRODUCTION_SQLITE_PRAGMAS
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -117,8 +147,77 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.0/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# Pakiety front-endowe instalowane przez npm (package.json w katalogu głównym repozytorium)
+STATICFILES_DIRS = [
+    ('flatpickr', BASE_DIR.parent / 'node_modules' / 'flatpickr' / 'dist'),
+]
+
+# collectstatic nadaje plikom nazwy z hashem treści i zapisuje ich wersje .gz i .br;
+# trainings.views.StaticAssetView serwuje je z nagłówkiem Cache-Control na rok
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'trainings.storage.CompressedManifestStaticFilesStorage',
+    },
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Sposób przechowywania sesji (zmienna środowiskowa DJANGO_SESSION_MODE):
+# - 'db': tabela django_session (zapytanie przy każdym żądaniu),
+# - 'cached_db': cache z zapisem do bazy (odczyt bez zapytania, jeśli sesja jest w cache),
+# - 'signed_cookies': dane sesji w podpisanym ciasteczku (bez bazy; wylogowanie działa tylko w przeglądarce).
+SESSION_MODE = os.environ.get('DJANGO_SESSION_MODE', 'db')
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}[SESSION_MODE]
+
+# Czas (sekundy), przez jaki proces pamięta obiekt zalogowanego użytkownika (0 - bez pamięci podręcznej)
+AUTH_USER_CACHE_TTL = int(os.environ.get('DJANGO_AUTH_USER_CACHE_TTL', 30))
+
+# Statyczne migawki listy szkoleń, szkoleń pracownika i uczestników szkolenia (trainings.snapshots):
+# katalog plików HTML i czas (sekundy), przez jaki zmiany danych są łączone przed ponowną publikacją
+SNAPSHOTS_ENABLED = os.environ.get('DJANGO_SNAPSHOTS_ENABLED', '1') == '1'
+SNAPSHOT_ROOT = BASE_DIR / 'snapshots'
+SNAPSHOT_DEBOUNCE = float(os.environ.get('DJANGO_SNAPSHOT_DEBOUNCE', 2))
+
+# Model prognozy nieobecności (polecenie fit_noshow_model) i nadrezerwacja: na szkolenie można zapisać
+# więcej osób niż limit uczestników, o prognozowaną liczbę nieobecnych, ale nie więcej niż
+# OVERBOOKING_MAX_RATE limitu (0 - bez nadrezerwacji)
+NOSHOW_MODEL_PATH = BASE_DIR / 'noshow_model.json'
+OVERBOOKING_MAX_RATE = float(os.environ.get('DJANGO_OVERBOOKING_MAX_RATE', 0.1))
+
+# Czas ważności (sekundy) klucza stanowiska skanowania kodów QR uczestników (trainings.checkin)
+CHECKIN_SCANNER_MAX_AGE = int(os.environ.get('DJANGO_CHECKIN_SCANNER_MAX_AGE', 12 * 60 * 60))
+
+# Liczba wątków puli, w której widoki asynchroniczne renderują szablony HTML i pliki PDF
+ASYNC_RENDER_WORKERS = int(os.environ.get('DJANGO_ASYNC_RENDER_WORKERS', 8))
+
+# Poczta wychodząca (zmienne środowiskowe DJANGO_EMAIL_*)
+EMAIL_BACKEND = os.environ.get('DJANGO_EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = os.environ.get('DJANGO_EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('DJANGO_EMAIL_PORT', 25))
+EMAIL_HOST_USER = os.environ.get('DJANGO_EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('DJANGO_EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('DJANGO_EMAIL_USE_TLS', '0') == '1'
+DEFAULT_FROM_EMAIL = os.environ.get('DJANGO_DEFAULT_FROM_EMAIL', 'szkolenia@localhost')
+
+# Przypomnienia o szkoleniach (polecenie send_reminders): wyprzedzenie (sekundy), liczba wiadomości
+# w porcji i maksymalna liczba wiadomości na sekundę (0 - bez limitu)
+REMINDER_LEAD_TIME = int(os.environ.get('DJANGO_REMINDER_LEAD_TIME', 24 * 60 * 60))
+REMINDER_BATCH_SIZE = int(os.environ.get('DJANGO_REMINDER_BATCH_SIZE', 100))
+REMINDER_RATE = float(os.environ.get('DJANGO_REMINDER_RATE', 0))
+
+# Usuwanie szkoleń i pracowników oznaczonych jako usunięte (polecenie purge_deleted): maksymalna liczba
+# wierszy usuwanych w jednej transakcji i przerwa (sekundy) między transakcjami
+PURGE_BATCH_SIZE = int(os.environ.get('DJANGO_PURGE_BATCH_SIZE', 200))
+PURGE_PAUSE = float(os.environ.get('DJANGO_PURGE_PAUSE', 0.01))
@@ -15,7 +15,8 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path
+from django.conf import settings
+from django.urls import path, re_path
 from trainings import views as t_views
 
 urlpatterns = [
@@ -27,13 +28,36 @@ urlpatterns = [
     path('employees/<int:pk>/', t_views.EmployeeCoursesView.as_view(), name='employee_courses'),
     path('participants/add/', t_views.AddParticipantView.as_view(), name='add_participant'),
     path('courses/', t_views.CoursesView.as_view(), name='courses_list'),
+    path('courses/free_coaches/', t_views.FreeCoachesView.as_view(), name='free_coaches'),
     path('courses/add/', t_views.AddCourseView.as_view(), name='add_course'),
     path('courses/<int:pk>/', t_views.CourseDetailsView.as_view(), name='course_details'),
     path('courses/today/', t_views.CoursesForTodayView.as_view(), name='courses_today'),
     path('courses/<int:pk>/presence_list/', t_views.CoursePresenceListView.as_view(), name='course_presence_list'),
+    path('courses/<int:pk>/presence_list/sync/', t_views.PresenceSyncView.as_view(), name='presence_sync'),
+    path('courses/presence_sw.js', t_views.PresenceServiceWorkerView.as_view(), name='presence_service_worker'),
+    path('courses/<int:pk>/scanner/', t_views.CourseScannerView.as_view(), name='course_scanner'),
+    path('courses/<int:pk>/badges/', t_views.CourseBadgesView.as_view(), name='course_badges'),
+    path('checkin/', t_views.CheckInView.as_view(), name='checkin'),
     path('courses/<int:pk>/participants/', t_views.CourseParticipantsView.as_view(), name='course_participants'),
     path('participants/edit/', t_views.EditParticipantView.as_view(), name='edit_participant'),
+    path('participants/bulk_enroll/', t_views.BulkEnrollmentView.as_view(), name='bulk_enrollment'),
+    path('participants/matrix/', t_views.EnrollmentMatrixView.as_view(), name='enrollment_matrix'),
     path('participants/', t_views.ParticipantsView.as_view(), name='participants_list'),
+    path('reports/attendance/', t_views.AttendanceReportView.as_view(), name='attendance_report'),
+    path('reports/attendance.json', t_views.AttendanceStatsView.as_view(), name='attendance_stats'),
+    path('charts/<slug:chart>.json', t_views.ChartDataView.as_view(), name='chart_data'),
+    path('reports/org/', t_views.OrgRollupView.as_view(), name='org_rollup'),
+    path('reports/org.<slug:fmt>', t_views.OrgRollupView.as_view(), name='org_rollup_export'),
+    path('reports/org/employees/', t_views.OrgEmployeesView.as_view(), name='org_employees'),
+    path('reports/org/employees.<slug:fmt>', t_views.OrgEmployeesView.as_view(), name='org_employees_export'),
+    path('search/', t_views.SearchView.as_view(), name='search'),
+    path('api/courses/<int:pk>/enrollments/', t_views.BulkEnrollmentApiView.as_view(), name='api_bulk_enrollment'),
+    path('api/<slug:resource>/', t_views.ApiView.as_view(), name='api'),
+    path('import/', t_views.ImportPeopleView.as_view(), name='import_people'),
+    path('exports/<slug:dataset>.<slug:fmt>', t_views.ExportView.as_view(), name='export'),
     path('login/', t_views.LoginView.as_view(), name='login'),
     path('logout/', t_views.LogoutView.as_view(), name='logout'),
+    # W trybie DEBUG pliki statyczne serwuje runserver (bez hashy), poza nim - pliki z collectstatic
+    re_path(rf'^{settings.STATIC_URL.strip("/")}/(?P<path>.+)$', t_views.StaticAssetView.as_view(),
+            name='static_asset'),
 ]
@@ -0,0 +1,185 @@
+"""
+Statystyki frekwencji na szkoleniach w podziale na ścieżkę, kategorię, formułę, trenera, miesiąc i spółkę trenera.
+
+Zapisy (Enrollment) są zliczane w bazie jednym zapytaniem grupującym po szkoleniu (zapisanych,
+ze sprawdzoną obecnością, obecnych) - przeniesienie milionów wierszy do Pythona kosztowałoby więcej
+niż samo grupowanie. Liczniki szkoleń trafiają do tablicy NumPy, a każdy podział to np.bincount
+po szkoleniach z kodem grupy szkolenia jako indeksem, więc koszt grupowania zależy od liczby
+szkoleń, a nie zapisów.
+
+Raport jest zapisywany w cache pod kluczem zawierającym wersję danych, zmienianą przez sygnały
+przy zapisie lub usunięciu zapisu, szkolenia albo pracownika. Wersja przechowywana jest w bazie
+(trainings.versions), więc zmiana w jednym procesie serwera unieważnia raport we wszystkich. Kod zmieniający zapisy z pominięciem
+sygnałów (QuerySet.update(), bulk_create(), bulk_update(), zapytania SQL) musi sam wywołać
+invalidate_attendance_stats().
+"""
+from datetime import datetime, timezone as dt_timezone
+from itertools import chain
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Count, Q, Value
+from django.utils import timezone
+
+from . import versions
+from .models import CATEGORIES, ENROLLMENT_ACTIVE, FORMULAS, PATHS, DurationSeconds, Enrollment, TrainingCourse
+
+ANALYTICS_VERSION_KEY = 'attendance:version'
+ANALYTICS_CACHE_TIMEOUT = 60 * 60
+
+COUNTERS = ('enrolled', 'checked', 'present')
+
+UNIX_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+QUARTER = 15 * 60
+
+# Podział -> nazwa wyświetlana
+DIMENSIONS = {
+    'path': 'Ścieżka',
+    'category': 'Kategoria',
+    'formula': 'Formuła',
+    'coach': 'Trener',
+    'month': 'Miesiąc',
+    'company': 'Spółka',
+}
+
+
+def invalidate_attendance_stats():
+    """
+    Unieważnia zapisane w cache raporty frekwencji (we wszystkich procesach serwera).
+
+    Wywoływana przez sygnały modeli oraz po każdym zapisie z ich pominięciem (bulk_create, bulk_update,
+    QuerySet.update(), zapytania SQL), bo raport nie wygasa sam przed ANALYTICS_CACHE_TIMEOUT.
+    """
+    versions.bump(ANALYTICS_VERSION_KEY)
+
+
+def course_counters():
+    """
+    Liczy aktywne zapisy każdego szkolenia jednym zapytaniem grupującym.
+
+    return:
+        tuple: (tablica ID szkoleń, tablica liczników [zapisy, sprawdzone, obecni] o kształcie (n, 3)).
+    """
+    rows = Enrollment.objects.filter(status=ENROLLMENT_ACTIVE).order_by().values('training_course_id').annotate(
+        enrolled=Count('pk'), checked=Count('pk', filter=Q(present__isnull=False)),
+        present=Count('pk', filter=Q(present=True))).values_list('training_course_id', 'enrolled', 'checked', 'present')
+    table = np.fromiter(chain.from_iterable(rows), dtype=np.int64).reshape(-1, 4)
+    return table[:, 0], table[:, 1:]
+
+
+def course_groups():
+    """
+    Pobiera szkolenia i wyznacza dla każdego klucz grupy w każdym podziale.
+
+    return:
+        tuple: (tablica ID szkoleń, {podział: lista kluczy grup}, {podział: {klucz: etykieta}}).
+    """
+    # Czas rozpoczęcia jako znacznik czasu Unix - bez tworzenia obiektu datetime dla każdego wiersza
+    rows = list(TrainingCourse.objects.order_by('pk').annotate(
+        start=DurationSeconds('start_time', Value(UNIX_EPOCH))).values_list(
+        'pk', 'path', 'category', 'formula', 'start',
+        'coach_id', 'coach__first_name', 'coach__last_name', 'coach__company'))
+    ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    months = local_calendar(np.fromiter((row[4] for row in rows), dtype=np.int64, count=len(rows)), '%Y%m').tolist()
+    month_names = {month: f'{month // 100}-{month % 100:02d}' for month in set(months)}
+    keys = {
+        'path': [row[1] for row in rows],
+        'category': [row[2] for row in rows],
+        'formula': [row[3] for row in rows],
+        'month': [month_names[month] for month in months],
+        'coach': [row[5] for row in rows],
+        'company': [row[8] for row in rows],
+    }
+    labels = {
+        'path': dict(PATHS),
+        'category': dict(CATEGORIES),
+        'formula': dict(FORMULAS),
+        'month': {name: name for name in month_names.values()},
+        'coach': {row[5]: f'{row[6]} {row[7]}' for row in rows},
+        'company': {company: company for company in keys['company']},
+    }
+    return ids, keys, labels
+
+
+def local_calendar(timestamps, fmt):
+    """
+    Wyznacza wartość kalendarzową (w strefie czasowej projektu) dla każdego znacznika czasu Unix,
+    np. miesiąc jako liczbę RRRRMM dla fmt='%Y%m' albo dzień tygodnia (0 - niedziela) dla fmt='%w'.
+
+    Przesunięcia stref czasowych są wielokrotnościami 15 minut, więc strefa czasowa jest sprawdzana
+    tylko raz dla każdego kwadransu występującego w danych.
+
+    :param timestamps (np.ndarray): Znaczniki czasu Unix.
+    :param fmt (str): Format strftime dający liczbę całkowitą.
+
+    return:
+        np.ndarray: Wartości kalendarzowe.
+    """
+    quarters, inverse = np.unique(timestamps // QUARTER, return_inverse=True)
+    values = np.fromiter(
+        (int(timezone.localtime(datetime.fromtimestamp(quarter * QUARTER, dt_timezone.utc)).strftime(fmt))
+         for quarter in quarters.tolist()),
+        dtype=np.int64, count=len(quarters))
+    return values[inverse]
+
+
+def _rate(present, checked):
+    return round(present / checked, 4) if checked else None
+
+
+def attendance_stats():
+    """
+    Liczy frekwencję w każdym podziale (wynik jest zapisywany w cache do zmiany danych).
+
+    Frekwencja to udział obecnych wśród zapisów ze sprawdzoną obecnością.
+
+    return:
+        dict: {'total': liczniki wszystkich zapisów, 'dimensions': {podział: lista grup}}; grupa i liczniki
+              to słowniki z kluczami key, label (tylko grupa), enrolled, checked, present, rate.
+    """
+    key = f'attendance:{versions.get_version(ANALYTICS_VERSION_KEY)}'
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_attendance_stats()
+        cache.set(key, stats, ANALYTICS_CACHE_TIMEOUT)
+    return stats
+
+
+def compute_attendance_stats():
+    """
+    Liczy frekwencję bez użycia cache (zob. attendance_stats).
+    """
+    counted_ids, counters = course_counters()
+    course_ids, keys, labels = course_groups()
+
+    # Liczniki w kolejności tablicy course_ids (posortowanej po ID); szkolenia bez zapisów mają zera,
+    # a zapisy szkoleń oznaczonych jako usunięte (jeszcze nieusunięte z bazy) są pomijane
+    counted = np.isin(counted_ids, course_ids)
+    table = np.zeros((len(course_ids), 3), dtype=np.int64)
+    table[np.searchsorted(course_ids, counted_ids[counted])] = counters[counted]
+    per_course = dict(zip(COUNTERS, table.T))
+
+    dimensions = {}
+    for dimension in DIMENSIONS:
+        # Kody grup (kolejność rosnąca kluczy; None - np. szkolenie bez trenera - na końcu)
+        groups = sorted(set(keys[dimension]), key=lambda value: (value is None, value))
+        codes = {value: code for code, value in enumerate(groups)}
+        group_index = np.fromiter((codes[value] for value in keys[dimension]), dtype=np.int64,
+                                  count=len(course_ids))
+        sums = {name: np.bincount(group_index, weights=counts, minlength=len(groups)).astype(np.int64)
+                for name, counts in per_course.items()}
+        dimensions[dimension] = [
+            {
+                'key': value,
+                'label': labels[dimension].get(value, '-'),
+                'enrolled': int(sums['enrolled'][code]),
+                'checked': int(sums['checked'][code]),
+                'present': int(sums['present'][code]),
+                'rate': _rate(sums['present'][code], sums['checked'][code]),
+            }
+            for code, value in enumerate(groups)
+        ]
+
+    total = {name: int(counts.sum()) for name, counts in per_course.items()}
+    total['rate'] = _rate(total['present'], total['checked'])
+    return {'total': total, 'dimensions': dimensions}
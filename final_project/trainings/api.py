@@ -0,0 +1,196 @@
+"""
+Tylko do odczytu API JSON dla szkoleń, pracowników, uczestników i list obecności.
+
+Parametry zapytania:
+- fields: lista pól oddzielonych przecinkiem (domyślnie wszystkie pola zasobu),
+- include: lista relacji do dołączenia (np. coach, participants),
+- after, limit: stronicowanie po kluczu (zwracane są obiekty o ID większym niż after),
+- filtry zdefiniowane dla zasobu (np. course dla list obecności).
+
+Wiersze pobierane są przez values_list() i składane w słowniki bez tworzenia obiektów modeli.
+Relacje do jednego obiektu są dołączane złączeniem w tym samym zapytaniu (jak select_related),
+a relacje do wielu - jednym dodatkowym zapytaniem na relację dla całej strony (jak prefetch_related),
+więc liczba zapytań nie zależy od liczby zwracanych obiektów.
+"""
+from .models import ENROLLMENT_ACTIVE, Employee, Enrollment, Participant, TrainingCourse
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+PERSON_FIELDS = ('id', 'first_name', 'last_name', 'gender', 'e_mail', 'phone_number')
+COURSE_FIELDS = ('id', 'topic', 'start_time', 'end_time', 'category', 'path', 'formula', 'participants_limit',
+                 'coach_id', 'took_place', 'materials', 'duration_seconds')
+
+
+class ApiError(Exception):
+    """
+    Błąd parametrów zapytania API (odpowiedź 400).
+    """
+
+
+class ToOne:
+    """
+    Relacja do jednego obiektu, dołączana złączeniem w zapytaniu głównym.
+
+    :param lookup (str): Nazwa pola klucza obcego.
+    :param fields (tuple): Pola obiektu powiązanego.
+    """
+    def __init__(self, lookup, fields):
+        self.lookup = lookup
+        self.fields = fields
+
+    def columns(self):
+        return [f'{self.lookup}__{field}' for field in self.fields]
+
+
+class ToMany:
+    """
+    Relacja do wielu obiektów, pobierana jednym zapytaniem dla wszystkich obiektów strony.
+
+    :param queryset (callable): Funkcja zwracająca bazowy QuerySet obiektów powiązanych.
+    :param key (str): Pole wskazujące obiekt nadrzędny.
+    :param fields (dict): Słownik {nazwa pola w odpowiedzi: ścieżka pola w zapytaniu}.
+    """
+    def __init__(self, queryset, key, fields):
+        self.queryset = queryset
+        self.key = key
+        self.fields = fields
+
+    def fetch(self, ids):
+        """
+        return:
+            dict: {ID obiektu nadrzędnego: lista słowników obiektów powiązanych}.
+        """
+        names = list(self.fields)
+        rows = self.queryset().filter(**{f'{self.key}__in': ids}).order_by(self.key, 'pk').values_list(
+            self.key, *self.fields.values())
+        related = {pk: [] for pk in ids}
+        for key, *values in rows:
+            related[key].append(dict(zip(names, values)))
+        return related
+
+
+class Resource:
+    """
+    Opis zasobu API.
+
+    :param model: Model Django.
+    :param fields (tuple): Pola zwracane domyślnie (i jedyne dozwolone w parametrze fields).
+    :param to_one (dict): Relacje do jednego obiektu {nazwa: ToOne}.
+    :param to_many (dict): Relacje do wielu obiektów {nazwa: ToMany}.
+    :param filters (dict): Dozwolone filtry {parametr zapytania: pole modelu}.
+    :param queryset (callable): Funkcja zwracająca obiekty zasobu (domyślnie wszystkie obiekty modelu).
+    """
+    def __init__(self, model, fields, to_one=None, to_many=None, filters=None, queryset=None):
+        self.model = model
+        self.queryset = queryset or model.objects.all
+        self.fields = fields
+        self.to_one = to_one or {}
+        self.to_many = to_many or {}
+        self.filters = filters or {}
+
+    def _split(self, value, allowed, name):
+        if not value:
+            return []
+        items = [item.strip() for item in value.split(',') if item.strip()]
+        unknown = [item for item in items if item not in allowed]
+        if unknown:
+            raise ApiError(f"Nieznane wartości parametru {name}: {', '.join(unknown)}. "
+                           f"Dozwolone: {', '.join(allowed)}.")
+        return list(dict.fromkeys(items))
+
+    def _int(self, params, name, default=None):
+        value = params.get(name)
+        if value in (None, ''):
+            return default
+        try:
+            return int(value)
+        except ValueError:
+            raise ApiError(f"Parametr {name} musi być liczbą całkowitą.")
+
+    def page(self, params):
+        """
+        Zwraca stronę obiektów zasobu zgodnie z parametrami zapytania.
+
+        :param params (QueryDict): Parametry zapytania GET.
+
+        return:
+            tuple: (lista słowników obiektów, ID ostatniego obiektu lub None, jeśli to ostatnia strona).
+        """
+        fields = self._split(params.get('fields'), self.fields, 'fields') or list(self.fields)
+        includes = self._split(params.get('include'), list(self.to_one) + list(self.to_many), 'include')
+        limit = self._int(params, 'limit', DEFAULT_LIMIT)
+        if not 1 <= limit <= MAX_LIMIT:
+            raise ApiError(f"Parametr limit musi mieścić się w zakresie 1-{MAX_LIMIT}.")
+        after = self._int(params, 'after')
+
+        queryset = self.queryset().order_by('pk')
+        if after is not None:
+            queryset = queryset.filter(pk__gt=after)
+        for param, field in self.filters.items():
+            value = self._int(params, param)
+            if value is not None:
+                queryset = queryset.filter(**{field: value})
+
+        to_one = [(name, self.to_one[name]) for name in includes if name in self.to_one]
+        columns = ['pk'] + fields
+        for _, relation in to_one:
+            columns += relation.columns()
+        rows = list(queryset.values_list(*columns)[:limit + 1])
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+
+        objects = []
+        for row in rows:
+            obj = dict(zip(fields, row[1:len(fields) + 1]))
+            position = len(fields) + 1
+            for name, relation in to_one:
+                values = row[position:position + len(relation.fields)]
+                position += len(relation.fields)
+                obj[name] = dict(zip(relation.fields, values)) if values[0] is not None else None
+            objects.append(obj)
+
+        ids = [row[0] for row in rows]
+        for name in includes:
+            if name in self.to_many and ids:
+                related = self.to_many[name].fetch(ids)
+                for pk, obj in zip(ids, objects):
+                    obj[name] = related[pk]
+
+        return objects, (ids[-1] if has_next else None)
+
+
+def _active_enrollments():
+    return Enrollment.objects.filter(status=ENROLLMENT_ACTIVE, training_course__deleted_at__isnull=True)
+
+
+RESOURCES = {
+    'courses': Resource(
+        TrainingCourse, COURSE_FIELDS,
+        to_one={'coach': ToOne('coach', ('id', 'first_name', 'last_name', 'e_mail'))},
+        to_many={'participants': ToMany(_active_enrollments, 'training_course_id', {
+            'id': 'participant_id', 'first_name': 'participant__first_name',
+            'last_name': 'participant__last_name', 'e_mail': 'participant__e_mail', 'present': 'present'})},
+        filters={'coach': 'coach_id'},
+    ),
+    'employees': Resource(
+        Employee, PERSON_FIELDS + ('position', 'company', 'team', 'team_leader', 'supervisor'),
+        to_many={'courses': ToMany(TrainingCourse.objects.all, 'coach_id', {
+            'id': 'pk', 'topic': 'topic', 'start_time': 'start_time', 'end_time': 'end_time'})},
+    ),
+    'participants': Resource(
+        Participant, PERSON_FIELDS,
+        to_many={'courses': ToMany(_active_enrollments, 'participant_id', {
+            'id': 'training_course_id', 'topic': 'training_course__topic',
+            'start_time': 'training_course__start_time', 'end_time': 'training_course__end_time'})},
+    ),
+    'presence': Resource(
+        Enrollment, ('id', 'participant_id', 'training_course_id', 'enrolled_at', 'present', 'status'),
+        to_one={
+            'participant': ToOne('participant', ('id', 'first_name', 'last_name', 'e_mail')),
+            'course': ToOne('training_course', ('id', 'topic', 'start_time', 'end_time')),
+        },
+        filters={'course': 'training_course_id', 'participant': 'participant_id'},
+        queryset=lambda: Enrollment.objects.filter(training_course__deleted_at__isnull=True),
+    ),
+}
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TrainingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'trainings'
+
+    def ready(self):
+        from . import signals  # noqa: F401 - rejestracja odbiorników sygnałów
@@ -0,0 +1,153 @@
+"""
+Masowy zapis wielu uczestników na jedno szkolenie (formularz i API).
+
+Wszystkie sprawdzenia są zbiorowe, niezależnie od liczby uczestników: istniejący uczestnicy,
+istniejące zapisy, kolizje terminów i zapełnienie szkolenia to po jednym zapytaniu, a nowe zapisy
+trafiają do bazy jednym bulk_create(ignore_conflicts=True). Zapisy dodane w międzyczasie przez
+inne żądanie nie powodują błędu - uczestnik trafia wtedy do pominiętych.
+"""
+import csv
+import re
+from itertools import chain
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import snapshots
+from .analytics import invalidate_attendance_stats
+from .forecasting import enrollment_limit
+from .models import ENROLLMENT_ACTIVE, Enrollment, Participant, TrainingCourse, reenrollment
+from .scheduling import course_participant_conflicts
+
+# Maksymalna liczba uczestników w jednym żądaniu
+MAX_PARTICIPANTS = 5000
+
+# Separatory identyfikatorów uczestników wpisanych w polu tekstowym
+IDS_SEPARATORS = re.compile(r'[\s,;]+')
+
+
+class BulkEnrollmentResult:
+    """
+    Wynik masowego zapisu.
+
+    Atrybuty:
+    - added (list): ID zapisanych uczestników.
+    - skipped (list): Pary (ID uczestnika, powód) - uczestnicy już zapisani na szkolenie.
+    - rejected (list): Pary (podana wartość, powód) - nieprawidłowe ID, kolizje terminów, brak miejsc.
+    """
+    def __init__(self):
+        self.added = []
+        self.skipped = []
+        self.rejected = []
+
+    def as_dict(self):
+        return {
+            'added': self.added,
+            'skipped': [{'participant': participant, 'reason': reason} for participant, reason in self.skipped],
+            'rejected': [{'participant': value, 'reason': reason} for value, reason in self.rejected],
+        }
+
+
+def split_participant_ids(text):
+    """
+    Dzieli tekst na identyfikatory uczestników (oddzielone przecinkiem, średnikiem lub białym znakiem).
+    """
+    return [value for value in IDS_SEPARATORS.split(text or '') if value]
+
+
+def read_participant_ids(stream):
+    """
+    Czyta identyfikatory uczestników z pliku CSV: z kolumny 'participant', jeśli plik ma taki nagłówek,
+    a w przeciwnym razie z pierwszej kolumny każdego wiersza.
+
+    :param stream: Strumień tekstowy z zawartością pliku CSV.
+
+    return:
+        list: Wartości z pliku (niesprawdzone).
+    """
+    reader = csv.reader(stream)
+    first = next(reader, None)
+    if first is None:
+        return []
+    header = [name.strip() for name in first]
+    if 'participant' in header:
+        column, rows = header.index('participant'), reader
+    else:
+        column, rows = 0, chain([first], reader)
+    return [row[column].strip() for row in rows if len(row) > column and row[column].strip()]
+
+
+def bulk_enroll(course, values):
+    """
+    Zapisuje uczestników na szkolenie.
+
+    Uczestnicy są przyjmowani w podanej kolejności do wyczerpania limitu zapisów (enrollment_limit);
+    powtórzone ID są pomijane bez komunikatu.
+
+    :param course (TrainingCourse): Szkolenie.
+    :param values (iterable): ID uczestników (liczby lub tekst).
+
+    return:
+        BulkEnrollmentResult: Zapisani, pominięci i odrzuceni uczestnicy.
+    """
+    result = BulkEnrollmentResult()
+    participant_ids = []
+    for value in dict.fromkeys(values):
+        try:
+            participant_ids.append(int(value))
+        except (TypeError, ValueError):
+            result.rejected.append((value, "Nieprawidłowy identyfikator uczestnika."))
+    participant_ids = list(dict.fromkeys(participant_ids))
+
+    with transaction.atomic():
+        # Blokada wiersza szkolenia szereguje równoległe zapisy na to samo szkolenie (poza SQLite)
+        course = TrainingCourse.objects.select_for_update().get(pk=course.pk)
+        existing = set(Participant.objects.filter(pk__in=participant_ids).values_list('pk', flat=True))
+        statuses = dict(Enrollment.objects.filter(
+            training_course=course, participant_id__in=participant_ids).values_list('participant_id', 'status'))
+        enrolled = {participant_id for participant_id, status in statuses.items() if status == ENROLLMENT_ACTIVE}
+        conflicts = course_participant_conflicts(course, existing - enrolled)
+        free_places = enrollment_limit(course) - Enrollment.objects.filter(
+            training_course=course, status=ENROLLMENT_ACTIVE).count()
+
+        candidates = []
+        for participant_id in participant_ids:
+            if participant_id not in existing:
+                result.rejected.append((participant_id, "Uczestnik nie istnieje."))
+            elif participant_id in enrolled:
+                result.skipped.append((participant_id, "Uczestnik jest już zapisany na to szkolenie."))
+            elif participant_id in conflicts:
+                result.rejected.append((participant_id, f"Szkolenie {course.topic} odbywa się w tym samym czasie "
+                                                        f"co szkolenie {conflicts[participant_id]}."))
+            elif len(candidates) >= free_places:
+                result.rejected.append((participant_id, "Limit uczestników został osiągnięty."))
+            else:
+                candidates.append(participant_id)
+
+        enrolled_at = timezone.now()
+        reactivated = [participant_id for participant_id in candidates if participant_id in statuses]
+        if reactivated:
+            # Anulowane zapisy są przywracane (z pominięciem przywróconych w międzyczasie przez inne żądanie)
+            Enrollment.objects.filter(training_course=course, participant_id__in=reactivated).exclude(
+                status=ENROLLMENT_ACTIVE).update(**reenrollment(enrolled_at))
+        Enrollment.objects.bulk_create(
+            [Enrollment(participant_id=participant_id, training_course=course, enrolled_at=enrolled_at)
+             for participant_id in candidates if participant_id not in statuses],
+            ignore_conflicts=True)
+        # ignore_conflicts nie zwraca wstawionych wierszy - zapisy z tą datą to zapisy z tego żądania
+        # (nowe i przywrócone)
+        inserted = set(Enrollment.objects.filter(
+            training_course=course, participant_id__in=candidates, enrolled_at=enrolled_at).values_list(
+            'participant_id', flat=True)) if candidates else set()
+
+    for participant_id in candidates:
+        if participant_id in inserted:
+            result.added.append(participant_id)
+        else:
+            result.skipped.append((participant_id, "Uczestnik jest już zapisany na to szkolenie."))
+
+    # bulk_create i update() nie wysyłają sygnałów post_save
+    if result.added:
+        snapshots.mark_changed('course_participants', course.pk)
+        invalidate_attendance_stats()
+    return result
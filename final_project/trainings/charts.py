@@ -0,0 +1,96 @@
+"""
+Dane wykresów (godziny trenerów, szkolenia w miesiącach, frekwencja według ścieżki i kategorii).
+
+Dane liczone są agregacją w bazie danych i zwracane jako JSON, a wykresy rysuje przeglądarka
+(static/trainings/charts.js). Obraz PNG (render_bar_chart_png) jest generowany tylko tam, gdzie
+wykres musi powstać po stronie serwera, np. w raportach PDF.
+"""
+import io
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from .analytics import attendance_stats
+from .models import Employee, TrainingCourse
+
+
+def coach_hours():
+    # Suma czasów trwania liczona w bazie danych jednym zapytaniem
+    rows = list(Employee.objects.order_by('last_name', 'first_name', 'pk').annotate(
+        total_seconds=Sum('trainingcourse__duration_seconds', filter=Q(trainingcourse__deleted_at__isnull=True))
+    ).values_list(
+        'first_name', 'last_name', 'total_seconds'))
+    return {
+        'title': 'Czas trwania szkoleń według pracowników',
+        'unit': 'h',
+        'labels': [f'{first_name} {last_name}' for first_name, last_name, _ in rows],
+        'values': [round((total_seconds or 0) / 3600, 2) for _, _, total_seconds in rows],
+    }
+
+
+def courses_per_month():
+    rows = list(TrainingCourse.objects.annotate(month=TruncMonth('start_time')).order_by('month').values(
+        'month').annotate(courses=Count('pk')).values_list('month', 'courses'))
+    return {
+        'title': 'Liczba szkoleń w miesiącach',
+        'unit': '',
+        'labels': [f'{month:%Y-%m}' for month, _ in rows],
+        'values': [courses for _, courses in rows],
+    }
+
+
+def _attendance(dimension, title):
+    groups = attendance_stats()['dimensions'][dimension]
+    return {
+        'title': title,
+        'unit': '%',
+        'labels': [group['label'] for group in groups],
+        'values': [round(group['rate'] * 100, 1) if group['rate'] is not None else None for group in groups],
+    }
+
+
+def attendance_by_path():
+    return _attendance('path', 'Frekwencja według ścieżki')
+
+
+def attendance_by_category():
+    return _attendance('category', 'Frekwencja według kategorii')
+
+
+# Nazwa wykresu w adresie URL -> funkcja zwracająca dane {'title', 'unit', 'labels', 'values'}
+CHARTS = {
+    'coach_hours': coach_hours,
+    'courses_per_month': courses_per_month,
+    'attendance_by_path': attendance_by_path,
+    'attendance_by_category': attendance_by_category,
+}
+
+
+def render_bar_chart_png(chart, xlabel='', ylabel=''):
+    """
+    Rysuje wykres słupkowy z danych wykresu (wynik funkcji z CHARTS) i zwraca go jako obraz PNG.
+
+    :param chart (dict): Dane wykresu.
+    :param xlabel (str): Etykieta osi x.
+    :param ylabel (str): Etykieta osi y.
+
+    return:
+        bytes: Obraz PNG.
+    """
+    # matplotlib jest importowany dopiero tutaj - widoki zwracające JSON go nie potrzebują
+    import matplotlib.pyplot as plt
+
+    figure = plt.figure(figsize=(10, 6))
+    try:
+        plt.bar(chart['labels'], [value or 0 for value in chart['values']], color='blue')
+        plt.xlabel(xlabel)
+        plt.ylabel(ylabel)
+        plt.title(chart['title'])
+        plt.xticks(rotation=45, ha='right')
+        # Optymalizuje układ wykresu, aby uniknąć nachodzenia elementów
+        plt.tight_layout()
+        buffer = io.BytesIO()
+        plt.savefig(buffer, format='png')
+        return buffer.getvalue()
+    finally:
+        plt.close(figure)
@@ -0,0 +1,125 @@
+"""
+Rejestracja obecności przez skanowanie kodów QR uczestników.
+
+Każdy uczestnik ma stały, podpisany token (kod QR na identyfikatorze), a stanowisko skanowania
+dostaje klucz ważny settings.CHECKIN_SCANNER_MAX_AGE sekund i przypisany do jednego szkolenia
+(strona skanera, dostępna po zalogowaniu). Punkt końcowy rejestracji sprawdza tylko podpisy - nie
+używa sesji ani szablonów - i oznacza obecność porcji zeskanowanych tokenów jednym zapytaniem
+UPDATE ... RETURNING na zapisach (Enrollment.present), z pominięciem ORM, którego budowanie zapytania
+kosztuje kilka razy więcej niż jego wykonanie. Ponowne zeskanowanie tego samego kodu niczego nie zmienia.
+
+Kody QR są generowane, jeśli zainstalowany jest pakiet 'segno'; w przeciwnym razie identyfikator
+zawiera sam token (czytniki kodów kreskowych działające jak klawiatura wpisują go tak samo).
+"""
+from django.conf import settings
+from django.core import signing
+from django.db import connection
+from django.utils import timezone
+
+from . import snapshots
+from .analytics import invalidate_attendance_stats
+from .models import ENROLLMENT_ACTIVE, Enrollment
+
+try:
+    import segno
+except ImportError:     # pragma: no cover - kody QR są opcjonalne
+    segno = None
+
+# Maksymalna liczba tokenów w jednym żądaniu rejestracji
+MAX_BATCH = 500
+
+participant_signer = signing.Signer(salt='trainings.checkin.participant')
+scanner_signer = signing.TimestampSigner(salt='trainings.checkin.scanner')
+
+
+def participant_token(participant_id):
+    """
+    Zwraca podpisany token uczestnika (treść kodu QR).
+    """
+    return participant_signer.sign(str(participant_id))
+
+
+def scanner_key(course_id):
+    """
+    Zwraca klucz stanowiska skanowania dla szkolenia (ważny settings.CHECKIN_SCANNER_MAX_AGE sekund).
+    """
+    return scanner_signer.sign(str(course_id))
+
+
+def scanner_course(key):
+    """
+    Zwraca ID szkolenia z klucza stanowiska skanowania.
+
+    Rzuca signing.BadSignature, jeśli klucz jest nieprawidłowy lub wygasł.
+    """
+    return int(scanner_signer.unsign(key, max_age=settings.CHECKIN_SCANNER_MAX_AGE))
+
+
+def qr_svg(text):
+    """
+    Zwraca kod QR jako element SVG lub None, jeśli pakiet 'segno' nie jest zainstalowany.
+    """
+    if segno is None:
+        return None
+    return segno.make(text, error='m').svg_inline(scale=4)
+
+
+def mark_present_sql(count):
+    """
+    Zwraca zapytanie oznaczające obecność (wraz z czasem zmiany) na szkoleniu aktywnych zapisów podanych
+    uczestników (count parametrów ID uczestników) i zwracające ID uczestników, których zapisy zmieniło.
+    Zapisy oznaczone już jako obecne (np. przez inne stanowisko) nie są zmieniane, więc ponowne wykonanie
+    niczego nie zmienia.
+    """
+    table = Enrollment._meta.db_table
+    placeholders = ', '.join(['%s'] * count)
+    return (f"UPDATE {table} SET present = %s, present_changed_at = %s "
+            f"WHERE training_course_id = %s AND status = %s AND participant_id IN ({placeholders}) "
+            f"AND (present IS NULL OR present = %s) RETURNING participant_id")
+
+
+def check_in(course_id, tokens):
+    """
+    Oznacza obecność uczestników na szkoleniu.
+
+    :param course_id (int): ID szkolenia.
+    :param tokens (list): Zeskanowane tokeny uczestników.
+
+    return:
+        dict: {'present': ID uczestników oznaczonych teraz jako obecni, 'already': ID uczestników oznaczonych
+              wcześniej, 'unknown': ID uczestników niezapisanych na szkolenie, 'invalid': liczba błędnych tokenów}.
+    """
+    result = {'present': [], 'already': [], 'unknown': [], 'invalid': 0}
+    participant_ids = []
+    for token in dict.fromkeys(tokens):
+        try:
+            participant_ids.append(int(participant_signer.unsign(token)))
+        except (signing.BadSignature, TypeError, ValueError):
+            result['invalid'] += 1
+    if not participant_ids:
+        return result
+
+    participant_ids = list(dict.fromkeys(participant_ids))
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cursor:
+        cursor.execute(mark_present_sql(len(participant_ids)),
+                       [True, now, course_id, ENROLLMENT_ACTIVE, *participant_ids, False])
+        marked = {row[0] for row in cursor.fetchall()}
+    rest = [participant_id for participant_id in participant_ids if participant_id not in marked]
+    # Drugie zapytanie tylko dla uczestników, których UPDATE nie zmienił (ponowny skan lub brak zapisu)
+    already = set(Enrollment.objects.filter(
+        training_course_id=course_id, participant_id__in=rest, status=ENROLLMENT_ACTIVE).values_list(
+        'participant_id', flat=True)) if rest else set()
+    for participant_id in participant_ids:
+        if participant_id in marked:
+            result['present'].append(participant_id)
+        elif participant_id in already:
+            result['already'].append(participant_id)
+        else:
+            result['unknown'].append(participant_id)
+
+    if marked:
+        # Zapytanie SQL z pominięciem ORM nie wysyła sygnałów post_save
+        snapshots.mark_changed('course_participants', course_id)
+        invalidate_attendance_stats()
+    return result
@@ -0,0 +1,345 @@
+"""
+Strumieniowy eksport danych tabelarycznych (CSV, JSONL, XLSX).
+
+Każdy zbiór danych to nagłówek i generator wierszy pobieranych z bazy porcjami przez
+QuerySet.iterator(), a każdy format to generator bajtów, który można przekazać
+bezpośrednio do StreamingHttpResponse. Zużycie pamięci nie zależy od liczby wierszy.
+
+Pod ASGI StreamingHttpResponse z synchronicznym generatorem wczytuje całą zawartość do listy
+przed wysłaniem - tam generator trzeba opakować w async_chunks().
+"""
+import csv
+import io
+import re
+import zipfile
+from itertools import groupby
+from operator import itemgetter
+from xml.sax.saxutils import escape
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import (
+    CATEGORIES, ENROLLMENT_ACTIVE, ENROLLMENT_STATUSES, FORMULAS, GENDERS, PATHS, Employee, Enrollment, Participant,
+    TrainingCourse
+)
+
+# Liczba wierszy pobieranych z bazy w jednej porcji i zapisywanych do strumienia naraz
+CHUNK_SIZE = 2000
+
+CATEGORY_LABELS = dict(CATEGORIES)
+PATH_LABELS = dict(PATHS)
+FORMULA_LABELS = dict(FORMULAS)
+GENDER_LABELS = dict(GENDERS)
+STATUS_LABELS = dict(ENROLLMENT_STATUSES)
+
+
+def _local(value):
+    return timezone.localtime(value) if value is not None else None
+
+
+def courses_rows():
+    """
+    Wiersze zbioru 'courses': wszystkie szkolenia wraz z trenerem.
+    """
+    rows = TrainingCourse.objects.order_by('pk').values_list(
+        'pk', 'topic', 'start_time', 'end_time', 'category', 'path', 'formula', 'participants_limit',
+        'coach__first_name', 'coach__last_name', 'took_place', 'materials'
+    ).iterator(chunk_size=CHUNK_SIZE)
+    for (pk, topic, start_time, end_time, category, path, formula, limit,
+         coach_first_name, coach_last_name, took_place, materials) in rows:
+        yield (pk, topic, _local(start_time), _local(end_time), CATEGORY_LABELS.get(category),
+               PATH_LABELS.get(path), FORMULA_LABELS.get(formula), limit,
+               f'{coach_first_name} {coach_last_name}', took_place, materials)
+
+
+def participants_rows():
+    """
+    Wiersze zbioru 'participants': jeden wiersz na zapis uczestnika na szkolenie
+    (uczestnicy bez szkoleń mają puste kolumny szkolenia).
+    """
+    rows = Participant.objects.order_by('pk', 'enrollment__training_course__pk').values_list(
+        'pk', 'first_name', 'last_name', 'gender', 'e_mail', 'phone_number', 'enrollment__training_course__pk',
+        'enrollment__training_course__topic', 'enrollment__training_course__start_time',
+        'enrollment__training_course__deleted_at', 'enrollment__status'
+    ).iterator(chunk_size=CHUNK_SIZE)
+    for (pk, first_name, last_name, gender, e_mail, phone_number), group in groupby(rows, itemgetter(slice(6))):
+        # Anulowane zapisy i szkolenia oznaczone jako usunięte są pomijane; uczestnik bez innych szkoleń
+        # ma puste kolumny szkolenia
+        courses = [row[6:9] for row in group if row[6] is not None and row[9] is None
+                   and row[10] == ENROLLMENT_ACTIVE] or [(None, None, None)]
+        for course_pk, topic, start_time in courses:
+            yield (pk, first_name, last_name, GENDER_LABELS.get(gender), e_mail, phone_number,
+                   course_pk, topic, _local(start_time))
+
+
+def presence_rows():
+    """
+    Wiersze zbioru 'presence': zapisy na szkolenia wraz z obecnością uczestników.
+    """
+    rows = Enrollment.objects.filter(training_course__deleted_at__isnull=True).order_by(
+        'training_course_id', 'participant_id').values_list(
+        'training_course_id', 'training_course__topic', 'training_course__start_time',
+        'participant_id', 'participant__first_name', 'participant__last_name', 'status', 'present'
+    ).iterator(chunk_size=CHUNK_SIZE)
+    for course_pk, topic, start_time, participant_pk, first_name, last_name, status, present in rows:
+        yield (course_pk, topic, _local(start_time), participant_pk, first_name, last_name,
+               STATUS_LABELS.get(status), present)
+
+
+def coach_hours_rows():
+    """
+    Wiersze zbioru 'coach_hours': liczba i łączny czas trwania szkoleń prowadzonych przez każdego pracownika.
+    """
+    rows = Employee.objects.order_by('pk').annotate(
+        courses_count=Count('trainingcourse', filter=Q(trainingcourse__deleted_at__isnull=True)),
+        total_seconds=Sum('trainingcourse__duration_seconds', filter=Q(trainingcourse__deleted_at__isnull=True)),
+    ).values_list(
+        'pk', 'first_name', 'last_name', 'company', 'team', 'courses_count', 'total_seconds'
+    ).iterator(chunk_size=CHUNK_SIZE)
+    for pk, first_name, last_name, company, team, courses_count, total_seconds in rows:
+        hours = round(total_seconds / 3600, 2) if total_seconds else 0
+        yield pk, first_name, last_name, company, team, courses_count, hours
+
+
+# Zbiory danych: nazwa -> (nagłówek, funkcja zwracająca generator wierszy)
+DATASETS = {
+    'courses': (
+        ('id', 'topic', 'start_time', 'end_time', 'category', 'path', 'formula', 'participants_limit',
+         'coach', 'took_place', 'materials'),
+        courses_rows,
+    ),
+    'participants': (
+        ('id', 'first_name', 'last_name', 'gender', 'e_mail', 'phone_number',
+         'course_id', 'course_topic', 'course_start_time'),
+        participants_rows,
+    ),
+    'presence': (
+        ('course_id', 'course_topic', 'course_start_time', 'participant_id', 'first_name', 'last_name',
+         'status', 'present'),
+        presence_rows,
+    ),
+    'coach_hours': (
+        ('employee_id', 'first_name', 'last_name', 'company', 'team', 'courses_count', 'hours'),
+        coach_hours_rows,
+    ),
+}
+
+
+# Etykiety zbiorów danych wyświetlane w menu eksportu
+DATASET_LABELS = (
+    ('courses', 'Szkolenia'),
+    ('participants', 'Uczestnicy i zapisy na szkolenia'),
+    ('presence', 'Listy obecności'),
+    ('coach_hours', 'Godziny trenerów'),
+)
+
+
+def _batches(rows, size=CHUNK_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def stream_csv(header, rows):
+    """
+    Generator bajtów pliku CSV (UTF-8 z BOM, aby arkusze kalkulacyjne poprawnie odczytały polskie znaki).
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    yield '\ufeff'.encode() + buffer.getvalue().encode()
+    for batch in _batches(rows):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_text(value) for value in row] for row in batch)
+        yield buffer.getvalue().encode()
+
+
+def stream_jsonl(header, rows):
+    """
+    Generator bajtów pliku JSON Lines: jeden obiekt JSON na wiersz.
+    """
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for batch in _batches(rows):
+        yield ''.join(encoder.encode(dict(zip(header, row))) + '\n' for row in batch).encode()
+
+
+class _StreamBuffer(io.RawIOBase):
+    """
+    Niepozycjonowalny bufor, do którego zipfile zapisuje archiwum; zawartość jest odbierana porcjami metodą pop().
+    """
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+# Znaki sterujące niedozwolone w XML 1.0
+_ILLEGAL_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+XLSX_SHEET_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+XLSX_SHEET_FOOTER = '</sheetData></worksheet>'
+
+
+def _xlsx_cell(value):
+    if value is None:
+        return '<c/>'
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c><v>{value}</v></c>'
+    text = escape(_ILLEGAL_XML_CHARS.sub('', _text(value)))
+    return f'<c t="inlineStr"><is><t>{text}</t></is></c>'
+
+
+def _xlsx_row(row):
+    return '<row>' + ''.join(_xlsx_cell(value) for value in row) + '</row>'
+
+
+def stream_xlsx(header, rows, sheet_name='export'):
+    """
+    Generator bajtów minimalnego skoroszytu XLSX z jednym arkuszem.
+
+    Archiwum ZIP jest zapisywane do niepozycjonowalnego bufora (deskryptory danych zamiast
+    przewijania), a arkusz jest kompresowany wiersz po wierszu, więc w pamięci znajduje się
+    tylko bieżąca porcja danych.
+    """
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', XLSX_CONTENT_TYPES)
+        archive.writestr('_rels/.rels', XLSX_ROOT_RELS)
+        archive.writestr('xl/workbook.xml', XLSX_WORKBOOK.format(name=escape(sheet_name[:31])))
+        archive.writestr('xl/_rels/workbook.xml.rels', XLSX_WORKBOOK_RELS)
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write((XLSX_SHEET_HEADER + _xlsx_row(header)).encode())
+            for batch in _batches(rows):
+                sheet.write(''.join(_xlsx_row(row) for row in batch).encode())
+                yield buffer.pop()
+            sheet.write(XLSX_SHEET_FOOTER.encode())
+    yield buffer.pop()
+
+
+async def async_chunks(chunks):
+    """
+    Asynchroniczny generator porcji synchronicznego generatora bajtów.
+
+    Każda porcja (z zapytaniami do bazy) jest pobierana przez sync_to_async w wątku połączenia
+    z bazą, więc pod ASGI odpowiedź jest wysyłana porcjami zamiast po wygenerowaniu całego pliku.
+    Przerwanie pobierania (np. rozłączenie klienta) zamyka generator i jego kursor.
+    """
+    iterator = iter(chunks)
+    get_chunk = sync_to_async(next)
+    try:
+        while True:
+            chunk = await get_chunk(iterator, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        if hasattr(iterator, 'close'):
+            await sync_to_async(iterator.close)()
+
+
+# Formaty eksportu: rozszerzenie -> (typ MIME, generator)
+FORMATS = {
+    'csv': ('text/csv; charset=utf-8', stream_csv),
+    'jsonl': ('application/x-ndjson; charset=utf-8', stream_jsonl),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', stream_xlsx),
+}
+
+
+def stream_export(dataset, fmt):
+    """
+    Zwraca typ MIME i generator bajtów dla wskazanego zbioru danych i formatu.
+
+    :param dataset (str): Nazwa zbioru danych (klucz DATASETS).
+    :param fmt (str): Format eksportu (klucz FORMATS).
+
+    return:
+        tuple: (typ MIME, generator bajtów).
+
+    Rzuca KeyError, jeśli zbiór danych lub format nie istnieje.
+    """
+    header, rows = DATASETS[dataset]
+    return stream_table(header, rows(), fmt)
+
+
+def stream_table(header, rows, fmt):
+    """
+    Zwraca typ MIME i generator bajtów dla dowolnych wierszy (np. raportu z filtrami).
+
+    :param header (tuple): Nagłówek.
+    :param rows (iterable): Wiersze (krotki wartości w kolejności nagłówka).
+    :param fmt (str): Format eksportu (klucz FORMATS).
+
+    return:
+        tuple: (typ MIME, generator bajtów).
+
+    Rzuca KeyError, jeśli format nie istnieje.
+    """
+    content_type, writer = FORMATS[fmt]
+    return content_type, writer(header, rows)
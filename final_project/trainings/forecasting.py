@@ -0,0 +1,212 @@
+"""
+Prognoza odsetka nieobecności (no-show) na szkoleniach i wynikający z niej limit zapisów z nadrezerwacją.
+
+Model to addytywna regresja liniowa z regularyzacją (ridge): odsetek nieobecnych na szkoleniu to suma
+wyrazu wolnego i współczynników jego ścieżki, kategorii, formuły, dnia tygodnia i trenera. Model jest
+dopasowywany metodą backfitting - każdy krok to np.bincount po szkoleniach, bez budowania macierzy
+zmiennych zero-jedynkowych (z kolumną na każdego trenera). Szkolenia ważone są liczbą zapisów
+ze sprawdzoną obecnością, a regularyzacja ściąga współczynniki rzadkich poziomów (np. nowego trenera)
+do zera, czyli do średniej.
+
+Model dopasowuje polecenie fit_noshow_model (np. z crona) i zapisuje tabele współczynników do pliku JSON
+settings.NOSHOW_MODEL_PATH; procesy aplikacji wczytują plik ponownie po jego zmianie.
+"""
+import json
+import math
+import os
+import tempfile
+import threading
+from datetime import timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Value
+from django.utils import timezone
+
+from .analytics import UNIX_EPOCH, course_counters, local_calendar
+from .models import DurationSeconds, TrainingCourse
+
+FACTORS = ('path', 'category', 'formula', 'weekday', 'coach')
+
+# Siła regularyzacji - liczba "wirtualnych" zapisów o średniej nieobecności na każdym poziomie
+RIDGE = 20.0
+MAX_ITERATIONS = 50
+TOLERANCE = 1e-6
+
+# Górna granica prognozy - nawet przy bardzo złej historii część uczestników przychodzi
+MAX_NO_SHOW_RATE = 0.9
+
+_loaded = {}
+_lock = threading.Lock()
+
+
+def course_factors(course):
+    """
+    Zwraca poziomy czynników modelu dla szkolenia.
+
+    :param course (TrainingCourse): Szkolenie.
+
+    return:
+        dict: {czynnik: poziom}.
+    """
+    return {
+        'path': course.path,
+        'category': course.category,
+        'formula': course.formula,
+        'weekday': int(timezone.localtime(course.start_time).strftime('%w')),
+        'coach': course.coach_id if course.coach_id is not None else -1,
+    }
+
+
+def training_data():
+    """
+    Pobiera dane do dopasowania modelu: szkolenia ze sprawdzoną obecnością co najmniej jednego uczestnika.
+
+    return:
+        tuple: ({czynnik: tablica poziomów}, tablica odsetków nieobecnych, tablica wag - liczb sprawdzonych zapisów).
+    """
+    counted_ids, counters = course_counters()
+    checked_mask = counters[:, 1] > 0
+    order = np.argsort(counted_ids[checked_mask])
+    counted_ids, counters = counted_ids[checked_mask][order], counters[checked_mask][order]
+
+    rows = TrainingCourse.objects.filter(pk__in=counted_ids.tolist()).order_by('pk').annotate(
+        start=DurationSeconds('start_time', Value(UNIX_EPOCH))).values_list(
+        'pk', 'path', 'category', 'formula', 'start', 'coach_id')
+    # Szkolenie bez trenera ma poziom -1
+    columns = np.array([[value if value is not None else -1 for value in row] for row in rows],
+                       dtype=np.int64).reshape(-1, 6)
+    # Liczniki w kolejności pobranych szkoleń (szkolenie mogło zostać usunięte między zapytaniami)
+    counters = counters[np.searchsorted(counted_ids, columns[:, 0])]
+
+    levels = {
+        'path': columns[:, 1],
+        'category': columns[:, 2],
+        'formula': columns[:, 3],
+        'weekday': local_calendar(columns[:, 4], '%w'),
+        'coach': columns[:, 5],
+    }
+    checked = counters[:, 1].astype(np.float64)
+    absent = checked - counters[:, 2]
+    return levels, absent / np.maximum(checked, 1), checked
+
+
+def fit(levels, rates, weights, ridge=RIDGE):
+    """
+    Dopasowuje addytywny model odsetka nieobecności (backfitting z regularyzacją ridge).
+
+    :param levels (dict): {czynnik: tablica poziomów dla każdego szkolenia}.
+    :param rates (np.ndarray): Odsetek nieobecnych na każdym szkoleniu.
+    :param weights (np.ndarray): Waga szkolenia (liczba sprawdzonych zapisów).
+    :param ridge (float): Siła regularyzacji.
+
+    return:
+        dict: Model {'intercept', 'coefficients': {czynnik: {poziom (str): współczynnik}}, 'courses', 'enrollments'}.
+    """
+    total_weight = weights.sum()
+    intercept = float((weights * rates).sum() / total_weight) if total_weight else 0.0
+    codes, values, coefficients = {}, {}, {}
+    for factor in FACTORS:
+        values[factor], codes[factor] = np.unique(levels[factor], return_inverse=True)
+        coefficients[factor] = np.zeros(len(values[factor]))
+
+    fitted = np.full(len(rates), intercept)
+    for _ in range(MAX_ITERATIONS):
+        max_change = 0.0
+        for factor in FACTORS:
+            index, old = codes[factor], coefficients[factor]
+            # Reszty bez wpływu bieżącego czynnika, uśrednione w jego poziomach z wagami i regularyzacją
+            partial = rates - fitted + old[index]
+            new = (np.bincount(index, weights=weights * partial, minlength=len(old))
+                   / (np.bincount(index, weights=weights, minlength=len(old)) + ridge))
+            fitted += new[index] - old[index]
+            coefficients[factor] = new
+            max_change = max(max_change, float(np.abs(new - old).max(initial=0.0)))
+        if max_change < TOLERANCE:
+            break
+
+    return {
+        'intercept': round(intercept, 6),
+        'coefficients': {
+            factor: {str(level): round(float(coefficient), 6)
+                     for level, coefficient in zip(values[factor].tolist(), coefficients[factor])}
+            for factor in FACTORS
+        },
+        'courses': int(len(rates)),
+        'enrollments': int(total_weight),
+    }
+
+
+def fit_noshow_model():
+    """
+    Dopasowuje model na całej historii obecności i zapisuje go do pliku settings.NOSHOW_MODEL_PATH.
+
+    return:
+        dict: Zapisany model.
+    """
+    model = fit(*training_data())
+    model['fitted_at'] = timezone.now().astimezone(dt_timezone.utc).isoformat()
+    path = settings.NOSHOW_MODEL_PATH
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as tmp:
+        json.dump(model, tmp, separators=(',', ':'))
+    os.replace(tmp_path, path)
+    return model
+
+
+def load_model():
+    """
+    Zwraca model zapisany w pliku settings.NOSHOW_MODEL_PATH (wczytywany ponownie po zmianie pliku)
+    lub None, jeśli modelu jeszcze nie dopasowano.
+    """
+    path = settings.NOSHOW_MODEL_PATH
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    with _lock:
+        if _loaded.get('key') != (path, mtime):
+            with open(path, encoding='utf-8') as f:
+                _loaded.update(key=(path, mtime), model=json.load(f))
+        return _loaded['model']
+
+
+def predict_no_show(course, model=None):
+    """
+    Prognozuje odsetek nieobecnych na szkoleniu.
+
+    :param course (TrainingCourse): Szkolenie.
+    :param model (dict): Model (domyślnie wczytany z pliku).
+
+    return:
+        float | None: Odsetek nieobecnych z przedziału [0, MAX_NO_SHOW_RATE] lub None, jeśli brak modelu.
+    """
+    model = model or load_model()
+    if model is None:
+        return None
+    rate = model['intercept']
+    for factor, level in course_factors(course).items():
+        rate += model['coefficients'][factor].get(str(level), 0.0)
+    return min(max(rate, 0.0), MAX_NO_SHOW_RATE)
+
+
+def enrollment_limit(course):
+    """
+    Zwraca liczbę zapisów dopuszczalnych na szkolenie: limit uczestników powiększony o prognozowaną
+    liczbę nieobecnych, nie więcej niż o settings.OVERBOOKING_MAX_RATE limitu (0 wyłącza nadrezerwację).
+
+    :param course (TrainingCourse): Szkolenie.
+
+    return:
+        int: Maksymalna liczba zapisów.
+    """
+    max_rate = settings.OVERBOOKING_MAX_RATE
+    if max_rate <= 0:
+        return course.participants_limit
+    no_show = predict_no_show(course)
+    if not no_show:
+        return course.participants_limit
+    # Zapisy, z których po odjęciu nieobecnych zostaje limit uczestników
+    expected_fit = math.floor(course.participants_limit / (1 - no_show))
+    return min(expected_fit, course.participants_limit + math.floor(course.participants_limit * max_rate))
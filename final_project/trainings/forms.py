@@ -1,10 +1,26 @@
+import io
+from datetime import timedelta
+
 from django import forms
 from django.contrib.auth import authenticate
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator, MinValueValidator
 from django.utils import timezone
 
-from .models import Employee, Participant, TrainingCourse
+from .models import ENROLLMENT_ACTIVE, Employee, Participant, TrainingCourse
+from .bulk_enrollment import MAX_PARTICIPANTS, read_participant_ids, split_participant_ids
+from .forecasting import enrollment_limit
+from .matrix import MAX_COURSES as MATRIX_MAX_COURSES
+from .rollups import GROUP_FIELDS, LEVELS as ORG_LEVELS
+from .scheduling import coach_conflicts, participant_conflicts
+from .search import SEARCH_KINDS
+
+
+IMPORT_KINDS = (
+    ('employees', 'Pracownicy'),
+    ('participants', 'Uczestnicy (z opcjonalnymi zapisami na szkolenia)'),
+    ('enrollments', 'Zapisy istniejących uczestników na szkolenia'),
+)
 
 
 class AddEmployeeForm(forms.ModelForm):
@@ -66,6 +82,17 @@ class EditEmployeeForm(forms.ModelForm):
         }
 
 
+def check_participant_conflicts(participant, courses):
+    """
+    Rzuca ValidationError, jeśli zapis uczestnika na wybrane szkolenia powodowałby udział w dwóch
+    szkoleniach odbywających się w tym samym czasie.
+    """
+    conflicts = participant_conflicts(participant, courses)
+    if conflicts:
+        raise ValidationError([f"Szkolenie {topic} odbywa się w tym samym czasie co szkolenie {other_topic}."
+                               for topic, other_topic in conflicts])
+
+
 class AddParticipantForm(forms.ModelForm):
     training_course = forms.ModelMultipleChoiceField(
         queryset=TrainingCourse.objects.all(),
@@ -81,13 +108,6 @@ class AddParticipantForm(forms.ModelForm):
         label='Numer telefonu'
     )
 
-    def clean_training_course(self):
-        selected_course = self.cleaned_data.get('training_course')
-        if selected_course.participant_set.count() >= selected_course.participants_limit:
-                raise ValidationError(f"Limit uczestników został osiągnięty dla szkolenia: "
-                                      f"{selected_course.topic} ({selected_course.get_formula_display()})")
-        return selected_course
-
     class Meta:
         model = Participant
         fields = ['first_name',
@@ -112,13 +132,33 @@ class AddParticipantForm(forms.ModelForm):
     def clean_training_course(self):
         selected_courses = self.cleaned_data.get('training_course')
         for course in selected_courses:
-            if course.participant_set.count() >= course.participants_limit:
+            if course.enrollment_set.filter(status=ENROLLMENT_ACTIVE).count() >= enrollment_limit(course):
                 raise ValidationError(f"Limit uczestników został osiągnięty dla szkolenia: "
                                       f"{course.topic} ({course.get_formula_display()})")
+        check_participant_conflicts(self.instance, selected_courses)
         return selected_courses
 
 
-class AddCourseForm(forms.ModelForm):
+class CoachAvailabilityMixin:
+    """
+    Sprawdza, czy trener nie prowadzi w tym samym czasie innego szkolenia.
+    """
+    def clean(self):
+        cd = super().clean()
+        coach = cd.get('coach')
+        start_time = cd.get('start_time')
+        end_time = cd.get('end_time')
+        if coach and start_time and end_time:
+            conflict = coach_conflicts(coach, start_time, end_time, exclude_pk=self.instance.pk).first()
+            if conflict is not None:
+                raise ValidationError(
+                    f"Trener prowadzi w tym czasie szkolenie: {conflict.course_topic} "
+                    f"({timezone.localtime(conflict.start_time):%Y-%m-%d %H:%M} - "
+                    f"{timezone.localtime(conflict.end_time):%Y-%m-%d %H:%M})")
+        return cd
+
+
+class AddCourseForm(CoachAvailabilityMixin, forms.ModelForm):
 
     start_time = forms.DateTimeField(
         widget=forms.DateTimeInput(
@@ -160,7 +200,7 @@ class AddCourseForm(forms.ModelForm):
         }
 
 
-class EditCourseFutureForm(forms.ModelForm):
+class EditCourseFutureForm(CoachAvailabilityMixin, forms.ModelForm):
     start_time = forms.DateTimeField(
         widget=forms.DateTimeInput(
             attrs={'type': 'datetime-local'}),
@@ -225,11 +265,54 @@ class EditParticipantForm(forms.Form):
 
     def clean_training_course(self):
         selected_course = self.cleaned_data.get('training_course')
-        if selected_course.participant_set.count() >= selected_course.participants_limit:
+        if selected_course.enrollment_set.filter(status=ENROLLMENT_ACTIVE).count() >= enrollment_limit(selected_course):
                 raise ValidationError(f"Limit uczestników został osiągnięty dla szkolenia: "
                                       f"{selected_course.topic} ({selected_course.get_formula_display()})")
         return selected_course
 
+    def clean(self):
+        cd = super().clean()
+        participant = cd.get('participant')
+        training_course = cd.get('training_course')
+        if participant and training_course:
+            try:
+                check_participant_conflicts(participant, TrainingCourse.objects.filter(pk=training_course.pk))
+            except ValidationError as e:
+                self.add_error('training_course', e)
+        return cd
+
+
+class BulkEnrollmentForm(forms.Form):
+    training_course = forms.ModelChoiceField(
+        queryset=TrainingCourse.objects.all(),
+        label='Szkolenie'
+    )
+    participant_ids = forms.CharField(
+        widget=forms.Textarea(attrs={'rows': 5}),
+        required=False,
+        label='ID uczestników (oddzielone przecinkiem lub w osobnych liniach)'
+    )
+    file = forms.FileField(
+        required=False,
+        label='Plik CSV z ID uczestników (kolumna participant lub pierwsza kolumna)'
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['training_course'].queryset = TrainingCourse.objects.filter(end_time__gt=timezone.now())
+
+    def clean(self):
+        cd = super().clean()
+        values = split_participant_ids(cd.get('participant_ids'))
+        if cd.get('file'):
+            values += read_participant_ids(io.TextIOWrapper(cd['file'].file, encoding='utf-8-sig', newline=''))
+        if not values:
+            raise ValidationError("Podaj identyfikatory uczestników lub prześlij plik CSV.")
+        if len(values) > MAX_PARTICIPANTS:
+            raise ValidationError(f"Jednym żądaniem można zapisać najwyżej {MAX_PARTICIPANTS} uczestników.")
+        cd['participants'] = values
+        return cd
+
 
 class LoginForm(forms.Form):
     username = forms.CharField()
@@ -244,3 +327,158 @@ class LoginForm(forms.Form):
             raise ValidationError("Podaj poprawny login lub hasło")
         else:
             self.user = user
+
+
+class ImportPeopleForm(forms.Form):
+    kind = forms.ChoiceField(
+        choices=IMPORT_KINDS,
+        label='Rodzaj importu'
+    )
+    file = forms.FileField(
+        label='Plik CSV'
+    )
+    batch_size = forms.IntegerField(
+        validators=[MinValueValidator(1, message="Rozmiar porcji musi być dodatni.")],
+        required=False,
+        label='Liczba wierszy w jednej transakcji'
+    )
+
+
+COURSE_ORDERINGS = (
+    ('start_time', 'Data rozpoczęcia'),
+    ('duration_seconds', 'Czas trwania rosnąco'),
+    ('-duration_seconds', 'Czas trwania malejąco'),
+)
+
+
+class CourseFilterForm(forms.Form):
+    min_hours = forms.DecimalField(
+        min_value=0,
+        required=False,
+        label='Minimalny czas trwania (h)'
+    )
+    max_hours = forms.DecimalField(
+        min_value=0,
+        required=False,
+        label='Maksymalny czas trwania (h)'
+    )
+    order = forms.ChoiceField(
+        choices=COURSE_ORDERINGS,
+        required=False,
+        label='Sortowanie'
+    )
+
+    def filter(self, queryset):
+        """
+        Zawęża i sortuje szkolenia według czasu trwania (kolumna duration_seconds, bez wczytywania wierszy).
+
+        :param queryset (QuerySet): Szkolenia do przefiltrowania.
+
+        return:
+            QuerySet: Przefiltrowane i posortowane szkolenia.
+        """
+        cd = self.cleaned_data
+        if cd.get('min_hours') is not None:
+            queryset = queryset.filter(duration_seconds__gte=int(cd['min_hours'] * 3600))
+        if cd.get('max_hours') is not None:
+            queryset = queryset.filter(duration_seconds__lte=int(cd['max_hours'] * 3600))
+        return queryset.order_by(cd.get('order') or 'start_time')
+
+
+class EnrollmentMatrixForm(forms.Form):
+    courses = forms.ModelMultipleChoiceField(
+        queryset=TrainingCourse.objects.all(),
+        required=False,
+        label='Szkolenia'
+    )
+    q = forms.CharField(
+        max_length=64,
+        required=False,
+        label='Nazwisko uczestnika'
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['courses'].queryset = TrainingCourse.objects.filter(
+            end_time__gt=timezone.now()).order_by('start_time', 'pk')
+
+    def clean_courses(self):
+        courses = self.cleaned_data.get('courses')
+        if courses is not None and len(courses) > MATRIX_MAX_COURSES:
+            raise ValidationError(f"Wybierz najwyżej {MATRIX_MAX_COURSES} szkoleń.")
+        return courses
+
+    def selected_courses(self):
+        """
+        Zwraca wybrane szkolenia (domyślnie najbliższe otwarte szkolenia) w kolejności kolumn macierzy.
+        """
+        courses = self.cleaned_data.get('courses') if self.is_valid() else None
+        if not courses:
+            courses = self.fields['courses'].queryset[:MATRIX_MAX_COURSES]
+        return list(courses)
+
+    def participants(self):
+        participants = Participant.objects.order_by('last_name', 'first_name', 'pk')
+        if self.is_valid() and self.cleaned_data['q']:
+            participants = participants.filter(last_name__istartswith=self.cleaned_data['q'])
+        return participants
+
+
+class FreeCoachSearchForm(forms.Form):
+    start_time = forms.DateTimeField(
+        label='Początek przedziału'
+    )
+    end_time = forms.DateTimeField(
+        label='Koniec przedziału'
+    )
+    duration = forms.IntegerField(
+        validators=[MinValueValidator(1, message="Czas trwania musi być dodatni.")],
+        label='Czas trwania szkolenia (minuty)'
+    )
+    limit = forms.IntegerField(
+        validators=[MinValueValidator(1, message="Limit musi być dodatni.")],
+        required=False,
+        label='Maksymalna liczba trenerów'
+    )
+
+    def clean(self):
+        cd = super().clean()
+        start_time = cd.get('start_time')
+        end_time = cd.get('end_time')
+        duration = cd.get('duration')
+        if start_time and end_time and duration:
+            if end_time <= start_time:
+                raise ValidationError("Koniec przedziału musi być późniejszy niż jego początek.")
+            if timedelta(minutes=duration) > end_time - start_time:
+                raise ValidationError("Czas trwania szkolenia jest dłuższy niż przedział.")
+        return cd
+
+
+class SearchForm(forms.Form):
+    q = forms.CharField(
+        max_length=200,
+        label='Szukaj'
+    )
+    kind = forms.ChoiceField(
+        choices=(('', 'Wszystko'),) + SEARCH_KINDS,
+        required=False,
+        label='Rodzaj'
+    )
+
+
+class OrgReportForm(forms.Form):
+    level = forms.ChoiceField(
+        choices=[(level, label) for level, (label, _) in ORG_LEVELS.items()],
+        required=False,
+        label='Poziom'
+    )
+    company = forms.CharField(max_length=128, required=False, label='Spółka')
+    team = forms.CharField(max_length=128, required=False, label='Zespół')
+    team_leader = forms.CharField(max_length=128, required=False, label='Lider')
+    supervisor = forms.CharField(max_length=128, required=False, label='Przełożony')
+
+    def filters(self):
+        """
+        Zwraca filtry struktury organizacyjnej podane w formularzu (pola niepuste).
+        """
+        return {field: self.cleaned_data[field] for field in GROUP_FIELDS if self.cleaned_data.get(field)}
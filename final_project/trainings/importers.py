@@ -0,0 +1,309 @@
+"""
+Masowy import pracowników, uczestników i zapisów na szkolenia z plików CSV.
+
+Plik jest czytany strumieniowo, wiersze są walidowane tymi samymi polami formularzy co
+AddEmployeeForm i AddParticipantForm, a poprawne wiersze zapisywane są porcjami
+(bulk_create) w osobnych transakcjach. Błędne wiersze nie przerywają importu - trafiają do
+raportu z numerem linii pliku. Tak jak w formularzach, odrzucane są zapisy przekraczające limit
+szkolenia oraz zapisy uczestnika na szkolenia odbywające się w tym samym czasie (jedno zapytanie
+na porcję, razem z innymi zapisami z tej samej porcji).
+"""
+import csv
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from . import rollups, snapshots
+from .analytics import invalidate_attendance_stats
+from .forecasting import enrollment_limit
+from .forms import AddEmployeeForm, AddParticipantForm
+from .models import ENROLLMENT_ACTIVE, Employee, Enrollment, Participant, TrainingCourse, reenrollment
+from .scheduling import enrollment_conflicts
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Separator identyfikatorów szkoleń w kolumnie 'training_course' pliku uczestników
+COURSES_SEPARATOR = ';'
+
+EMPLOYEE_FIELDS = dict(AddEmployeeForm.base_fields)
+PARTICIPANT_FIELDS = {name: field for name, field in AddParticipantForm.base_fields.items()
+                      if name != 'training_course'}
+
+
+def mark_courses_changed(enrollments):
+    """
+    Oznacza jako nieaktualne migawki uczestników szkoleń, na które dodano zapisy, oraz raporty
+    frekwencji (bulk_create nie wysyła sygnałów post_save).
+
+    :param enrollments (list): Utworzone zapisy na szkolenia.
+    """
+    for course_id in {enrollment.training_course_id for enrollment in enrollments}:
+        snapshots.mark_changed('course_participants', course_id)
+    if enrollments:
+        invalidate_attendance_stats()
+
+
+class ImportResult:
+    """
+    Podsumowanie importu.
+
+    Atrybuty:
+    - created (int): Liczba utworzonych osób.
+    - enrolled (int): Liczba utworzonych zapisów na szkolenia.
+    - skipped (int): Liczba pominiętych zapisów, które już istniały.
+    - errors (list): Lista krotek (numer linii, komunikat) dla odrzuconych wierszy.
+    """
+    def __init__(self):
+        self.created = 0
+        self.enrolled = 0
+        self.skipped = 0
+        self.errors = []
+
+    def add_error(self, line, message):
+        self.errors.append((line, message))
+
+
+class CourseCapacity:
+    """
+    Stan zapełnienia otwartych szkoleń (kończących się w przyszłości, jak w formularzach) - liczba
+    aktywnych zapisów pobierana jednym zapytaniem i aktualizowana w pamięci w trakcie importu.
+    """
+    def __init__(self):
+        courses = TrainingCourse.objects.filter(end_time__gt=timezone.now()).annotate(
+            enrolled=Count('enrollment', filter=Q(enrollment__status=ENROLLMENT_ACTIVE)))
+        self.courses = {course.pk: course for course in courses}
+        # Limit zapisów z nadrezerwacją wyznaczany raz na import
+        for course in self.courses.values():
+            course.enrollment_limit = enrollment_limit(course)
+
+    def reserve(self, course_id):
+        """
+        Rezerwuje miejsce na szkoleniu.
+
+        :param course_id (int): ID szkolenia.
+
+        return:
+            str | None: Komunikat błędu lub None, jeśli miejsce zostało zarezerwowane.
+        """
+        course = self.courses.get(course_id)
+        if course is None:
+            return f"Nieprawidłowe szkolenie: {course_id}"
+        if course.enrolled >= course.enrollment_limit:
+            return (f"Limit uczestników został osiągnięty dla szkolenia: "
+                    f"{course.topic} ({course.get_formula_display()})")
+        course.enrolled += 1
+        return None
+
+    def release(self, course_id):
+        self.courses[course_id].enrolled -= 1
+
+
+def conflict_messages(conflicts):
+    """
+    Zamienia kolizje terminów (wynik enrollment_conflicts) na komunikaty błędów.
+
+    :param conflicts (list): Krotki (klucz uczestnika, szkolenie, temat kolidującego szkolenia).
+
+    return:
+        dict: {(klucz uczestnika, ID szkolenia): komunikat}.
+    """
+    return {(key, course.pk): f"Szkolenie {course.topic} odbywa się w tym samym czasie co szkolenie {topic}."
+            for key, course, topic in conflicts}
+
+
+def _error_message(error):
+    return ' '.join(error.messages)
+
+
+def clean_row(fields, row):
+    """
+    Waliduje wiersz CSV polami formularza.
+
+    :param fields (dict): Słownik {nazwa: pole formularza}.
+    :param row (dict): Wiersz pliku CSV.
+
+    return:
+        tuple: (oczyszczone dane, lista komunikatów błędów).
+    """
+    cleaned = {}
+    errors = []
+    for name, field in fields.items():
+        try:
+            cleaned[name] = field.clean((row.get(name) or '').strip())
+        except ValidationError as e:
+            errors.append(f"{name}: {_error_message(e)}")
+    return cleaned, errors
+
+
+def parse_course_ids(value):
+    """
+    Zamienia listę identyfikatorów szkoleń rozdzielonych średnikiem na listę liczb.
+
+    Rzuca ValueError, jeśli któryś z identyfikatorów nie jest liczbą.
+    """
+    return [int(course_id) for course_id in (value or '').split(COURSES_SEPARATOR) if course_id.strip()]
+
+
+def import_employees(batch, result, capacity):
+    employees = []
+    for line, row in batch:
+        cleaned, errors = clean_row(EMPLOYEE_FIELDS, row)
+        if errors:
+            result.add_error(line, '; '.join(errors))
+            continue
+        employees.append(Employee(**cleaned))
+
+    with transaction.atomic():
+        Employee.objects.bulk_create(employees)
+        # bulk_create nie wysyła sygnałów post_save - grupy zestawienia są przeliczane po zatwierdzeniu
+        rollups.schedule_refresh(*{rollups.employee_group(employee) for employee in employees})
+    result.created += len(employees)
+
+
+def import_participants(batch, result, capacity):
+    participants = []
+    enrollments = []
+    for line, row in batch:
+        cleaned, errors = clean_row(PARTICIPANT_FIELDS, row)
+        try:
+            course_ids = parse_course_ids(row.get('training_course'))
+        except ValueError:
+            course_ids = []
+            errors.append("training_course: Podaj identyfikatory szkoleń oddzielone średnikiem.")
+        if errors:
+            result.add_error(line, '; '.join(errors))
+            continue
+
+        reserved = []
+        for course_id in dict.fromkeys(course_ids):
+            error = capacity.reserve(course_id)
+            if error:
+                errors.append(f"training_course: {error}")
+            else:
+                reserved.append(course_id)
+        if errors:
+            for course_id in reserved:
+                capacity.release(course_id)
+            result.add_error(line, '; '.join(errors))
+            continue
+
+        participants.append((line, Participant(**cleaned), reserved))
+
+    # Nowi uczestnicy nie mają jeszcze zapisów - sprawdzane są tylko szkolenia z tego samego wiersza
+    conflicts = conflict_messages(enrollment_conflicts(
+        [(line, course_id) for line, _, reserved in participants for course_id in reserved],
+        capacity.courses, existing=False))
+    accepted = []
+    for line, participant, reserved in participants:
+        errors = [f"training_course: {conflicts[line, course_id]}" for course_id in reserved
+                  if (line, course_id) in conflicts]
+        if errors:
+            for course_id in reserved:
+                capacity.release(course_id)
+            result.add_error(line, '; '.join(errors))
+            continue
+        accepted.append(participant)
+        enrollments.extend((participant, course_id) for course_id in reserved)
+    participants = accepted
+
+    with transaction.atomic():
+        Participant.objects.bulk_create(participants)
+        created = Enrollment.objects.bulk_create(
+            [Enrollment(participant_id=participant.pk, training_course_id=course_id)
+             for participant, course_id in enrollments])
+    mark_courses_changed(created)
+    result.created += len(participants)
+    result.enrolled += len(enrollments)
+
+
+def import_enrollments(batch, result, capacity):
+    rows = []
+    for line, row in batch:
+        try:
+            rows.append((line, int(row.get('participant') or ''), int(row.get('training_course') or '')))
+        except ValueError:
+            result.add_error(line, "Kolumny 'participant' i 'training_course' muszą zawierać identyfikatory.")
+
+    participant_ids = {participant_id for _, participant_id, _ in rows}
+    existing_participants = set(
+        Participant.objects.filter(pk__in=participant_ids).values_list('pk', flat=True))
+    statuses = {(participant_id, course_id): status for participant_id, course_id, status in
+                Enrollment.objects.filter(participant_id__in=participant_ids).values_list(
+                    'participant_id', 'training_course_id', 'status')}
+    existing_enrollments = {pair for pair, status in statuses.items() if status == ENROLLMENT_ACTIVE}
+
+    candidates = {}
+    for line, participant_id, course_id in rows:
+        if participant_id not in existing_participants:
+            result.add_error(line, f"Nieprawidłowy uczestnik: {participant_id}")
+            continue
+        if (participant_id, course_id) in existing_enrollments:
+            result.skipped += 1
+            continue
+        error = capacity.reserve(course_id)
+        if error:
+            result.add_error(line, error)
+            continue
+        existing_enrollments.add((participant_id, course_id))
+        candidates[participant_id, course_id] = line
+
+    conflicts = conflict_messages(enrollment_conflicts(candidates, capacity.courses))
+    enrollments = []
+    cancelled = []
+    for (participant_id, course_id), line in candidates.items():
+        if (participant_id, course_id) in conflicts:
+            capacity.release(course_id)
+            result.add_error(line, conflicts[participant_id, course_id])
+            continue
+        enrollment = Enrollment(participant_id=participant_id, training_course_id=course_id)
+        # Anulowany wcześniej zapis jest przywracany zamiast tworzenia nowego
+        (cancelled if (participant_id, course_id) in statuses else enrollments).append(enrollment)
+
+    with transaction.atomic():
+        now = timezone.now()
+        for course_id in {enrollment.training_course_id for enrollment in cancelled}:
+            Enrollment.objects.filter(training_course_id=course_id, participant_id__in=[
+                enrollment.participant_id for enrollment in cancelled if enrollment.training_course_id == course_id
+            ]).update(**reenrollment(now))
+        Enrollment.objects.bulk_create(enrollments)
+    mark_courses_changed(enrollments + cancelled)
+    result.enrolled += len(enrollments) + len(cancelled)
+
+
+IMPORTERS = {
+    'employees': import_employees,
+    'participants': import_participants,
+    'enrollments': import_enrollments,
+}
+
+
+def import_people(kind, stream, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Importuje osoby lub zapisy na szkolenia ze strumienia tekstowego CSV.
+
+    Kolumny pliku odpowiadają nazwom pól formularzy: dla pracowników pola AddEmployeeForm,
+    dla uczestników pola AddParticipantForm (kolumna 'training_course' zawiera ID szkoleń
+    oddzielone średnikiem), dla zapisów kolumny 'participant' i 'training_course'.
+
+    :param kind (str): Rodzaj importu ('employees', 'participants', 'enrollments').
+    :param stream: Strumień tekstowy z zawartością pliku CSV (z wierszem nagłówka).
+    :param batch_size (int): Liczba wierszy zapisywanych w jednej transakcji.
+
+    return:
+        ImportResult: Podsumowanie importu wraz z raportem błędów.
+    """
+    importer = IMPORTERS[kind]
+    capacity = CourseCapacity() if kind != 'employees' else None
+    result = ImportResult()
+    batch = []
+    # Numer linii pliku: nagłówek to linia 1
+    for line, row in enumerate(csv.DictReader(stream), start=2):
+        batch.append((line, row))
+        if len(batch) >= batch_size:
+            importer(batch, result, capacity)
+            batch = []
+    if batch:
+        importer(batch, result, capacity)
+    return result
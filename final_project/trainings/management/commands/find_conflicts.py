@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from trainings.models import Employee, TrainingCourse
+from trainings.scheduling import find_coach_conflicts
+
+
+class Command(BaseCommand):
+    help = "Wyszukuje w harmonogramie szkoleń wszystkie przypadki podwójnej rezerwacji trenera."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--upcoming', action='store_true',
+                            help="Sprawdza tylko szkolenia, które jeszcze się nie zakończyły.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        courses = TrainingCourse.objects.all()
+        if options['upcoming']:
+            courses = courses.filter(end_time__gt=timezone.now())
+        conflicts = list(find_coach_conflicts(courses))
+        elapsed = time.perf_counter() - start
+
+        if conflicts:
+            course_ids = {pk for _, first, second in conflicts for pk in (first, second)}
+            topics = dict(TrainingCourse.objects.filter(pk__in=course_ids).values_list('pk', 'topic'))
+            coaches = {employee.pk: employee for employee in Employee.objects.filter(
+                pk__in={coach_id for coach_id, _, _ in conflicts})}
+            for coach_id, first, second in conflicts:
+                coach = coaches[coach_id]
+                self.stdout.write(f"{coach.first_name} {coach.last_name}: "
+                                  f"[{first}] {topics[first]} <-> [{second}] {topics[second]}")
+
+        style = self.style.WARNING if conflicts else self.style.SUCCESS
+        self.stdout.write(style(f"Znalezione konflikty: {len(conflicts)} ({elapsed:.2f} s)."))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from trainings.models import Participant, TrainingCourse
+from trainings.scheduling import find_participant_double_bookings
+
+
+class Command(BaseCommand):
+    help = "Wyszukuje uczestników zapisanych na szkolenia odbywające się w tym samym czasie."
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        double_bookings = find_participant_double_bookings()
+        elapsed = time.perf_counter() - start
+
+        if double_bookings:
+            topics = dict(TrainingCourse.objects.filter(
+                pk__in={pk for _, first, second in double_bookings for pk in (first, second)}
+            ).values_list('pk', 'topic'))
+            participants = Participant.objects.in_bulk({participant_id for participant_id, _, _ in double_bookings})
+            for participant_id, first, second in double_bookings:
+                self.stdout.write(f"{participants[participant_id].name}: "
+                                  f"[{first}] {topics[first]} <-> [{second}] {topics[second]}")
+
+        style = self.style.WARNING if double_bookings else self.style.SUCCESS
+        self.stdout.write(style(f"Znalezione podwójne zapisy: {len(double_bookings)} ({elapsed:.2f} s)."))
@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from trainings.forecasting import FACTORS, fit_noshow_model
+
+
+class Command(BaseCommand):
+    help = ("Dopasowuje model prognozy nieobecności na szkoleniach do historii obecności "
+            "i zapisuje tabele współczynników do pliku settings.NOSHOW_MODEL_PATH.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        model = fit_noshow_model()
+        elapsed = time.perf_counter() - start
+
+        levels = ', '.join(f"{factor}: {len(model['coefficients'][factor])}" for factor in FACTORS)
+        self.stdout.write(self.style.SUCCESS(
+            f"Dopasowano model na {model['courses']} szkoleniach ({model['enrollments']} zapisów ze sprawdzoną "
+            f"obecnością), średni odsetek nieobecnych: {model['intercept']:.1%}, poziomy - {levels} "
+            f"({elapsed:.2f} s)."))
@@ -0,0 +1,47 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from trainings.forms import IMPORT_KINDS
+from trainings.importers import DEFAULT_BATCH_SIZE, import_people
+
+
+class Command(BaseCommand):
+    help = "Importuje pracowników, uczestników lub zapisy na szkolenia z pliku CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=[kind for kind, _ in IMPORT_KINDS],
+                            help="Rodzaj importu.")
+        parser.add_argument('path', help="Ścieżka do pliku CSV (UTF-8, z wierszem nagłówka).")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help="Liczba wierszy zapisywanych w jednej transakcji.")
+        parser.add_argument('--report', help="Ścieżka pliku CSV, do którego zostanie zapisany raport błędów.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("Rozmiar porcji musi być dodatni.")
+
+        start = time.perf_counter()
+        try:
+            with open(options['path'], newline='', encoding='utf-8-sig') as stream:
+                result = import_people(options['kind'], stream, batch_size=options['batch_size'])
+        except OSError as e:
+            raise CommandError(f"Nie można odczytać pliku: {e}")
+        elapsed = time.perf_counter() - start
+
+        if options['report']:
+            with open(options['report'], 'w', newline='', encoding='utf-8') as report:
+                writer = csv.writer(report)
+                writer.writerow(('line', 'errors'))
+                writer.writerows(result.errors)
+        else:
+            for line, message in result.errors[:20]:
+                self.stderr.write(f"Linia {line}: {message}")
+            if len(result.errors) > 20:
+                self.stderr.write(f"... oraz {len(result.errors) - 20} kolejnych błędów (użyj --report).")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Utworzono osób: {result.created}, zapisów na szkolenia: {result.enrolled}, "
+            f"pominiętych zapisów: {result.skipped}, błędnych wierszy: {len(result.errors)} "
+            f"({elapsed:.2f} s)."))
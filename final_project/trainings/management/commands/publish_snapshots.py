@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from trainings.snapshots import PAGES, publish_all
+
+
+class Command(BaseCommand):
+    help = "Generuje statyczne migawki listy szkoleń, szkoleń pracowników i uczestników szkoleń."
+
+    def add_arguments(self, parser):
+        parser.add_argument('pages', nargs='*', help=f"Strony do wygenerowania: {', '.join(PAGES)} "
+                                                     f"(domyślnie wszystkie).")
+
+    def handle(self, *args, **options):
+        unknown = set(options['pages']) - set(PAGES)
+        if unknown:
+            raise CommandError(f"Nieznane strony: {', '.join(sorted(unknown))}.")
+
+        start = time.perf_counter()
+        counts = publish_all(options['pages'])
+        elapsed = time.perf_counter() - start
+
+        summary = ', '.join(f"{page}: {count}" for page, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Opublikowano migawki - {summary} ({elapsed:.2f} s)."))
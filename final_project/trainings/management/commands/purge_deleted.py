@@ -0,0 +1,30 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from trainings.purge import purge_deleted
+
+
+class Command(BaseCommand):
+    help = ("Usuwa z bazy szkolenia i pracowników oznaczonych jako usunięci wraz z zapisami uczestników, "
+            "porcjami w krótkich transakcjach.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.PURGE_BATCH_SIZE,
+                            help="Maksymalna liczba wierszy usuwanych w jednej transakcji.")
+        parser.add_argument('--pause', type=float, default=settings.PURGE_PAUSE,
+                            help="Przerwa między transakcjami w sekundach.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['pause'] < 0:
+            raise CommandError("Rozmiar porcji musi być dodatni, a przerwa nieujemna.")
+
+        start = time.perf_counter()
+        result = purge_deleted(batch_size=options['batch_size'], pause=options['pause'])
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Usunięto szkolenia: {result['courses']}, pracowników: {result['employees']}, "
+            f"zapisy: {result['enrollments']}, porcje synchronizacji obecności: {result['presence_batches']} "
+            f"({result['batches']} transakcji, {elapsed:.2f} s)."))
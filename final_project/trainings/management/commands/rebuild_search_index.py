@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from trainings.search import install_search_index, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Odbudowuje indeks wyszukiwania pełnotekstowego (SQLite FTS5) szkoleń, pracowników i uczestników."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help="Alias bazy danych.")
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if connections[using].vendor != 'sqlite':
+            raise CommandError("Wyszukiwanie pełnotekstowe wymaga bazy SQLite (FTS5).")
+
+        start = time.perf_counter()
+        install_search_index(using)
+        counts = rebuild_search_index(using)
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Zaindeksowano szkoleń: {counts['course']}, pracowników: {counts['employee']}, "
+            f"uczestników: {counts['participant']} ({elapsed:.2f} s)."))
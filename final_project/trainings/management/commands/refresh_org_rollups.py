@@ -0,0 +1,15 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from trainings.rollups import refresh_rollups
+
+
+class Command(BaseCommand):
+    help = "Przebudowuje zestawienie szkoleń według struktury organizacyjnej (tabela OrgRollup)."
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = refresh_rollups()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f"Zapisano wierszy zestawienia: {count} ({elapsed:.2f} s)."))
@@ -0,0 +1,35 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from trainings.reminders import send_reminders
+
+
+class Command(BaseCommand):
+    help = ("Wysyła uczestnikom przypomnienia e-mail o szkoleniach rozpoczynających się w najbliższym czasie "
+            "(każdemu zapisowi najwyżej jedno przypomnienie).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=float, default=settings.REMINDER_LEAD_TIME / 3600,
+                            help="Wyprzedzenie przypomnienia w godzinach.")
+        parser.add_argument('--batch-size', type=int, default=settings.REMINDER_BATCH_SIZE,
+                            help="Liczba wiadomości oznaczanych jako wysłane w jednej transakcji.")
+        parser.add_argument('--rate', type=float, default=settings.REMINDER_RATE,
+                            help="Maksymalna liczba wiadomości na sekundę (0 - bez limitu).")
+
+    def handle(self, *args, **options):
+        if options['hours'] <= 0 or options['batch_size'] < 1 or options['rate'] < 0:
+            raise CommandError("Wyprzedzenie i rozmiar porcji muszą być dodatnie, a limit nieujemny.")
+
+        start = time.perf_counter()
+        result = send_reminders(lead_time=timedelta(hours=options['hours']), batch_size=options['batch_size'],
+                                rate=options['rate'])
+        elapsed = time.perf_counter() - start
+
+        if result['skipped']:
+            self.stdout.write(self.style.WARNING(
+                f"Pominięte przypomnienia wysłane w międzyczasie przez inny proces: {result['skipped']}."))
+        self.stdout.write(self.style.SUCCESS(
+            f"Wysłano przypomnień: {result['sent']} (szkolenia: {result['courses']}, {elapsed:.2f} s)."))
@@ -0,0 +1,180 @@
+"""
+Macierz zapisów: uczestnicy (wiersze) × wybrane szkolenia (kolumny).
+
+Zapisy strony uczestników na wybrane szkolenia pobierane są jednym zapytaniem do tabeli Enrollment
+i składane w zbiór bitów dla każdego uczestnika (liczba całkowita - bit i oznacza zapis na i-te
+szkolenie w kolumnach). Formularz odsyła zbiory bitów, które wyświetlił, razem z zaznaczonymi
+polami, więc zapisywana jest tylko różnica: pola zmienione przez użytkownika. Zmiany innych osób
+w pozostałych polach nie są nadpisywane.
+
+Różnica jest zapisywana w jednej transakcji: jedno zapytanie o istniejące zapisy i zapełnienie
+szkoleń, jedno anulowanie zapisów (UPDATE), jedno przywrócenie wcześniej anulowanych i jeden bulk_create,
+niezależnie od liczby zmienionych pól. Kolizje terminów
+nowych zapisów (jak przy zapisie przez formularz) sprawdzane są jednym zapytaniem o zapisy uczestników.
+"""
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from . import snapshots
+from .analytics import invalidate_attendance_stats
+from .forecasting import enrollment_limit
+from .models import ENROLLMENT_ACTIVE, ENROLLMENT_CANCELLED, Enrollment, Participant, TrainingCourse, reenrollment
+from .scheduling import enrollment_conflicts
+
+# Maksymalna liczba szkoleń (kolumn) macierzy
+MAX_COURSES = 40
+
+
+def encode_bits(bits):
+    return format(bits, 'x')
+
+
+def decode_bits(value):
+    """
+    Zamienia zbiór bitów zapisany szesnastkowo na liczbę. Rzuca ValueError dla nieprawidłowej wartości.
+    """
+    bits = int(value, 16)
+    if bits < 0:
+        raise ValueError(value)
+    return bits
+
+
+def enrollment_bitsets(course_ids, participant_ids):
+    """
+    Pobiera aktywne zapisy uczestników na szkolenia jednym zapytaniem.
+
+    :param course_ids (list): ID szkoleń w kolejności kolumn.
+    :param participant_ids (list): ID uczestników.
+
+    return:
+        dict: {ID uczestnika: zbiór bitów zapisów (int)}.
+    """
+    column = {course_id: bit for bit, course_id in enumerate(course_ids)}
+    bitsets = dict.fromkeys(participant_ids, 0)
+    rows = Enrollment.objects.filter(
+        training_course_id__in=course_ids, participant_id__in=participant_ids, status=ENROLLMENT_ACTIVE)
+    for participant_id, course_id in rows.values_list('participant_id', 'training_course_id'):
+        bitsets[participant_id] |= 1 << column[course_id]
+    return bitsets
+
+
+def _pairs(course_ids, participant_id, bits):
+    return [(participant_id, course_ids[bit]) for bit in range(bits.bit_length()) if bits >> bit & 1]
+
+
+def matrix_diff(course_ids, original, submitted):
+    """
+    Wyznacza zmiany między wyświetloną a odesłaną macierzą.
+
+    :param course_ids (list): ID szkoleń w kolejności kolumn.
+    :param original (dict): {ID uczestnika: wyświetlony zbiór bitów}.
+    :param submitted (dict): {ID uczestnika: odesłany zbiór bitów}; brak uczestnika oznacza brak zaznaczeń.
+
+    return:
+        tuple: (lista par (uczestnik, szkolenie) do zapisania, lista par do wypisania).
+    """
+    mask = (1 << len(course_ids)) - 1
+    added, removed = [], []
+    for participant_id, old in original.items():
+        old &= mask
+        new = submitted.get(participant_id, 0) & mask
+        added += _pairs(course_ids, participant_id, new & ~old)
+        removed += _pairs(course_ids, participant_id, old & ~new)
+    return added, removed
+
+
+def _pairs_filter(pairs):
+    """
+    Warunek wybierający zapisy dla par (uczestnik, szkolenie) - jedno IN na szkolenie.
+    """
+    by_course = defaultdict(list)
+    for participant_id, course_id in pairs:
+        by_course[course_id].append(participant_id)
+    return reduce(or_, (Q(training_course_id=course_id, participant_id__in=participant_ids)
+                        for course_id, participant_ids in by_course.items()))
+
+
+def added_conflicts(added):
+    """
+    Wyszukuje nowe zapisy, które kolidowałyby z innymi zapisami uczestnika (szkolenia w tym samym czasie):
+    z istniejącymi zapisami i z innymi nowymi zapisami (enrollment_conflicts - jedno zapytanie o szkolenia
+    i jedno o zapisy, niezależnie od liczby kolumn macierzy).
+
+    :param added (list): Pary (ID uczestnika, ID szkolenia) do zapisania.
+
+    return:
+        list: Krotki (ID uczestnika, szkolenie, temat kolidującego szkolenia).
+    """
+    return enrollment_conflicts(added, TrainingCourse.objects.in_bulk({course_id for _, course_id in added}))
+
+
+def apply_matrix_diff(added, removed):
+    """
+    Zapisuje zmiany macierzy w jednej transakcji. Wypisanie anuluje zapis (ENROLLMENT_CANCELLED),
+    a ponowny zapis przywraca anulowany wiersz jako nowy zapis.
+
+    Rzuca ValidationError (bez zapisania czegokolwiek), jeśli po zmianach liczba zapisów
+    na któreś szkolenie przekroczyłaby limit zapisów (enrollment_limit) albo uczestnik zostałby
+    zapisany na szkolenie w czasie innego swojego szkolenia (komunikat dla każdej kolidującej pary).
+
+    :param added (list): Pary (ID uczestnika, ID szkolenia) do zapisania.
+    :param removed (list): Pary (ID uczestnika, ID szkolenia) do wypisania.
+
+    return:
+        tuple: (liczba nowych zapisów, liczba anulowanych zapisów).
+    """
+    if not added and not removed:
+        return 0, 0
+    with transaction.atomic():
+        statuses = {(participant_id, course_id): status for participant_id, course_id, status in
+                    Enrollment.objects.filter(_pairs_filter(added + removed)).values_list(
+                        'participant_id', 'training_course_id', 'status')}
+        added = [pair for pair in added if statuses.get(pair) != ENROLLMENT_ACTIVE]
+        removed = [pair for pair in removed if statuses.get(pair) == ENROLLMENT_ACTIVE]
+
+        change = defaultdict(int)
+        for _, course_id in added:
+            change[course_id] += 1
+        for _, course_id in removed:
+            change[course_id] -= 1
+        courses = TrainingCourse.objects.filter(pk__in=[course_id for course_id, diff in change.items() if diff > 0])
+        errors = [
+            f"Limit uczestników zostałby przekroczony dla szkolenia: {course.topic} "
+            f"({course.get_formula_display()})"
+            for course in courses.annotate(enrolled=Count(
+                'enrollment', filter=Q(enrollment__status=ENROLLMENT_ACTIVE))).order_by('start_time', 'pk')
+            if course.enrolled + change[course.pk] > enrollment_limit(course)
+        ]
+        if errors:
+            raise ValidationError(errors)
+
+        if removed:
+            Enrollment.objects.filter(_pairs_filter(removed)).update(status=ENROLLMENT_CANCELLED)
+        # Po wypisaniu - przeniesienie uczestnika na szkolenie w tym samym terminie nie jest kolizją
+        conflicts = added_conflicts(added) if added else []
+        if conflicts:
+            participants = Participant.objects.in_bulk({participant_id for participant_id, _, _ in conflicts})
+            raise ValidationError([
+                f"{participants[participant_id].first_name} {participants[participant_id].last_name}: "
+                f"szkolenie {course.topic} odbywa się w tym samym czasie co szkolenie {topic}."
+                for participant_id, course, topic in conflicts])
+        # Anulowane wcześniej zapisy są przywracane, pozostałe tworzone
+        cancelled = [pair for pair in added if pair in statuses]
+        if cancelled:
+            Enrollment.objects.filter(_pairs_filter(cancelled)).update(**reenrollment(timezone.now()))
+        Enrollment.objects.bulk_create([Enrollment(participant_id=participant_id, training_course_id=course_id)
+                                        for participant_id, course_id in added
+                                        if (participant_id, course_id) not in statuses], ignore_conflicts=True)
+
+    # bulk_create i update() nie wysyłają sygnałów post_save
+    if added or removed:
+        for course_id in {course_id for _, course_id in added + removed}:
+            snapshots.mark_changed('course_participants', course_id)
+        invalidate_attendance_stats()
+    return len(added), len(removed)
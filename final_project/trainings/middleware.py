@@ -0,0 +1,174 @@
+"""
+Kompresja odpowiedzi HTTP (Brotli lub gzip, zależnie od nagłówka Accept-Encoding).
+
+Kompresowane są tylko treści tekstowe (HTML, CSV, JSON, JSONL, JS, CSS, SVG), także odpowiedzi
+strumieniowe - każda porcja strumienia jest kompresowana i wysyłana od razu. Pliki PDF, XLSX,
+obrazy i inne treści już skompresowane są pomijane. Brotli jest używane, jeśli zainstalowany
+jest pakiet 'brotli'; w przeciwnym razie tylko gzip. Odpowiedzi z sekretem (tokenem CSRF lub
+ciasteczkami) są kompresowane wyłącznie gzipem z losowym dopełnieniem (atak BREACH).
+
+CachedAuthenticationMiddleware zastępuje AuthenticationMiddleware i pobiera użytkownika przez
+pamięć podręczną procesu (trainings.user_cache), bez zapytania do auth_user przy każdym żądaniu.
+"""
+import re
+
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
+from django.utils.text import compress_sequence, compress_string
+
+from .user_cache import aget_cached_user, get_cached_user
+
+try:
+    import brotli
+except ImportError:     # pragma: no cover - kompresja Brotli jest opcjonalna
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+)
+
+# Krótszych odpowiedzi nie opłaca się kompresować
+MIN_LENGTH = 200
+
+# Losowe bajty w nagłówku gzip utrudniające atak BREACH (jak w GZipMiddleware)
+GZIP_MAX_RANDOM_BYTES = 32
+
+# Jakość Brotli dla odpowiedzi generowanych na bieżąco (11 to jakość do plików statycznych)
+BROTLI_QUALITY = 5
+
+accept_encoding_re = re.compile(r'(?:^|,)\s*(br|gzip)\s*(?:;\s*q=([0-9.]+))?\s*(?=,|$)', re.IGNORECASE)
+
+
+def accepted_encoding(header, padded=False):
+    """
+    Wybiera kodowanie obsługiwane przez klienta: Brotli (jeśli dostępne), a w drugiej kolejności gzip.
+
+    :param header (str): Wartość nagłówka Accept-Encoding.
+    :param padded (bool): Czy dopuszczać tylko kodowanie z losowym dopełnieniem (gzip).
+
+    return:
+        str | None: 'br', 'gzip' lub None.
+    """
+    accepted = {name.lower() for name, quality in accept_encoding_re.findall(header)
+                if not quality or float(quality) > 0}
+    if brotli is not None and 'br' in accepted and not padded:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def is_compressible(content_type):
+    return content_type.split(';')[0].strip().lower().startswith(COMPRESSIBLE_TYPES)
+
+
+def carries_secrets(request, response):
+    """
+    Sprawdza, czy odpowiedź może zawierać sekret: token CSRF użyty przy jej tworzeniu (get_token)
+    lub ustawiane ciasteczka (sesja, CSRF).
+
+    Takie odpowiedzi są kompresowane tylko gzipem z losowymi bajtami w nagłówku (jak w GZipMiddleware),
+    a token w treści Django maskuje przy każdym żądaniu innym losowym kluczem, więc długość skompresowanej
+    odpowiedzi nie pozwala odgadywać tokenu (BREACH). Pozostałe odpowiedzi, w tym strony HTML bez
+    formularzy, mogą być kompresowane algorytmem Brotli.
+
+    Ciasteczka ustawia też CsrfViewMiddleware po użyciu tokenu, zanim odpowiedź trafi do kompresji.
+    """
+    return bool(request.META.get('CSRF_COOKIE_NEEDS_UPDATE') or response.cookies)
+
+
+def brotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    for item in sequence:
+        data = compressor.process(item) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def brotli_async_sequence(sequence):
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    async for item in sequence:
+        data = compressor.process(item) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def gzip_async_sequence(sequence):
+    # Tak jak GZipMiddleware: każda porcja to osobny człon gzip
+    async for item in sequence:
+        yield compress_string(item, max_random_bytes=GZIP_MAX_RANDOM_BYTES)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Kompresuje odpowiedzi tekstowe algorytmem Brotli lub gzip (na wzór django.middleware.gzip.GZipMiddleware).
+    """
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or not is_compressible(response.get('Content-Type', '')):
+            return response
+        if not response.streaming and len(response.content) < MIN_LENGTH:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = accepted_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''),
+                                     padded=carries_secrets(request, response))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                compress = brotli_async_sequence if encoding == 'br' else gzip_async_sequence
+                response.streaming_content = compress(response.streaming_content)
+            elif encoding == 'br':
+                response.streaming_content = brotli_sequence(response.streaming_content)
+            else:
+                response.streaming_content = compress_sequence(
+                    response.streaming_content, max_random_bytes=GZIP_MAX_RANDOM_BYTES)
+            # Długość skompresowanego strumienia nie jest znana z góry
+            del response['Content-Length']
+        else:
+            if encoding == 'br':
+                compressed = brotli.compress(response.content, quality=BROTLI_QUALITY)
+            else:
+                compressed = compress_string(response.content, max_random_bytes=GZIP_MAX_RANDOM_BYTES)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(response.content))
+
+        # Skompresowana treść nie jest identyczna bajt po bajcie - silny ETag staje się słabym
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """
+    AuthenticationMiddleware, który odczytuje użytkownika z pamięci podręcznej procesu.
+    """
+    def process_request(self, request):
+        super().process_request(request)
+
+        def get_user():
+            if not hasattr(request, '_cached_user'):
+                request._cached_user = get_cached_user(request)
+            return request._cached_user
+
+        async def auser():
+            if not hasattr(request, '_acached_user'):
+                request._acached_user = await aget_cached_user(request)
+            return request._acached_user
+
+        request.user = SimpleLazyObject(get_user)
+        request.auser = auser
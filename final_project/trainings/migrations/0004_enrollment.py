@@ -0,0 +1,88 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def forwards(apps, schema_editor):
+    """
+    Przenosi zapisy z tabeli M2M i obecności z PresenceList do tabeli Enrollment.
+    """
+    Participant = apps.get_model('trainings', 'Participant')
+    PresenceList = apps.get_model('trainings', 'PresenceList')
+    Enrollment = apps.get_model('trainings', 'Enrollment')
+    Membership = Participant.training_course.through
+
+    presence = {
+        (participant_id, course_id): present
+        for participant_id, course_id, present
+        in PresenceList.objects.values_list('participant_id', 'training_course_id', 'present').iterator()
+    }
+    pairs = set(Membership.objects.values_list('participant_id', 'trainingcourse_id').iterator())
+    # Wpisy listy obecności bez zapisu na szkolenie również stają się zapisami
+    pairs.update(presence)
+
+    Enrollment.objects.bulk_create(
+        [Enrollment(participant_id=participant_id, training_course_id=course_id,
+                    present=presence.get((participant_id, course_id)))
+         for participant_id, course_id in sorted(pairs)],
+        batch_size=1000,
+    )
+
+
+def backwards(apps, schema_editor):
+    """
+    Odtwarza tabelę M2M i PresenceList z tabeli Enrollment.
+    """
+    Participant = apps.get_model('trainings', 'Participant')
+    PresenceList = apps.get_model('trainings', 'PresenceList')
+    Enrollment = apps.get_model('trainings', 'Enrollment')
+    Membership = Participant.training_course.through
+
+    rows = list(Enrollment.objects.values_list('participant_id', 'training_course_id', 'present'))
+    Membership.objects.bulk_create(
+        [Membership(participant_id=participant_id, trainingcourse_id=course_id)
+         for participant_id, course_id, _ in rows],
+        batch_size=1000,
+    )
+    PresenceList.objects.bulk_create(
+        [PresenceList(participant_id=participant_id, training_course_id=course_id, present=present)
+         for participant_id, course_id, present in rows if present is not None],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trainings', '0003_alter_participant_training_course'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Enrollment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('enrolled_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('present', models.BooleanField(default=None, null=True)),
+                ('status', models.IntegerField(choices=[(1, 'zapisany'), (2, 'anulowany')], default=1)),
+                ('participant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='trainings.participant')),
+                ('training_course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='trainings.trainingcourse')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('participant', 'training_course'), name='unique_enrollment')],
+            },
+        ),
+        migrations.RunPython(forwards, backwards),
+        migrations.RemoveField(
+            model_name='participant',
+            name='training_course',
+        ),
+        migrations.AddField(
+            model_name='participant',
+            name='training_course',
+            field=models.ManyToManyField(through='trainings.Enrollment', to='trainings.trainingcourse'),
+        ),
+        migrations.DeleteModel(
+            name='PresenceList',
+        ),
+    ]
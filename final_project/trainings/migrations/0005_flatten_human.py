@@ -0,0 +1,137 @@
+import django.db.models.deletion
+from django.core.management.color import no_style
+from django.db import migrations, models
+
+HUMAN_FIELDS = ('first_name', 'last_name', 'gender', 'e_mail', 'phone_number')
+EMPLOYEE_FIELDS = HUMAN_FIELDS + ('position', 'company', 'team', 'team_leader', 'supervisor')
+BATCH_SIZE = 1000
+
+
+def _copy(source, target, fields):
+    """
+    Kopiuje wiersze modelu dziedziczącego po Human do samodzielnej tabeli, zachowując klucze główne.
+    """
+    batch = []
+    for row in source.objects.values('pk', *fields).iterator(chunk_size=BATCH_SIZE):
+        batch.append(target(id=row.pop('pk'), **row))
+        if len(batch) >= BATCH_SIZE:
+            target.objects.bulk_create(batch)
+            batch = []
+    target.objects.bulk_create(batch)
+
+
+def forwards(apps, schema_editor):
+    _copy(apps.get_model('trainings', 'Employee'), apps.get_model('trainings', 'NewEmployee'), EMPLOYEE_FIELDS)
+    _copy(apps.get_model('trainings', 'Participant'), apps.get_model('trainings', 'NewParticipant'), HUMAN_FIELDS)
+
+    # Sekwencje kluczy głównych muszą zaczynać się za skopiowanymi identyfikatorami (np. w PostgreSQL)
+    connection = schema_editor.connection
+    sequence_sql = connection.ops.sequence_reset_sql(
+        no_style(), [apps.get_model('trainings', 'NewEmployee'), apps.get_model('trainings', 'NewParticipant')])
+    with connection.cursor() as cursor:
+        for sql in sequence_sql:
+            cursor.execute(sql)
+
+
+def backwards(apps, schema_editor):
+    """
+    Odtwarza tabelę Human i tabele potomne. Pracownik i uczestnik o tym samym identyfikatorze
+    muszą być tą samą osobą (tak jak przed migracją), w przeciwnym razie migracji nie da się cofnąć.
+    """
+    Human = apps.get_model('trainings', 'Human')
+    Employee = apps.get_model('trainings', 'Employee')
+    Participant = apps.get_model('trainings', 'Participant')
+    NewEmployee = apps.get_model('trainings', 'NewEmployee')
+    NewParticipant = apps.get_model('trainings', 'NewParticipant')
+
+    humans = {}
+    for row in NewEmployee.objects.values('id', *HUMAN_FIELDS).iterator(chunk_size=BATCH_SIZE):
+        humans[row['id']] = row
+    for row in NewParticipant.objects.values('id', *HUMAN_FIELDS).iterator(chunk_size=BATCH_SIZE):
+        existing = humans.setdefault(row['id'], row)
+        if existing != row:
+            raise ValueError(f"Nie można cofnąć migracji: pracownik i uczestnik o ID {row['id']} to różne osoby.")
+    Human.objects.bulk_create([Human(**row) for row in humans.values()], batch_size=BATCH_SIZE)
+
+    # bulk_create nie obsługuje dziedziczenia wielotabelowego - wiersze potomne zapisywane są bez tabeli rodzica
+    for row in NewEmployee.objects.values('id', *EMPLOYEE_FIELDS[len(HUMAN_FIELDS):]).iterator(chunk_size=BATCH_SIZE):
+        Employee(human_ptr_id=row.pop('id'), **row).save_base(raw=True)
+    for human_id in NewParticipant.objects.values_list('id', flat=True).iterator(chunk_size=BATCH_SIZE):
+        Participant(human_ptr_id=human_id).save_base(raw=True)
+
+
+# Zamienia dziedziczenie wielotabelowe po Human na abstrakcyjną klasę bazową: pracownicy i uczestnicy
+# trafiają do samodzielnych tabel z tymi samymi kluczami głównymi, więc klucze obce szkoleń i zapisów
+# pozostają poprawne.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trainings', '0004_enrollment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewEmployee',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_name', models.CharField(max_length=64)),
+                ('last_name', models.CharField(max_length=64)),
+                ('gender', models.IntegerField(choices=[(1, 'kobieta'), (2, 'mężczyzna')])),
+                ('e_mail', models.EmailField(max_length=128)),
+                ('phone_number', models.IntegerField()),
+                ('position', models.CharField(max_length=256)),
+                ('company', models.CharField(max_length=128)),
+                ('team', models.CharField(max_length=128)),
+                ('team_leader', models.CharField(max_length=128)),
+                ('supervisor', models.CharField(max_length=128)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='NewParticipant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_name', models.CharField(max_length=64)),
+                ('last_name', models.CharField(max_length=64)),
+                ('gender', models.IntegerField(choices=[(1, 'kobieta'), (2, 'mężczyzna')])),
+                ('e_mail', models.EmailField(max_length=128)),
+                ('phone_number', models.IntegerField()),
+            ],
+        ),
+        migrations.RunPython(forwards, backwards),
+        migrations.RemoveField(
+            model_name='participant',
+            name='training_course',
+        ),
+        migrations.AlterField(
+            model_name='trainingcourse',
+            name='coach',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='trainings.newemployee'),
+        ),
+        migrations.AlterField(
+            model_name='enrollment',
+            name='participant',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='trainings.newparticipant'),
+        ),
+        migrations.DeleteModel(
+            name='Employee',
+        ),
+        migrations.DeleteModel(
+            name='Participant',
+        ),
+        migrations.DeleteModel(
+            name='Human',
+        ),
+        migrations.RenameModel(
+            old_name='NewEmployee',
+            new_name='Employee',
+        ),
+        migrations.RenameModel(
+            old_name='NewParticipant',
+            new_name='Participant',
+        ),
+        migrations.AddField(
+            model_name='participant',
+            name='training_course',
+            field=models.ManyToManyField(through='trainings.Enrollment', to='trainings.trainingcourse'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2024-07-20 12:00
+
+import trainings.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trainings', '0005_flatten_human'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trainingcourse',
+            name='duration_seconds',
+            field=models.GeneratedField(db_persist=True, expression=trainings.models.DurationSeconds('end_time', 'start_time'), output_field=models.IntegerField()),
+        ),
+        migrations.AddIndex(
+            model_name='trainingcourse',
+            index=models.Index(fields=['duration_seconds'], name='course_duration_idx'),
+        ),
+    ]
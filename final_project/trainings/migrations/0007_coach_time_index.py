@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2024-07-21 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trainings', '0006_trainingcourse_duration_seconds'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trainingcourse',
+            index=models.Index(fields=['coach', 'start_time', 'end_time'], name='course_coach_time_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2024-07-22 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trainings', '0007_coach_time_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['status', 'training_course', 'present'], name='enrollment_attendance_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.0.6 on 2024-07-22 12:00
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+GROUP_FIELDS = ('company', 'team', 'team_leader', 'supervisor')
+
+
+def fill_rollups(apps, schema_editor):
+    """
+    Wypełnia zestawienie dla istniejących danych (jak trainings.rollups.refresh_rollups()).
+    """
+    Employee = apps.get_model('trainings', 'Employee')
+    OrgRollup = apps.get_model('trainings', 'OrgRollup')
+    rows = Employee.objects.order_by().values(*GROUP_FIELDS).annotate(
+        employees=Count('pk', distinct=True),
+        active_coaches=Count('pk', distinct=True, filter=Q(trainingcourse__isnull=False)),
+        courses=Count('trainingcourse'),
+        total_seconds=Coalesce(Sum('trainingcourse__duration_seconds'), Value(0)),
+        held_seconds=Coalesce(Sum('trainingcourse__duration_seconds', filter=Q(trainingcourse__took_place=True)),
+                              Value(0)),
+    )
+    OrgRollup.objects.bulk_create([OrgRollup(**row) for row in rows], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trainings', '0008_enrollment_attendance_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrgRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('company', models.CharField(max_length=128)),
+                ('team', models.CharField(max_length=128)),
+                ('team_leader', models.CharField(max_length=128)),
+                ('supervisor', models.CharField(max_length=128)),
+                ('employees', models.IntegerField(default=0)),
+                ('active_coaches', models.IntegerField(default=0)),
+                ('courses', models.IntegerField(default=0)),
+                ('total_seconds', models.BigIntegerField(default=0)),
+                ('held_seconds', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['supervisor'], name='org_rollup_supervisor_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='orgrollup',
+            constraint=models.UniqueConstraint(fields=('company', 'team', 'team_leader', 'supervisor'), name='unique_org_rollup'),
+        ),
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
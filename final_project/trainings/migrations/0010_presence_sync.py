@@ -0,0 +1,30 @@
+# Generated by Django 5.0.6 on 2024-07-22 12:30
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trainings', '0009_org_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='present_changed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='PresenceSyncBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('received_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('result', models.JSONField(default=dict)),
+                ('training_course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='trainings.trainingcourse')),
+            ],
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.6 on 2024-07-22 12:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trainings', '0010_presence_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='reminder_sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='trainingcourse',
+            index=models.Index(fields=['start_time'], name='course_start_time_idx'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.0.6 on 2024-07-22 13:00
+
+from django.db import migrations, models
+
+
+# Wyzwalacze indeksu wyszukiwania sprzed miękkiego usuwania: rodzaj -> (tabela, kod rodzaju, 'title', 'details')
+SEARCH_SOURCES = {
+    'course': ('trainings_trainingcourse', 1, "{row}.topic", "''"),
+    'employee': ('trainings_employee', 2, "{row}.first_name || ' ' || {row}.last_name",
+                 "{row}.e_mail || ' ' || {row}.position || ' ' || {row}.team || ' ' || {row}.company"),
+}
+
+
+def drop_search_triggers(apps, schema_editor):
+    # Wyzwalacze indeksu wyszukiwania szkoleń i pracowników zostaną utworzone ponownie (z pominięciem
+    # wierszy oznaczonych jako usunięte) przez sygnał post_migrate (trainings.signals.ensure_search_index)
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for kind in SEARCH_SOURCES:
+        for event in ('insert', 'update'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS trainings_search_{kind}_{event}')
+
+
+def restore_search_triggers(apps, schema_editor):
+    # Wyzwalacze odwołujące się do new.deleted_at blokują usunięcie kolumny (ALTER TABLE DROP COLUMN),
+    # więc przed nim zastępowane są wyzwalaczami bez warunku, a wiersze oznaczone jako usunięte,
+    # które znów będą widoczne, wracają do indeksu
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        indexed = 'trainings_search' in connection.introspection.table_names(cursor)
+    if not indexed:
+        return
+    drop_search_triggers(apps, schema_editor)
+    for kind, (table, code, title, details) in SEARCH_SOURCES.items():
+        insert = (f"INSERT INTO trainings_search(rowid, title, details) "
+                  f"VALUES (new.id * 4 + {code}, {title.format(row='new')}, {details.format(row='new')});")
+        delete = f"DELETE FROM trainings_search WHERE rowid = old.id * 4 + {code};"
+        schema_editor.execute(f"CREATE TRIGGER trainings_search_{kind}_insert AFTER INSERT ON {table} "
+                              f"BEGIN {insert} END")
+        schema_editor.execute(f"CREATE TRIGGER trainings_search_{kind}_update AFTER UPDATE ON {table} "
+                              f"BEGIN {delete} {insert} END")
+        schema_editor.execute(f"INSERT INTO trainings_search(rowid, title, details) "
+                              f"SELECT src.id * 4 + {code}, {title.format(row='src')}, {details.format(row='src')} "
+                              f"FROM {table} AS src WHERE src.deleted_at IS NOT NULL")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trainings', '0011_reminders'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='trainingcourse',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='trainingcourse',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='course_deleted_idx'),
+        ),
+        migrations.RunPython(drop_search_triggers, restore_search_triggers),
+    ]
@@ -1,6 +1,7 @@
 from datetime import timedelta
 
 from django.db import models
+from django.utils import timezone
 
 
 CATEGORIES = (
@@ -27,6 +28,57 @@ GENDERS = (
     (2, "mężczyzna")
 )
 
+ENROLLMENT_STATUSES = (
+    (1, "zapisany"),
+    (2, "anulowany")
+)
+ENROLLMENT_ACTIVE = 1
+# Wypisany uczestnik - wiersz zapisu zostaje (historia obecności), a ponowny zapis przywraca go jako nowy
+ENROLLMENT_CANCELLED = 2
+
+
+class DurationSeconds(models.Func):
+    """
+    Różnica dwóch znaczników czasu (pierwszy minus drugi) w pełnych sekundach, liczona wyłącznie wbudowanymi funkcjami bazy danych
+    (dzięki temu może być wyrażeniem kolumny generowanej).
+    """
+    arity = 2
+    output_field = models.IntegerField()
+    template = "CAST(EXTRACT(EPOCH FROM (%(expressions)s)) AS INTEGER)"
+    arg_joiner = " - "
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection,
+                           template="CAST(ROUND((julianday(%(expressions)s)) * 86400) AS INTEGER)",
+                           arg_joiner=") - julianday(",
+                           **extra_context)
+
+
+class ActiveManager(models.Manager):
+    # Domyślny menedżer modeli z miękkim usuwaniem - pomija wiersze oznaczone jako usunięte
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+# Miękkie usuwanie: wiersz oznaczony jako usunięty znika z aplikacji od razu, a wraz z zależnymi wierszami
+# jest usuwany później, porcjami (polecenie purge_deleted, trainings.purge)
+class SoftDeleteModel(models.Model):
+    deleted_at = models.DateTimeField(null=True, blank=True)    # czas oznaczenia jako usunięty
+
+    objects = ActiveManager()
+    all_objects = models.Manager()          # także wiersze oznaczone jako usunięte
+
+    class Meta:
+        abstract = True
+
+    def soft_delete(self):
+        self.deleted_at = timezone.now()
+        self.save(update_fields=['deleted_at'])
+
+    async def asoft_delete(self):
+        self.deleted_at = timezone.now()
+        await self.asave(update_fields=['deleted_at'])
+
 
 class Human(models.Model):
     first_name = models.CharField(max_length=64, blank=False)   # imię
@@ -42,8 +94,11 @@ class Human(models.Model):
     def __str__(self):
         return self.name
 
+    class Meta:
+        abstract = True
+
 
-class Employee(Human):
+class Employee(SoftDeleteModel, Human):
     position = models.CharField(max_length=256, blank=False)    # stanowisko
     company = models.CharField(max_length=128, blank=False)     # spółka
     team = models.CharField(max_length=128)                     # zespół
@@ -51,7 +106,7 @@ class Employee(Human):
     supervisor = models.CharField(max_length=128)               # przełożony
 
 
-class TrainingCourse(models.Model):
+class TrainingCourse(SoftDeleteModel):
     topic = models.CharField(max_length=512, blank=False)           # temat
     start_time = models.DateTimeField(blank=False)                  # data i godzina rozpoczęcia
     end_time = models.DateTimeField(blank=False)                    # data i godzina zakończenia
@@ -64,8 +119,36 @@ class TrainingCourse(models.Model):
     took_place = models.BooleanField(null=True, default=None)                  # czy szkolenie się odbyło
     materials = models.BooleanField(null=True, default=None)                   # czy trener dostarczył materiały po szkoleniu
 
+    # czas trwania w sekundach, liczony przez bazę danych (pozwala filtrować, sortować i sumować po czasie trwania)
+    duration_seconds = models.GeneratedField(
+        expression=DurationSeconds('end_time', 'start_time'),
+        output_field=models.IntegerField(),
+        db_persist=True,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['duration_seconds'], name='course_duration_idx'),
+            # zapytania zakresowe o szkolenia trenera w danym przedziale czasu
+            models.Index(fields=['coach', 'start_time', 'end_time'], name='course_coach_time_idx'),
+            # zapytania zakresowe o szkolenia rozpoczynające się w danym przedziale czasu (trainings.reminders)
+            models.Index(fields=['start_time'], name='course_start_time_idx'),
+            # szkolenia oczekujące na usunięcie (trainings.purge)
+            models.Index(fields=['deleted_at'], name='course_deleted_idx',
+                         condition=models.Q(deleted_at__isnull=False)),
+        ]
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Po zapisie wartość kolumny generowanej może być nieaktualna - zostanie wczytana ponownie przy odczycie
+        self.__dict__.pop('duration_seconds', None)
+
     @property
     def duration(self):
+        # Wartość kolumny generowanej, jeśli została wczytana z bazy; dla niezapisanych obiektów liczona w Pythonie
+        seconds = self.__dict__.get('duration_seconds')
+        if seconds is not None:
+            return timedelta(seconds=seconds)
         if self.start_time and self.end_time:
             return self.end_time - self.start_time
         return timedelta(0)
@@ -79,10 +162,75 @@ class TrainingCourse(models.Model):
 
 
 class Participant(Human):
-    training_course = models.ManyToManyField(TrainingCourse, null=True)        # szkolenie/szkolenia, w których uczestniczył
+    training_course = models.ManyToManyField(TrainingCourse, through='Enrollment')     # szkolenie/szkolenia, w których uczestniczył
 
 
-class PresenceList(models.Model):
+# Zapis uczestnika na szkolenie wraz z obecnością - jedna tabela zamiast relacji M2M i osobnej listy obecności
+class Enrollment(models.Model):
     participant = models.ForeignKey(Participant, on_delete=models.CASCADE)          # uczestnik
     training_course = models.ForeignKey(TrainingCourse, on_delete=models.CASCADE)   # szkolenie
-    present = models.BooleanField(null=True)                                        # czy był obecny?
+    enrolled_at = models.DateTimeField(default=timezone.now)                        # data zapisu
+    present = models.BooleanField(null=True, default=None)                          # czy był obecny? (None - nie sprawdzono)
+    present_changed_at = models.DateTimeField(null=True, blank=True)                # czas ostatniej zmiany obecności
+    reminder_sent_at = models.DateTimeField(null=True, blank=True)                  # czas wysłania przypomnienia
+    status = models.IntegerField(choices=ENROLLMENT_STATUSES, default=1)            # status zapisu
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['participant', 'training_course'], name='unique_enrollment'),
+        ]
+        indexes = [
+            # indeks pokrywający zliczanie frekwencji w raportach (trainings.analytics) bez odczytu tabeli
+            models.Index(fields=['status', 'training_course', 'present'], name='enrollment_attendance_idx'),
+        ]
+
+
+def reenrollment(enrolled_at):
+    """
+    Zwraca wartości pól, które przywracają anulowany zapis jako nowy zapis na szkolenie (QuerySet.update()).
+
+    :param enrolled_at (datetime): Data ponownego zapisu.
+
+    return:
+        dict: {nazwa pola: wartość}.
+    """
+    return {'status': ENROLLMENT_ACTIVE, 'enrolled_at': enrolled_at, 'present': None, 'present_changed_at': None,
+            'reminder_sent_at': None}
+
+
+# Porcja zmian obecności przesłana przez stronę listy obecności działającą bez sieci (trainings.presence_sync) -
+# klucz porcji pozwala bezpiecznie ponowić wysyłkę, a zapisany wynik jest zwracany przy ponowieniu
+class PresenceSyncBatch(models.Model):
+    key = models.CharField(max_length=64, unique=True)                  # klucz idempotencji nadany przez klienta
+    training_course = models.ForeignKey(TrainingCourse, on_delete=models.CASCADE)
+    received_at = models.DateTimeField(default=timezone.now, db_index=True)
+    result = models.JSONField(default=dict)                             # odpowiedź zwrócona klientowi
+
+
+# Zestawienie szkoleń według struktury organizacyjnej trenerów (tabela zmaterializowana, odświeżana przez
+# trainings.rollups) - jeden wiersz na kombinację spółki, zespołu, lidera i przełożonego
+class OrgRollup(models.Model):
+    company = models.CharField(max_length=128)                  # spółka
+    team = models.CharField(max_length=128)                     # zespół
+    team_leader = models.CharField(max_length=128)              # lider
+    supervisor = models.CharField(max_length=128)               # przełożony
+    employees = models.IntegerField(default=0)                  # liczba pracowników
+    active_coaches = models.IntegerField(default=0)             # liczba pracowników prowadzących szkolenia
+    courses = models.IntegerField(default=0)                    # liczba szkoleń
+    total_seconds = models.BigIntegerField(default=0)           # łączny czas trwania szkoleń
+    held_seconds = models.BigIntegerField(default=0)            # czas trwania szkoleń, które się odbyły
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'team', 'team_leader', 'supervisor'], name='unique_org_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['supervisor'], name='org_rollup_supervisor_idx'),
+        ]
+
+
+# Wersja danych współdzielona przez wszystkie procesy serwera (trainings.versions) - zmieniana przy zapisie
+# danych, z których zbudowano wpisy w cache procesu (np. osie czasu trenerów)
+class DataVersion(models.Model):
+    key = models.CharField(max_length=200, primary_key=True)   # nazwa wersjonowanych danych
+    version = models.BigIntegerField()                          # czas ostatniej zmiany (ns od epoki Unix)
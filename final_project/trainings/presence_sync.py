@@ -0,0 +1,123 @@
+"""
+Synchronizacja zmian obecności zapisanych przez stronę listy obecności bez dostępu do sieci.
+
+Strona (static/trainings/presence.js) zapisuje każdą zmianę lokalnie z czasem zmiany na urządzeniu
+i wysyła zebrane zmiany jedną porcją, gdy sieć jest dostępna. Porcja ma klucz idempotencji: ponowienie
+wysyłki (np. po utracie odpowiedzi) zwraca zapisany wynik bez ponownego stosowania zmian.
+
+Zmiany są stosowane w jednej transakcji według zasady "ostatni zapis wygrywa": zmiana nadpisuje
+obecność tylko wtedy, gdy jest nowsza niż ostatnia zmiana zapisu (Enrollment.present_changed_at),
+niezależnie od kolejności, w jakiej porcje z różnych urządzeń docierają do serwera. Czas z przyszłości
+(źle ustawiony zegar urządzenia) jest ograniczany do czasu serwera.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import snapshots
+from .analytics import invalidate_attendance_stats
+from .models import ENROLLMENT_ACTIVE, Enrollment, PresenceSyncBatch
+
+# Maksymalna liczba zmian w jednej porcji
+MAX_CHANGES = 1000
+
+# Czas przechowywania kluczy porcji (ponowienia starszych porcji są stosowane ponownie, co przy
+# zasadzie "ostatni zapis wygrywa" niczego nie zmienia)
+KEY_TTL = timedelta(days=7)
+
+
+class SyncError(Exception):
+    """
+    Błąd danych porcji zmian (odpowiedź 400).
+    """
+
+
+def parse_changes(data):
+    """
+    Sprawdza porcję zmian przesłaną przez stronę listy obecności.
+
+    :param data (dict): {'key': klucz porcji, 'changes': [{'participant': ID, 'present': true/false/null,
+                        'at': czas zmiany w milisekundach od 1970-01-01 UTC}, ...]}.
+
+    return:
+        tuple: (klucz porcji, lista krotek (ID uczestnika, obecność, czas zmiany)).
+    """
+    try:
+        key, changes = data['key'], data['changes']
+    except (TypeError, KeyError):
+        raise SyncError('Oczekiwano JSON {"key": ..., "changes": [...]}.')
+    if not isinstance(key, str) or not 0 < len(key) <= 64:
+        raise SyncError("Klucz porcji musi być tekstem o długości od 1 do 64 znaków.")
+    if not isinstance(changes, list) or len(changes) > MAX_CHANGES:
+        raise SyncError(f"Pole changes musi być listą najwyżej {MAX_CHANGES} zmian.")
+
+    parsed = []
+    for change in changes:
+        try:
+            participant_id, present, at = change['participant'], change['present'], change['at']
+        except (TypeError, KeyError):
+            raise SyncError("Każda zmiana musi mieć pola participant, present i at.")
+        if type(participant_id) is not int or present not in (True, False, None) \
+                or type(at) not in (int, float):
+            raise SyncError("Nieprawidłowa zmiana obecności.")
+        try:
+            changed_at = datetime.fromtimestamp(at / 1000, dt_timezone.utc)
+        except (OverflowError, OSError, ValueError):
+            raise SyncError("Nieprawidłowy czas zmiany.")
+        parsed.append((participant_id, present, changed_at))
+    return key, parsed
+
+
+def apply_changes(course, key, changes):
+    """
+    Stosuje porcję zmian obecności na szkoleniu w jednej transakcji.
+
+    :param course (TrainingCourse): Szkolenie.
+    :param key (str): Klucz idempotencji porcji.
+    :param changes (list): Krotki (ID uczestnika, obecność, czas zmiany) z parse_changes().
+
+    return:
+        dict: {'applied': ID uczestników ze zmienioną obecnością, 'stale': ID uczestników, których zmiana była
+              starsza od zapisanej, 'unknown': ID uczestników niezapisanych na szkolenie}.
+    """
+    stored = PresenceSyncBatch.objects.filter(key=key).values_list('result', flat=True).first()
+    if stored is not None:
+        return stored
+
+    now = timezone.now()
+    # Najnowsza zmiana każdego uczestnika z porcji
+    latest = {}
+    for participant_id, present, changed_at in sorted(changes, key=lambda change: change[2]):
+        latest[participant_id] = (present, min(changed_at, now))
+
+    result = {'applied': [], 'stale': [], 'unknown': []}
+    try:
+        with transaction.atomic():
+            enrollments = {enrollment.participant_id: enrollment for enrollment in Enrollment.objects.filter(
+                training_course=course, participant_id__in=latest, status=ENROLLMENT_ACTIVE).only(
+                'pk', 'participant_id', 'present', 'present_changed_at')}
+            changed = []
+            for participant_id, (present, changed_at) in latest.items():
+                enrollment = enrollments.get(participant_id)
+                if enrollment is None:
+                    result['unknown'].append(participant_id)
+                elif enrollment.present_changed_at is not None and enrollment.present_changed_at >= changed_at:
+                    result['stale'].append(participant_id)
+                else:
+                    enrollment.present = present
+                    enrollment.present_changed_at = changed_at
+                    changed.append(enrollment)
+                    result['applied'].append(participant_id)
+            Enrollment.objects.bulk_update(changed, ['present', 'present_changed_at'])
+            PresenceSyncBatch.objects.create(key=key, training_course=course, received_at=now, result=result)
+    except IntegrityError:
+        # Ta sama porcja zapisana w międzyczasie przez równoległe żądanie - jej zmiany zostały wycofane
+        return PresenceSyncBatch.objects.values_list('result', flat=True).get(key=key)
+
+    PresenceSyncBatch.objects.filter(received_at__lt=now - KEY_TTL).delete()
+    if changed:
+        # bulk_update nie wysyła sygnałów post_save
+        snapshots.mark_changed('course_participants', course.pk)
+        invalidate_attendance_stats()
+    return result
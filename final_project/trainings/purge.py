@@ -0,0 +1,121 @@
+"""
+Usuwanie szkoleń i pracowników oznaczonych jako usunięte (SoftDeleteModel.soft_delete).
+
+Oznaczenie ukrywa wiersz od razu (domyślny menedżer, zestawienia i raporty pomijają oznaczone
+szkolenia), a zapisy uczestników i pozostałe zależne wiersze usuwa później polecenie purge_deleted.
+Usuwanie przez Collector Django wczytuje każdy zależny wiersz do Pythona i usuwa wszystko w jednej
+transakcji, która przy dużym cyklu szkoleń blokuje zapis do bazy SQLite (np. rejestrację obecności)
+na sekundy. Tutaj zależne wiersze usuwane są zapytaniami DELETE ... WHERE id IN (SELECT ... LIMIT n)
+z pominięciem ORM, każde w osobnej krótkiej transakcji, z przerwą między porcjami, w której mogą
+zapisywać inne procesy. Przerwane usuwanie można wznowić - wiersz oznaczony jako usunięty jest
+usuwany dopiero wtedy, gdy nie ma już zależnych wierszy.
+
+Zestawienia i raporty zostały przeliczone przy oznaczeniu (sygnały post_save), więc usunięcie
+wierszy nie zmienia niczego, co widzi użytkownik, i nie wysyła sygnałów.
+"""
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import Employee, Enrollment, PresenceSyncBatch, TrainingCourse
+
+# Tabele zależne od szkolenia: (nazwa w wyniku, model, kolumna klucza obcego)
+COURSE_DEPENDENTS = (
+    ('enrollments', Enrollment, 'training_course_id'),
+    ('presence_batches', PresenceSyncBatch, 'training_course_id'),
+)
+
+# Maksymalna liczba ID szkoleń w jednym zapytaniu
+MAX_COURSE_IDS = 500
+
+
+def _delete_batch(sql, params):
+    """
+    Wykonuje jedno zapytanie DELETE w osobnej transakcji i zwraca liczbę usuniętych wierszy.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def delete_dependents_sql(model, column, count):
+    """
+    Zwraca zapytanie usuwające porcję wierszy modelu powiązanych z podanymi szkoleniami
+    (count parametrów ID szkoleń i rozmiar porcji).
+    """
+    table = model._meta.db_table
+    placeholders = ', '.join(['%s'] * count)
+    return (f"DELETE FROM {table} WHERE id IN "
+            f"(SELECT id FROM {table} WHERE {column} IN ({placeholders}) LIMIT %s)")
+
+
+def delete_courses_sql(count):
+    """
+    Zwraca zapytanie usuwające podane szkolenia oznaczone jako usunięte, które nie mają już zależnych wierszy
+    (count parametrów ID szkoleń).
+    """
+    table = TrainingCourse._meta.db_table
+    placeholders = ', '.join(['%s'] * count)
+    empty = ' '.join(f"AND NOT EXISTS (SELECT 1 FROM {model._meta.db_table} WHERE {column} = {table}.id)"
+                     for _, model, column in COURSE_DEPENDENTS)
+    return f"DELETE FROM {table} WHERE id IN ({placeholders}) AND deleted_at IS NOT NULL {empty}"
+
+
+def delete_employees_sql():
+    """
+    Zwraca zapytanie usuwające porcję pracowników oznaczonych jako usunięci, którzy nie prowadzą już
+    żadnego szkolenia (parametr - rozmiar porcji).
+    """
+    table = Employee._meta.db_table
+    courses = TrainingCourse._meta.db_table
+    return (f"DELETE FROM {table} WHERE id IN (SELECT id FROM {table} WHERE deleted_at IS NOT NULL "
+            f"AND NOT EXISTS (SELECT 1 FROM {courses} WHERE coach_id = {table}.id) LIMIT %s)")
+
+
+def purge_deleted(batch_size=None, pause=None, sleep=time.sleep):
+    """
+    Usuwa z bazy szkolenia i pracowników oznaczonych jako usunięci wraz z zależnymi wierszami.
+
+    :param batch_size (int): Maksymalna liczba wierszy usuwanych w jednej transakcji
+                             (domyślnie settings.PURGE_BATCH_SIZE).
+    :param pause (float): Przerwa między transakcjami w sekundach (domyślnie settings.PURGE_PAUSE).
+    :param sleep (callable): Funkcja wstrzymująca usuwanie między transakcjami.
+
+    return:
+        dict: Liczba usuniętych wierszy każdego rodzaju oraz liczba transakcji ('batches').
+    """
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    pause = pause if pause is not None else settings.PURGE_PAUSE
+    result = {name: 0 for name, _, _ in COURSE_DEPENDENTS}
+    result.update(courses=0, employees=0, batches=0)
+
+    def run(sql, params):
+        if result['batches'] and pause:
+            sleep(pause)
+        result['batches'] += 1
+        return _delete_batch(sql, params)
+
+    # Odczyt poza transakcjami usuwania (indeks częściowy course_deleted_idx)
+    course_ids = list(TrainingCourse.all_objects.filter(deleted_at__isnull=False).order_by('pk').values_list(
+        'pk', flat=True))
+    for start in range(0, len(course_ids), MAX_COURSE_IDS):
+        chunk = course_ids[start:start + MAX_COURSE_IDS]
+        for name, model, column in COURSE_DEPENDENTS:
+            sql = delete_dependents_sql(model, column, len(chunk))
+            while True:
+                deleted = run(sql, [*chunk, batch_size])
+                result[name] += deleted
+                if deleted < batch_size:
+                    break
+        for offset in range(0, len(chunk), batch_size):
+            ids = chunk[offset:offset + batch_size]
+            result['courses'] += run(delete_courses_sql(len(ids)), ids)
+
+    employees_sql = delete_employees_sql()
+    while True:
+        deleted = run(employees_sql, [batch_size])
+        result['employees'] += deleted
+        if deleted < batch_size:
+            break
+    return result
@@ -0,0 +1,129 @@
+"""
+Przypomnienia e-mail dla uczestników szkoleń rozpoczynających się w najbliższym czasie.
+
+Szkolenia wybierane są zapytaniem zakresowym po czasie rozpoczęcia (indeks course_start_time_idx),
+a zapisy ich uczestników - jednym zapytaniem prefetch. Wiadomości są renderowane z szablonów
+email/reminder_subject.txt i email/reminder.txt i wysyłane porcjami przez jedno połączenie z serwerem
+poczty (get_connection), otwarte na czas całej wysyłki, z opcjonalnym ograniczeniem liczby wiadomości
+na sekundę.
+
+Postęp wysyłki zapisywany jest w Enrollment.reminder_sent_at. Zapisy porcji są oznaczane (w zatwierdzonej
+transakcji) przed wysłaniem wiadomości, a po błędzie wysyłki oznaczenie niewysłanych jest cofane - ponowne
+uruchomienie po przerwaniu wysyła tylko brakujące przypomnienia i nigdy nie wysyła tego samego dwa razy.
+Przy nagłym przerwaniu procesu w trakcie porcji jej niewysłane przypomnienia przepadają.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Prefetch
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .models import ENROLLMENT_ACTIVE, Enrollment, TrainingCourse
+
+
+def due_courses(now, lead_time):
+    """
+    Zwraca szkolenia rozpoczynające się w przedziale [now, now + lead_time).
+    """
+    return TrainingCourse.objects.filter(start_time__gte=now, start_time__lt=now + lead_time)
+
+
+def pending_reminders(now, lead_time):
+    """
+    Pobiera aktywne zapisy bez wysłanego przypomnienia na szkolenia rozpoczynające się w przedziale
+    [now, now + lead_time) - dwoma zapytaniami (szkolenia z trenerem i zapisy z uczestnikami).
+
+    return:
+        list: Zapisy (z wczytanym uczestnikiem i szkoleniem) w kolejności rozpoczęcia szkoleń.
+    """
+    courses = due_courses(now, lead_time).select_related('coach').order_by('start_time', 'pk').prefetch_related(
+        Prefetch('enrollment_set', to_attr='pending', queryset=Enrollment.objects.filter(
+            status=ENROLLMENT_ACTIVE, reminder_sent_at__isnull=True).select_related('participant').order_by('pk')))
+    enrollments = []
+    for course in courses:
+        for enrollment in course.pending:
+            # Szkolenie jest już wczytane - bez osobnego zapytania przy renderowaniu wiadomości
+            enrollment.training_course = course
+            enrollments.append(enrollment)
+    return enrollments
+
+
+def reminder_message(enrollment, subject_template, body_template, connection):
+    """
+    Tworzy wiadomość z przypomnieniem o szkoleniu dla uczestnika.
+    """
+    context = {'participant': enrollment.participant, 'course': enrollment.training_course}
+    subject = ' '.join(subject_template.render(context).split())
+    return EmailMessage(subject, body_template.render(context), to=[enrollment.participant.e_mail],
+                        connection=connection)
+
+
+def claim(enrollments, now):
+    """
+    Oznacza zapisy jako zapisy z wysłanym przypomnieniem i zwraca te, których nie oznaczył wcześniej
+    inny proces wysyłki.
+    """
+    with transaction.atomic():
+        free = set(Enrollment.objects.select_for_update().filter(
+            pk__in=[enrollment.pk for enrollment in enrollments], reminder_sent_at__isnull=True).values_list(
+            'pk', flat=True))
+        Enrollment.objects.filter(pk__in=free).update(reminder_sent_at=now)
+    return [enrollment for enrollment in enrollments if enrollment.pk in free]
+
+
+def send_reminders(lead_time=None, batch_size=None, rate=None, connection=None, sleep=time.sleep):
+    """
+    Wysyła przypomnienia uczestnikom szkoleń rozpoczynających się w ciągu lead_time.
+
+    :param lead_time (timedelta): Wyprzedzenie przypomnienia (domyślnie settings.REMINDER_LEAD_TIME sekund).
+    :param batch_size (int): Liczba wiadomości w porcji (domyślnie settings.REMINDER_BATCH_SIZE).
+    :param rate (float): Maksymalna liczba wiadomości na sekundę (domyślnie settings.REMINDER_RATE, 0 - bez limitu).
+    :param connection: Połączenie z serwerem poczty (domyślnie get_connection()).
+    :param sleep (callable): Funkcja wstrzymująca wysyłkę (ograniczenie liczby wiadomości na sekundę).
+
+    return:
+        dict: {'courses': liczba szkoleń z wysłanymi przypomnieniami, 'sent': liczba wysłanych wiadomości,
+              'skipped': liczba zapisów oznaczonych w międzyczasie przez inny proces}.
+    """
+    lead_time = lead_time if lead_time is not None else timedelta(seconds=settings.REMINDER_LEAD_TIME)
+    batch_size = batch_size or settings.REMINDER_BATCH_SIZE
+    rate = rate if rate is not None else settings.REMINDER_RATE
+    connection = connection or get_connection()
+
+    now = timezone.now()
+    enrollments = pending_reminders(now, lead_time)
+    result = {'courses': 0, 'sent': 0, 'skipped': 0}
+    if not enrollments:
+        return result
+
+    subject_template = get_template('email/reminder_subject.txt')
+    body_template = get_template('email/reminder.txt')
+    courses = set()
+    started = time.monotonic()
+    connection.open()
+    try:
+        for start in range(0, len(enrollments), batch_size):
+            batch = enrollments[start:start + batch_size]
+            claimed = claim(batch, now)
+            result['skipped'] += len(batch) - len(claimed)
+            for index, enrollment in enumerate(claimed):
+                if rate:
+                    sleep(max(0.0, started + result['sent'] / rate - time.monotonic()))
+                message = reminder_message(enrollment, subject_template, body_template, connection)
+                try:
+                    connection.send_messages([message])
+                except Exception:
+                    # Przypomnienia niewysłane z tej porcji zostaną wysłane przy następnym uruchomieniu
+                    Enrollment.objects.filter(pk__in=[unsent.pk for unsent in claimed[index:]]).update(
+                        reminder_sent_at=None)
+                    raise
+                result['sent'] += 1
+                courses.add(enrollment.training_course_id)
+    finally:
+        connection.close()
+        result['courses'] = len(courses)
+    return result
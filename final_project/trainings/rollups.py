@@ -0,0 +1,149 @@
+"""
+Zestawienia szkoleń według struktury organizacyjnej: spółki, zespołu, lidera i przełożonego trenerów.
+
+Wyniki zapytania grupującego pracowników (z dołączonymi prowadzonymi szkoleniami) są przechowywane
+w tabeli OrgRollup. Raporty sumują jej wiersze kolejnym GROUP BY, więc nie przeglądają szkoleń
+ani pracowników. Zmiana pracownika lub szkolenia (sygnały) odświeża po zatwierdzeniu transakcji
+tylko grupy, których dotyczy (przed zmianą i po niej); import pracowników z pliku CSV zleca to samo
+dla grup zaimportowanych pracowników. refresh_rollups() bez argumentów przebudowuje całą tabelę
+(polecenie refresh_org_rollups - np. po innych zmianach z pominięciem sygnałów).
+"""
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Employee, OrgRollup
+
+GROUP_FIELDS = ('company', 'team', 'team_leader', 'supervisor')
+
+# Poziomy raportu: nazwa -> (etykieta, pola grupowania)
+LEVELS = {
+    'company': ('Spółka', ('company',)),
+    'team': ('Zespół', ('company', 'team')),
+    'supervisor': ('Przełożony', ('supervisor',)),
+}
+
+# Liczba grup odświeżanych jednym zapytaniem
+REFRESH_BATCH = 200
+
+# Złączone szkolenia nieoznaczone jako usunięte (oznaczenie od razu przelicza grupę trenera przez sygnał,
+# więc późniejsze usunięcie wierszy nie zmienia zestawienia)
+ACTIVE_COURSE = Q(trainingcourse__deleted_at__isnull=True)
+
+
+def employee_totals(employees):
+    """
+    Dodaje do pracowników liczbę i łączny czas trwania prowadzonych szkoleń (jedno zapytanie ze złączeniem).
+    """
+    return employees.annotate(
+        courses_count=Count('trainingcourse', filter=ACTIVE_COURSE),
+        total_seconds=Coalesce(Sum('trainingcourse__duration_seconds', filter=ACTIVE_COURSE), Value(0)),
+        held_seconds=Coalesce(Sum('trainingcourse__duration_seconds',
+                                  filter=ACTIVE_COURSE & Q(trainingcourse__took_place=True)), Value(0)),
+    )
+
+
+def compute_rollups(employees):
+    """
+    Liczy wiersze zestawienia dla podanych pracowników jednym zapytaniem GROUP BY.
+
+    :param employees (QuerySet): Pracownicy.
+
+    return:
+        list: Niezapisane obiekty OrgRollup.
+    """
+    rows = employees.order_by().values(*GROUP_FIELDS).annotate(
+        employees=Count('pk', distinct=True),
+        active_coaches=Count('pk', distinct=True, filter=ACTIVE_COURSE & Q(trainingcourse__isnull=False)),
+        courses=Count('trainingcourse', filter=ACTIVE_COURSE),
+        total_seconds=Coalesce(Sum('trainingcourse__duration_seconds', filter=ACTIVE_COURSE), Value(0)),
+        held_seconds=Coalesce(Sum('trainingcourse__duration_seconds',
+                                  filter=ACTIVE_COURSE & Q(trainingcourse__took_place=True)), Value(0)),
+    )
+    return [OrgRollup(**row) for row in rows]
+
+
+def _group_filter(groups):
+    return reduce(or_, (Q(**dict(zip(GROUP_FIELDS, group))) for group in groups))
+
+
+def refresh_rollups(groups=None):
+    """
+    Odświeża tabelę zestawienia.
+
+    :param groups (iterable): Krotki (spółka, zespół, lider, przełożony) grup do przeliczenia;
+                              None przebudowuje całą tabelę.
+
+    return:
+        int: Liczba zapisanych wierszy zestawienia.
+    """
+    with transaction.atomic():
+        if groups is None:
+            OrgRollup.objects.all().delete()
+            rollups = compute_rollups(Employee.objects.all())
+        else:
+            groups = list(set(groups))
+            rollups = []
+            for start in range(0, len(groups), REFRESH_BATCH):
+                batch_filter = _group_filter(groups[start:start + REFRESH_BATCH])
+                OrgRollup.objects.filter(batch_filter).delete()
+                rollups += compute_rollups(Employee.objects.filter(batch_filter))
+        OrgRollup.objects.bulk_create(rollups, batch_size=1000)
+    return len(rollups)
+
+
+def employee_group(employee):
+    return tuple(getattr(employee, field) for field in GROUP_FIELDS)
+
+
+def schedule_refresh(*groups):
+    """
+    Zleca przeliczenie grup po zatwierdzeniu bieżącej transakcji (od razu, jeśli transakcji nie ma).
+    """
+    groups = {group for group in groups if group is not None}
+    if groups:
+        transaction.on_commit(lambda: refresh_rollups(groups))
+
+
+def coach_group(coach_id):
+    """
+    Zwraca grupę organizacyjną trenera lub None, jeśli trener nie istnieje.
+    """
+    if coach_id is None:
+        return None
+    return Employee.objects.filter(pk=coach_id).values_list(*GROUP_FIELDS).first()
+
+
+def level_rows(level):
+    """
+    Zwraca zestawienie na wybranym poziomie (sumy wierszy tabeli OrgRollup), od największej liczby godzin.
+
+    :param level (str): Poziom raportu (klucz LEVELS).
+
+    return:
+        QuerySet: Słowniki z polami grupowania oraz staff (pracownicy), coaches (prowadzący szkolenia),
+                  course_count, total (sekundy) i held (sekundy szkoleń, które się odbyły).
+    """
+    fields = LEVELS[level][1]
+    return OrgRollup.objects.values(*fields).annotate(
+        staff=Sum('employees'),
+        coaches=Sum('active_coaches'),
+        course_count=Sum('courses'),
+        total=Sum('total_seconds'),
+        held=Sum('held_seconds'),
+    ).order_by('-total', *fields)
+
+
+def with_rates(row):
+    """
+    Uzupełnia wiersz zestawienia o godziny i wykorzystanie trenerów (udział pracowników prowadzących szkolenia
+    oraz średnią liczbę godzin na prowadzącego).
+    """
+    row['hours'] = round(row['total'] / 3600, 2)
+    row['held_hours'] = round(row['held'] / 3600, 2)
+    row['utilisation'] = round(row['coaches'] / row['staff'], 4) if row['staff'] else None
+    row['hours_per_coach'] = round(row['hours'] / row['coaches'], 2) if row['coaches'] else None
+    return row
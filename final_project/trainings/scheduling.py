@@ -0,0 +1,367 @@
+"""
+Wykrywanie konfliktów w harmonogramie szkoleń.
+
+Pojedyncze sprawdzenie (formularze) to zapytanie zakresowe korzystające z indeksu
+(coach, start_time, end_time). Przegląd całego harmonogramu (komenda find_conflicts) pobiera
+szkolenia posortowane po trenerze i czasie rozpoczęcia i przechodzi je jednym przebiegiem
+(sort-and-sweep), utrzymując kopiec szkoleń trwających w danej chwili - O(n log n + k),
+gdzie k to liczba znalezionych konfliktów.
+
+Wyszukiwanie wolnych trenerów korzysta z tygodniowych osi czasu: zajętość wszystkich trenerów
+w danym tygodniu (scalone przedziały) jest budowana jednym zapytaniem i trzymana w cache do
+czasu zmiany któregokolwiek szkolenia. Wersja osi czasu zapisywana jest w bazie (trainings.versions),
+więc zmiana szkolenia w jednym procesie serwera unieważnia osie czasu we wszystkich.
+
+Podwójne zapisy uczestników sprawdzane są jednym zapytaniem (wybrane szkolenia z podzapytaniem
+o kolidujący zapis uczestnika, a przy zapisach wielu uczestników - zapisy nachodzące na nowe szkolenia
+z przebiegiem sort-and-sweep), a audyt wszystkich zapisów to wektorowy przebieg w NumPy.
+"""
+import heapq
+from datetime import datetime, timedelta
+from functools import reduce
+from operator import or_
+
+import numpy as np
+
+from django.core.cache import cache
+from django.db.models import OuterRef, Q, Subquery
+from django.utils import timezone
+
+from . import versions
+from .models import ENROLLMENT_ACTIVE, Employee, Enrollment, TrainingCourse
+
+WEEK = timedelta(days=7)
+TIMELINE_CACHE_TIMEOUT = 60 * 60
+TIMELINE_VERSION_KEY = 'coach_timeline:version'
+
+
+def overlapping(queryset, start_time, end_time):
+    """
+    Zawęża szkolenia do tych, które nachodzą na przedział [start_time, end_time).
+
+    Szkolenie kończące się dokładnie w chwili rozpoczęcia drugiego nie jest konfliktem.
+    """
+    return queryset.filter(start_time__lt=end_time, end_time__gt=start_time)
+
+
+def coach_conflicts(coach, start_time, end_time, exclude_pk=None):
+    """
+    Zwraca szkolenia trenera nachodzące na podany przedział czasu.
+
+    :param coach (Employee): Trener.
+    :param start_time (datetime): Początek przedziału.
+    :param end_time (datetime): Koniec przedziału.
+    :param exclude_pk (int | None): ID szkolenia pomijanego (np. edytowanego).
+
+    return:
+        QuerySet: Kolidujące szkolenia posortowane po czasie rozpoczęcia.
+    """
+    courses = overlapping(TrainingCourse.objects.filter(coach=coach), start_time, end_time)
+    if exclude_pk is not None:
+        courses = courses.exclude(pk=exclude_pk)
+    return courses.order_by('start_time')
+
+
+def sweep_conflicts(rows):
+    """
+    Znajduje wszystkie pary nachodzących na siebie przedziałów w obrębie tej samej grupy.
+
+    :param rows (iterable): Krotki (id, grupa, początek, koniec) posortowane po grupie i początku.
+
+    return:
+        generator: Krotki (grupa, id wcześniejszego, id późniejszego) dla każdej kolidującej pary.
+    """
+    current_group = None
+    active = []     # kopiec (koniec, id) przedziałów trwających w chwili początku bieżącego przedziału
+    for pk, group, start, end in rows:
+        if group != current_group:
+            current_group = group
+            active = []
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        for _, other_pk in sorted(active, key=lambda item: item[1]):
+            yield group, other_pk, pk
+        heapq.heappush(active, (end, pk))
+
+
+def find_coach_conflicts(queryset=None):
+    """
+    Przegląda harmonogram i zwraca wszystkie przypadki podwójnej rezerwacji trenera.
+
+    :param queryset (QuerySet | None): Szkolenia do sprawdzenia (domyślnie wszystkie).
+
+    return:
+        generator: Krotki (id trenera, id szkolenia, id kolidującego szkolenia).
+    """
+    if queryset is None:
+        queryset = TrainingCourse.objects.all()
+    rows = queryset.order_by('coach_id', 'start_time', 'pk').values_list(
+        'pk', 'coach_id', 'start_time', 'end_time').iterator(chunk_size=5000)
+    return sweep_conflicts(rows)
+
+
+def merge_intervals(intervals):
+    """
+    Scala nachodzące na siebie lub stykające się przedziały.
+
+    :param intervals (iterable): Pary (początek, koniec).
+
+    return:
+        list: Posortowana lista rozłącznych przedziałów [początek, koniec].
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def week_start(moment):
+    """
+    Zwraca początek tygodnia (poniedziałek, północ czasu lokalnego), w którym wypada podana chwila.
+    """
+    day = timezone.localtime(moment).date()
+    monday = day - timedelta(days=day.weekday())
+    return timezone.make_aware(datetime.combine(monday, datetime.min.time()))
+
+
+def invalidate_coach_timelines():
+    """
+    Unieważnia wszystkie zapisane w cache tygodniowe osie czasu trenerów (we wszystkich procesach).
+    """
+    versions.bump(TIMELINE_VERSION_KEY)
+
+
+def coach_timeline(week, version=None):
+    """
+    Zwraca zajętość trenerów w tygodniu rozpoczynającym się w chwili week.
+
+    Oś czasu budowana jest jednym zapytaniem o szkolenia nachodzące na tydzień i zapisywana w cache.
+
+    :param week (datetime): Początek tygodnia (wynik week_start).
+    :param version (int | None): Wersja osi czasu (domyślnie odczytywana z bazy).
+
+    return:
+        dict: {ID trenera: lista scalonych przedziałów [początek, koniec] jako znaczniki czasu Unix}.
+    """
+    if version is None:
+        version = versions.get_version(TIMELINE_VERSION_KEY)
+    key = f'coach_timeline:{version}:{week:%Y-%m-%d}'
+    timeline = cache.get(key)
+    if timeline is None:
+        week_from, week_to = week.timestamp(), (week + WEEK).timestamp()
+        busy = {}
+        rows = overlapping(TrainingCourse.objects.all(), week, week + WEEK).values_list(
+            'coach_id', 'start_time', 'end_time')
+        for coach_id, start, end in rows:
+            busy.setdefault(coach_id, []).append(
+                (max(start.timestamp(), week_from), min(end.timestamp(), week_to)))
+        timeline = {coach_id: merge_intervals(intervals) for coach_id, intervals in busy.items()}
+        cache.set(key, timeline, TIMELINE_CACHE_TIMEOUT)
+    return timeline
+
+
+def free_coaches(start_time, end_time, duration, limit=None):
+    """
+    Wyszukuje trenerów, którzy mają w podanym przedziale czasu wolne okno o zadanej długości.
+
+    :param start_time (datetime): Początek przedziału.
+    :param end_time (datetime): Koniec przedziału.
+    :param duration (timedelta): Wymagana długość wolnego okna.
+    :param limit (int | None): Maksymalna liczba zwracanych trenerów.
+
+    return:
+        list: Słowniki {'employee', 'load', 'slots'} posortowane rosnąco po obciążeniu trenera
+              (łącznym czasie szkoleń w przedziale); 'slots' to lista wolnych okien (początek, koniec).
+    """
+    window_from, window_to = start_time.timestamp(), end_time.timestamp()
+    needed = duration.total_seconds()
+
+    # Zajętość trenerów w przedziale: scalenie tygodniowych osi czasu przycięte do przedziału
+    busy = {}
+    week = week_start(start_time)
+    version = versions.get_version(TIMELINE_VERSION_KEY)
+    while week < end_time:
+        for coach_id, intervals in coach_timeline(week, version).items():
+            busy.setdefault(coach_id, []).extend(
+                (max(start, window_from), min(end, window_to))
+                for start, end in intervals if start < window_to and end > window_from)
+        week += WEEK
+
+    candidates = []
+    for coach_id in Employee.objects.values_list('pk', flat=True):
+        intervals = merge_intervals(busy.get(coach_id, ()))
+        slots = []
+        cursor = window_from
+        for start, end in intervals + [[window_to, window_to]]:
+            if start - cursor >= needed:
+                slots.append((cursor, start))
+            cursor = max(cursor, end)
+        if slots:
+            load = sum(end - start for start, end in intervals)
+            candidates.append((load, coach_id, slots))
+
+    candidates.sort(key=lambda candidate: (candidate[0], candidate[1]))
+    if limit is not None:
+        candidates = candidates[:limit]
+    employees = Employee.objects.in_bulk([coach_id for _, coach_id, _ in candidates])
+    tz = timezone.get_current_timezone()
+    return [
+        {
+            'employee': employees[coach_id],
+            'load': timedelta(seconds=load),
+            'slots': [(datetime.fromtimestamp(start, tz), datetime.fromtimestamp(end, tz)) for start, end in slots],
+        }
+        for load, coach_id, slots in candidates
+    ]
+
+
+def participant_conflicts(participant, courses):
+    """
+    Sprawdza, czy zapis uczestnika na wybrane szkolenia nie koliduje czasowo z jego dotychczasowymi zapisami
+    ani z innym wybranym szkoleniem.
+
+    Wszystkie wybrane szkolenia sprawdzane są jednym zapytaniem: każde z nich dostaje w podzapytaniu
+    temat pierwszego nachodzącego szkolenia, na które uczestnik jest już zapisany.
+
+    :param participant (Participant | None): Uczestnik (None lub niezapisany obiekt dla nowego uczestnika).
+    :param courses (QuerySet): Wybrane szkolenia.
+
+    return:
+        list: Pary (temat wybranego szkolenia, temat kolidującego szkolenia).
+    """
+    rows = courses.order_by('start_time', 'pk')
+    if participant is not None and participant.pk is not None:
+        enrolled = Enrollment.objects.filter(
+            participant=participant,
+            status=ENROLLMENT_ACTIVE,
+            training_course__deleted_at__isnull=True,
+            training_course__start_time__lt=OuterRef('end_time'),
+            training_course__end_time__gt=OuterRef('start_time'),
+        ).exclude(training_course=OuterRef('pk')).order_by('training_course__start_time')
+        rows = rows.annotate(conflict_topic=Subquery(enrolled.values('training_course__topic')[:1]))
+        rows = list(rows.values_list('pk', 'topic', 'start_time', 'end_time', 'conflict_topic'))
+    else:
+        rows = [row + (None,) for row in rows.values_list('pk', 'topic', 'start_time', 'end_time')]
+
+    conflicts = [(topic, conflict_topic) for _, topic, _, _, conflict_topic in rows if conflict_topic]
+    topics = {pk: topic for pk, topic, _, _, _ in rows}
+    selected = [(pk, None, start, end) for pk, _, start, end, _ in rows]
+    conflicts.extend((topics[second], topics[first]) for _, first, second in sweep_conflicts(selected))
+    return conflicts
+
+
+def course_participant_conflicts(course, participant_ids):
+    """
+    Sprawdza jednym zapytaniem, którzy z podanych uczestników mają aktywny zapis na szkolenie
+    nachodzące na wybrane szkolenie.
+
+    :param course (TrainingCourse): Szkolenie, na które zapisywani są uczestnicy.
+    :param participant_ids (iterable): ID uczestników.
+
+    return:
+        dict: {ID uczestnika: temat kolidującego szkolenia}.
+    """
+    rows = Enrollment.objects.filter(
+        participant_id__in=participant_ids,
+        status=ENROLLMENT_ACTIVE,
+        training_course__deleted_at__isnull=True,
+        training_course__start_time__lt=course.end_time,
+        training_course__end_time__gt=course.start_time,
+    ).exclude(training_course=course)
+    # Przy kilku kolizjach zostaje najwcześniejsze szkolenie (ostatnie w kolejności malejącej)
+    return dict(rows.order_by('-training_course__start_time').values_list('participant_id', 'training_course__topic'))
+
+
+def enrollment_conflicts(pairs, courses, existing=True):
+    """
+    Sprawdza, które z nowych zapisów kolidowałyby czasowo z aktywnymi zapisami uczestnika lub z innymi
+    nowymi zapisami tego samego uczestnika.
+
+    Aktywne zapisy uczestników na szkolenia nachodzące na którekolwiek z nowych szkoleń (suma ich
+    przedziałów czasu) pobierane są jednym zapytaniem, a kolizje wyznacza przebieg sweep_conflicts
+    po zapisach każdego uczestnika - nowych i istniejących razem.
+
+    :param pairs (iterable): Pary (ID uczestnika, ID szkolenia) nowych zapisów.
+    :param courses (dict): Szkolenia nowych zapisów {ID: TrainingCourse}; pary z innymi szkoleniami są pomijane.
+    :param existing (bool): Czy sprawdzać istniejące zapisy (False dla niezapisanych jeszcze uczestników -
+                            ID uczestnika może być wtedy dowolnym kluczem).
+
+    return:
+        list: Krotki (ID uczestnika, szkolenie, temat kolidującego szkolenia), po jednej dla każdej
+              kolidującej pary; przy kolizji dwóch nowych zapisów zgłaszany jest późniejszy.
+    """
+    pairs = {(participant_id, course_id) for participant_id, course_id in pairs if course_id in courses}
+    topics = {course_id: course.topic for course_id, course in courses.items()}
+    rows = [(course_id, participant_id, courses[course_id].start_time, courses[course_id].end_time)
+            for participant_id, course_id in pairs]
+    if existing and pairs:
+        windows = merge_intervals((courses[course_id].start_time, courses[course_id].end_time)
+                                  for course_id in {course_id for _, course_id in pairs})
+        enrolled = Enrollment.objects.filter(
+            reduce(or_, (Q(training_course__start_time__lt=end, training_course__end_time__gt=start)
+                         for start, end in windows)),
+            participant_id__in={participant_id for participant_id, _ in pairs},
+            status=ENROLLMENT_ACTIVE,
+            training_course__deleted_at__isnull=True,
+        ).values_list('participant_id', 'training_course_id', 'training_course__topic',
+                      'training_course__start_time', 'training_course__end_time')
+        for participant_id, course_id, topic, start, end in enrolled:
+            if (participant_id, course_id) not in pairs:
+                rows.append((course_id, participant_id, start, end))
+                topics[course_id] = topic
+
+    conflicts = {}
+    rows.sort(key=lambda row: (row[1], row[2], row[0]))
+    for participant_id, first, second in sweep_conflicts(rows):
+        # Kolizja dwóch istniejących zapisów nie wynika z nowych zapisów i jest pomijana
+        if (participant_id, second) in pairs:
+            conflicts.setdefault((participant_id, second), topics[first])
+        elif (participant_id, first) in pairs:
+            conflicts.setdefault((participant_id, first), topics[second])
+    return [(participant_id, courses[course_id], topic) for (participant_id, course_id), topic in conflicts.items()]
+
+
+def find_participant_double_bookings():
+    """
+    Wyszukuje wszystkie istniejące podwójne zapisy uczestników (aktywne zapisy na nachodzące na siebie szkolenia).
+
+    Zapisy są pobierane posortowane po uczestniku i czasie rozpoczęcia szkolenia, a następnie sprawdzane
+    wektorowo: dla każdego zapisu wyznaczany jest najpóźniejszy koniec wcześniejszych szkoleń tego samego
+    uczestnika (skumulowane maksimum w obrębie grupy); zapis koliduje, jeśli jego szkolenie zaczyna się przed nim.
+    Czasy porównywane są z dokładnością do sekundy.
+
+    return:
+        list: Krotki (ID uczestnika, ID wcześniejszego szkolenia, ID kolidującego szkolenia).
+    """
+    rows = list(Enrollment.objects.filter(status=ENROLLMENT_ACTIVE, training_course__deleted_at__isnull=True).order_by(
+        'participant_id', 'training_course__start_time', 'training_course_id').values_list(
+        'participant_id', 'training_course_id', 'training_course__start_time', 'training_course__end_time'
+    ).iterator(chunk_size=5000))
+    if not rows:
+        return []
+
+    participants = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    courses = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+    starts = np.fromiter((row[2].timestamp() for row in rows), dtype=np.int64, count=len(rows))
+    ends = np.fromiter((row[3].timestamp() for row in rows), dtype=np.int64, count=len(rows))
+
+    # Przesunięcie każdej grupy (uczestnika) o wielokrotność rozpiętości czasu, aby skumulowane maksimum
+    # liczone na całej tablicy nie przenosiło się między uczestnikami
+    new_group = np.empty(len(rows), dtype=bool)
+    new_group[0] = True
+    new_group[1:] = participants[1:] != participants[:-1]
+    base = min(starts.min(), ends.min())
+    offset = np.cumsum(new_group) * (max(starts.max(), ends.max()) - base + 1)
+    shifted_ends = offset + ends - base
+    running_end = np.maximum.accumulate(shifted_ends)
+    # Indeks zapisu, który wyznacza bieżące maksimum
+    holder = np.maximum.accumulate(np.where(shifted_ends == running_end, np.arange(len(rows)), 0))
+
+    conflict = ~new_group
+    conflict[1:] &= offset[1:] + starts[1:] - base < running_end[:-1]
+    indexes = np.flatnonzero(conflict)
+    return list(zip(participants[indexes].tolist(), courses[holder[indexes - 1]].tolist(),
+                    courses[indexes].tolist()))
@@ -0,0 +1,186 @@
+"""
+Wyszukiwanie pełnotekstowe szkoleń, pracowników i uczestników (SQLite FTS5).
+
+Indeks to jedna wirtualna tabela FTS5 z kolumnami 'title' (temat szkolenia, imię i nazwisko osoby)
+i 'details' (e-mail oraz stanowisko, zespół i spółka pracownika). Rodzaj i identyfikator obiektu
+zakodowane są w rowid (id * 4 + rodzaj), dzięki czemu wyzwalacze aktualizują indeks po kluczu
+głównym, a wyniki da się wczytać bez dodatkowej tabeli. Wyzwalacze obejmują także bulk_create
+i zapytania spoza ORM (np. import CSV). Szkolenia i pracownicy oznaczeni jako usunięci (miękkie
+usuwanie) są usuwani z indeksu od razu, przy oznaczeniu.
+"""
+import re
+
+from django.db import connections, transaction
+
+from .models import Employee, Participant, SoftDeleteModel, TrainingCourse
+
+SEARCH_TABLE = 'trainings_search'
+
+KIND_COURSE = 1
+KIND_EMPLOYEE = 2
+KIND_PARTICIPANT = 3
+KIND_MODULUS = 4
+
+SEARCH_KINDS = (
+    ('course', 'Szkolenia'),
+    ('employee', 'Pracownicy'),
+    ('participant', 'Uczestnicy'),
+)
+
+# rodzaj -> (model, kod rodzaju, wyrażenie kolumny 'title', wyrażenie kolumny 'details'); {row} to alias wiersza
+SOURCES = {
+    'course': (TrainingCourse, KIND_COURSE, "{row}.topic", "''"),
+    'employee': (Employee, KIND_EMPLOYEE, "{row}.first_name || ' ' || {row}.last_name",
+                 "{row}.e_mail || ' ' || {row}.position || ' ' || {row}.team || ' ' || {row}.company"),
+    'participant': (Participant, KIND_PARTICIPANT, "{row}.first_name || ' ' || {row}.last_name", "{row}.e_mail"),
+}
+
+# Waga kolumn w rankingu bm25: trafienie w tytule liczy się bardziej niż w szczegółach
+TITLE_WEIGHT = 10.0
+DETAILS_WEIGHT = 1.0
+
+
+def _rowid(kind_code, row):
+    return f"{row}.id * {KIND_MODULUS} + {kind_code}"
+
+
+def _indexed(model, row):
+    # Warunek SQL (lub None) wiersza, który powinien być w indeksie
+    return f"{row}.deleted_at IS NULL" if issubclass(model, SoftDeleteModel) else None
+
+
+def search_index_sql():
+    """
+    Zwraca instrukcje SQL tworzące indeks (jeśli nie istnieje) i wyzwalacze, które go aktualizują.
+    """
+    yield (f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+           f"title, details, tokenize='unicode61 remove_diacritics 2', prefix='2 3')")
+    for kind, (model, code, title, details) in SOURCES.items():
+        table = model._meta.db_table
+        condition = _indexed(model, 'new')
+        insert = (f"INSERT INTO {SEARCH_TABLE}(rowid, title, details) "
+                  f"SELECT {_rowid(code, 'new')}, {title.format(row='new')}, {details.format(row='new')}"
+                  f"{f' WHERE {condition}' if condition else ''};")
+        delete = f"DELETE FROM {SEARCH_TABLE} WHERE rowid = {_rowid(code, 'old')};"
+        yield (f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_{kind}_insert AFTER INSERT ON {table} "
+               f"BEGIN {insert} END")
+        yield (f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_{kind}_update AFTER UPDATE ON {table} "
+               f"BEGIN {delete} {insert} END")
+        yield (f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_{kind}_delete AFTER DELETE ON {table} "
+               f"BEGIN {delete} END")
+
+
+def install_search_index(using='default'):
+    """
+    Tworzy indeks i wyzwalacze, jeśli ich brakuje (np. po przebudowie tabeli przez migrację),
+    a nowo utworzony indeks wypełnia danymi.
+
+    :param using (str): Alias bazy danych.
+
+    return:
+        bool: True, jeśli indeks został utworzony od nowa.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        created = SEARCH_TABLE not in connection.introspection.table_names(cursor)
+        for sql in search_index_sql():
+            cursor.execute(sql)
+    if created:
+        rebuild_search_index(using)
+    return created
+
+
+def rebuild_search_index(using='default'):
+    """
+    Odbudowuje cały indeks hurtowo (INSERT ... SELECT dla każdej tabeli) i optymalizuje go.
+
+    :param using (str): Alias bazy danych.
+
+    return:
+        dict: Liczba zaindeksowanych obiektów każdego rodzaju.
+    """
+    counts = {}
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        for kind, (model, code, title, details) in SOURCES.items():
+            condition = _indexed(model, 'src')
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE}(rowid, title, details) "
+                f"SELECT {_rowid(code, 'src')}, {title.format(row='src')}, {details.format(row='src')} "
+                f"FROM {model._meta.db_table} AS src{f' WHERE {condition}' if condition else ''}")
+            counts[kind] = cursor.rowcount
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')")
+    return counts
+
+
+def match_expression(text):
+    """
+    Zamienia tekst wpisany przez użytkownika na zapytanie FTS5: każde słowo jest dopasowywane jako prefiks,
+    a wszystkie słowa muszą wystąpić (np. 'jan kow' -> '"jan"* "kow"*').
+
+    return:
+        str | None: Zapytanie MATCH lub None, jeśli tekst nie zawiera żadnego słowa.
+    """
+    words = re.findall(r'\w+', text)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+class SearchResults:
+    """
+    Wyniki wyszukiwania posortowane według trafności (bm25), wczytywane porcjami.
+
+    Obsługuje count() i wycinki, więc może być przekazana do django.core.paginator.Paginator.
+    Elementy wyników to słowniki {'kind': rodzaj, 'object': obiekt modelu}.
+    """
+    def __init__(self, text, kinds=None, using='default'):
+        self.using = using
+        self.match = match_expression(text)
+        codes = [SOURCES[kind][1] for kind in (kinds or SOURCES)]
+        self.where = f"{SEARCH_TABLE} MATCH %s"
+        if len(codes) < len(SOURCES):
+            self.where += f" AND rowid %% {KIND_MODULUS} IN ({', '.join(str(code) for code in codes)})"
+        self._count = None
+
+    def count(self):
+        if self.match is None:
+            return 0
+        if self._count is None:
+            with connections[self.using].cursor() as cursor:
+                cursor.execute(f"SELECT count(*) FROM {SEARCH_TABLE} WHERE {self.where}", [self.match])
+                self._count = cursor.fetchone()[0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice) or index.step is not None:
+            raise TypeError("SearchResults obsługuje tylko wycinki bez kroku.")
+        if self.match is None:
+            return []
+        offset = index.start or 0
+        limit = (index.stop - offset) if index.stop is not None else -1
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {SEARCH_TABLE} WHERE {self.where} "
+                f"ORDER BY bm25({SEARCH_TABLE}, {TITLE_WEIGHT}, {DETAILS_WEIGHT}) LIMIT %s OFFSET %s",
+                [self.match, limit, offset])
+            rowids = [row[0] for row in cursor.fetchall()]
+
+        # Jedno zapytanie na rodzaj obiektu, kolejność wyników zgodna z rankingiem
+        kinds = {code: kind for kind, (_, code, _, _) in SOURCES.items()}
+        ids = {}
+        for rowid in rowids:
+            ids.setdefault(rowid % KIND_MODULUS, []).append(rowid // KIND_MODULUS)
+        objects = {code: SOURCES[kinds[code]][0].objects.using(self.using).in_bulk(pks)
+                   for code, pks in ids.items()}
+        results = []
+        for rowid in rowids:
+            obj = objects[rowid % KIND_MODULUS].get(rowid // KIND_MODULUS)
+            if obj is not None:
+                results.append({'kind': kinds[rowid % KIND_MODULUS], 'object': obj})
+        return results
@@ -0,0 +1,159 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_out
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_save
+from django.dispatch import receiver
+
+from . import snapshots
+from .analytics import invalidate_attendance_stats
+from .models import Employee, Enrollment, Participant, TrainingCourse
+from .rollups import GROUP_FIELDS, coach_group, employee_group, schedule_refresh
+from .scheduling import invalidate_coach_timelines
+from .search import install_search_index
+from .user_cache import forget_user
+
+
+def apply_sqlite_pragmas(cursor, pragmas):
+    """
+    Ustawia pragmy SQLite na podanym kursorze.
+
+    :param cursor: Kursor połączenia z bazą SQLite (kursor Django lub sqlite3).
+    :param pragmas (dict): Słownik {nazwa pragmy: wartość}, np. {'journal_mode': 'WAL'}.
+    """
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """
+    Nakłada pragmy z settings.SQLITE_PRAGMAS na każde nowe połączenie z bazą SQLite.
+
+    :param sender: Klasa wrappera bazy danych.
+    :param connection: Nowo utworzone połączenie (DatabaseWrapper).
+    """
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', None)
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+    with connection.cursor() as cursor:
+        apply_sqlite_pragmas(cursor, pragmas)
+
+
+@receiver(post_save, sender=TrainingCourse)
+@receiver(post_delete, sender=TrainingCourse)
+def reset_coach_timelines(sender, **kwargs):
+    """
+    Po zmianie harmonogramu unieważnia zapisane w cache tygodniowe osie czasu trenerów.
+    """
+    invalidate_coach_timelines()
+
+
+@receiver(post_migrate)
+def ensure_search_index(sender, using, **kwargs):
+    """
+    Po migracjach tworzy indeks wyszukiwania pełnotekstowego i odtwarza jego wyzwalacze
+    (SQLite usuwa je, gdy migracja przebudowuje tabelę).
+    """
+    if sender.name != 'trainings':
+        return
+    # Po cofnięciu migracji (np. migrate trainings 0003) wyzwalacze dla bieżących modeli odwoływałyby się
+    # do nieistniejących kolumn i blokowały przebudowę tabel przy ponownym migrowaniu
+    executor = MigrationExecutor(connections[using])
+    if executor.migration_plan(executor.loader.graph.leaf_nodes(sender.label)):
+        return
+    install_search_index(using)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_changed_user(sender, instance, **kwargs):
+    """
+    Usuwa użytkownika z pamięci podręcznej po zmianie jego danych (np. hasła) lub usunięciu konta.
+    """
+    forget_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def forget_logged_out_user(sender, request, user, **kwargs):
+    if user is not None:
+        forget_user(user.pk)
+
+
+@receiver(post_save, sender=TrainingCourse)
+@receiver(post_delete, sender=TrainingCourse)
+def refresh_course_snapshots(sender, instance, **kwargs):
+    """
+    Oznacza jako nieaktualne migawki listy szkoleń, uczestników szkolenia i szkoleń pracowników
+    (wszystkich, bo trener szkolenia mógł się zmienić).
+    """
+    snapshots.mark_changed('courses_list')
+    snapshots.mark_changed('employee_courses')
+    snapshots.mark_changed('course_participants', instance.pk)
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def refresh_enrollment_snapshots(sender, instance, **kwargs):
+    snapshots.mark_changed('course_participants', instance.training_course_id)
+
+
+@receiver(post_save, sender=Participant)
+@receiver(post_delete, sender=Participant)
+def refresh_participant_snapshots(sender, instance, **kwargs):
+    snapshots.mark_changed('course_participants')
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def refresh_employee_snapshots(sender, instance, **kwargs):
+    snapshots.mark_changed('employee_courses', instance.pk)
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+@receiver(post_save, sender=TrainingCourse)
+@receiver(post_delete, sender=TrainingCourse)
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def reset_attendance_stats(sender, **kwargs):
+    """
+    Unieważnia zapisane w cache raporty frekwencji po zmianie zapisów, szkoleń lub trenerów.
+    """
+    invalidate_attendance_stats()
+
+
+@receiver(pre_save, sender=Employee)
+def remember_employee_group(sender, instance, **kwargs):
+    # Grupa organizacyjna przed zmianą - jej zestawienie też trzeba przeliczyć
+    if instance.pk is not None:
+        instance._org_group = Employee.objects.filter(pk=instance.pk).values_list(*GROUP_FIELDS).first()
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def refresh_employee_rollups(sender, instance, **kwargs):
+    """
+    Przelicza zestawienie organizacyjne dla grupy pracownika (przed zmianą i po niej).
+    """
+    schedule_refresh(getattr(instance, '_org_group', None), employee_group(instance))
+
+
+@receiver(pre_save, sender=TrainingCourse)
+def remember_course_coach(sender, instance, **kwargs):
+    if instance.pk is not None:
+        instance._previous_coach_id = TrainingCourse.objects.filter(pk=instance.pk).values_list(
+            'coach_id', flat=True).first()
+
+
+@receiver(post_save, sender=TrainingCourse)
+@receiver(post_delete, sender=TrainingCourse)
+def refresh_course_rollups(sender, instance, **kwargs):
+    """
+    Przelicza zestawienie organizacyjne dla grupy trenera szkolenia (także poprzedniego trenera).
+    """
+    previous_coach_id = getattr(instance, '_previous_coach_id', None)
+    previous = coach_group(previous_coach_id) if previous_coach_id != instance.coach_id else None
+    schedule_refresh(previous, coach_group(instance.coach_id))
@@ -0,0 +1,278 @@
+"""
+Statyczne migawki (snapshoty) rzadko zmieniających się stron: listy szkoleń, szkoleń pracownika
+i uczestników szkolenia.
+
+Migawka to wynik widoku zapisany do pliku HTML w settings.SNAPSHOT_ROOT. Zmiana danych
+(sygnały modeli) oznacza migawki jako nieaktualne i zleca ich ponowne wygenerowanie w wątku
+w tle po settings.SNAPSHOT_DEBOUNCE sekundach - kolejne zmiany w tym czasie są łączone w jedną
+publikację. Dopóki migawka jest nieaktualna lub jej brak, widok renderuje stronę na bieżąco
+(i zleca utworzenie migawki).
+
+Znaczniki zmian przechowywane są w bazie (trainings.versions), więc migawka oznaczona jako
+nieaktualna w jednym procesie serwera nie jest już serwowana przez żaden inny. Token CSRF
+formularzy jest w pliku zastępowany znacznikiem i wstawiany przy każdym wyświetleniu.
+"""
+import asyncio
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import Http404, HttpResponse
+from django.middleware.csrf import get_token
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from . import versions
+
+logger = logging.getLogger(__name__)
+
+# Strony publikowane jako migawki: nazwa -> nazwa adresu URL (klucz migawki to argument pk lub None)
+PAGES = {
+    'courses_list': 'courses_list',
+    'employee_courses': 'employee_courses',
+    'course_participants': 'course_participants',
+}
+
+CSRF_PLACEHOLDER = '__SNAPSHOT_CSRF_TOKEN__'
+csrf_input_re = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+version_re = re.compile(r'^<!-- snapshot-version: (\d+) -->\n')
+
+
+def enabled():
+    return getattr(settings, 'SNAPSHOTS_ENABLED', False)
+
+
+def snapshot_path(page, key=None):
+    name = f'{page}.html' if key is None else os.path.join(page, f'{key}.html')
+    return os.path.join(settings.SNAPSHOT_ROOT, name)
+
+
+def _changed_key(page, key=None):
+    return f'snapshot:changed:{page}' if key is None else f'snapshot:changed:{page}:{key}'
+
+
+class SnapshotUser:
+    """
+    Użytkownik, w imieniu którego renderowane są migawki (strony są takie same dla wszystkich zalogowanych).
+    """
+    is_authenticated = True
+    is_anonymous = False
+    is_active = True
+    pk = None
+    username = ''
+
+
+def render_page(page, key=None):
+    """
+    Renderuje stronę przez jej widok, tak jak dla zalogowanego użytkownika.
+
+    return:
+        str: Treść HTML ze znacznikiem w miejscu tokenu CSRF.
+    """
+    url = reverse(PAGES[page], kwargs={'pk': key} if key is not None else None)
+    request = RequestFactory().get(url)
+    request.user = SnapshotUser()
+
+    async def auser():
+        return request.user
+
+    request.auser = auser
+    request.snapshot_render = True
+    match = resolve(url)
+
+    async def call_view():
+        response = match.func(request, *match.args, **match.kwargs)
+        return await response if asyncio.iscoroutine(response) else response
+
+    response = async_to_sync(call_view)()
+    if response.status_code != 200:
+        raise ValueError(f"Widok {url} zwrócił status {response.status_code}.")
+    return csrf_input_re.sub(rf'\g<1>{CSRF_PLACEHOLDER}\g<2>', response.content.decode())
+
+
+def publish(page, key=None):
+    """
+    Generuje migawkę strony i zapisuje ją atomowo (plik tymczasowy + os.replace).
+
+    return:
+        str | None: Ścieżka zapisanego pliku lub None, jeśli obiekt już nie istnieje.
+    """
+    version = time.time_ns()
+    try:
+        html = render_page(page, key)
+    except (Http404, ValueError):
+        # np. usunięte szkolenie - nieaktualną migawkę trzeba usunąć
+        remove(page, key)
+        return None
+
+    path = snapshot_path(page, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as tmp:
+        tmp.write(f'<!-- snapshot-version: {version} -->\n')
+        tmp.write(html)
+    os.replace(tmp_path, path)
+    return path
+
+
+def remove(page, key=None):
+    try:
+        os.remove(snapshot_path(page, key))
+    except FileNotFoundError:
+        pass
+
+
+def read_snapshot(page, key=None):
+    """
+    Zwraca treść aktualnej migawki lub None, jeśli jej brak albo dane zmieniły się po jej wygenerowaniu.
+    """
+    try:
+        with open(snapshot_path(page, key), encoding='utf-8') as f:
+            content = f.read()
+    except FileNotFoundError:
+        return None
+    match = version_re.match(content)
+    if match is None:
+        return None
+    changed = versions.get_versions([_changed_key(page), _changed_key(page, key)])
+    if int(match.group(1)) < max(changed.values(), default=0):
+        return None
+    return content[match.end():]
+
+
+def serve_snapshot(request, page, key=None):
+    """
+    Zwraca odpowiedź z aktualnej migawki strony lub None (wtedy widok renderuje stronę na bieżąco).
+
+    :param request: Obiekt żądania HTTP.
+    :param page (str): Nazwa strony (klucz PAGES).
+    :param key: Klucz migawki (ID obiektu) lub None.
+
+    return:
+        HttpResponse | None: Odpowiedź z treścią migawki.
+    """
+    if not enabled() or getattr(request, 'snapshot_render', False):
+        return None
+    content = read_snapshot(page, key)
+    if content is None:
+        return None
+    return HttpResponse(content.replace(CSRF_PLACEHOLDER, get_token(request)))
+
+
+def schedule_missing(request, page, key=None):
+    """
+    Zleca wygenerowanie brakującej lub nieaktualnej migawki po wyrenderowaniu strony na bieżąco
+    (wywoływane dopiero po sprawdzeniu, że obiekt istnieje).
+    """
+    if enabled() and not getattr(request, 'snapshot_render', False):
+        publisher.schedule(page, key)
+
+
+def mark_changed(page, key=None):
+    """
+    Oznacza migawki strony jako nieaktualne i zleca ich ponowne wygenerowanie.
+
+    :param page (str): Nazwa strony.
+    :param key: ID obiektu; None oznacza wszystkie migawki strony.
+    """
+    if not enabled():
+        return
+    versions.bump(_changed_key(page, key))
+    if key is not None:
+        publisher.schedule(page, key)
+        return
+    if page == 'courses_list':
+        publisher.schedule(page)
+        return
+    # Ponownie generowane są tylko istniejące migawki; pozostałe powstaną przy pierwszym wyświetleniu
+    directory = os.path.dirname(snapshot_path(page, 0))
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if name.endswith('.html'):
+                publisher.schedule(page, int(name[:-len('.html')]))
+
+
+class SnapshotPublisher:
+    """
+    Publikuje zlecone migawki w wątku w tle, łącząc zlecenia z okna settings.SNAPSHOT_DEBOUNCE sekund.
+    """
+    def __init__(self):
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.timer = None
+
+    def schedule(self, page, key=None):
+        with self.lock:
+            self.pending.add((page, key))
+            if self.timer is None:
+                self.timer = threading.Timer(settings.SNAPSHOT_DEBOUNCE, self._run)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def cancel(self):
+        """
+        Anuluje zaplanowaną publikację i porzuca zlecone migawki.
+        """
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+            self.timer = None
+            self.pending.clear()
+
+    def _run(self):
+        with self.lock:
+            self.timer = None
+        try:
+            self.flush()
+        finally:
+            close_old_connections()
+
+    def flush(self):
+        """
+        Publikuje wszystkie zlecone migawki (synchronicznie, w bieżącym wątku).
+
+        return:
+            int: Liczba opublikowanych migawek.
+        """
+        with self.lock:
+            pending, self.pending = self.pending, set()
+        published = 0
+        for page, key in sorted(pending, key=lambda item: (item[0], item[1] or 0)):
+            try:
+                if publish(page, key):
+                    published += 1
+            except Exception:
+                logger.exception("Nie udało się wygenerować migawki %s (%s).", page, key)
+        return published
+
+
+publisher = SnapshotPublisher()
+
+
+def publish_all(pages=None):
+    """
+    Generuje migawki wszystkich obiektów podanych stron (np. po imporcie danych lub zmianach wykonanych
+    poza ORM, które nie wywołują sygnałów).
+
+    :param pages (list): Nazwy stron (domyślnie wszystkie).
+
+    return:
+        dict: Liczba opublikowanych migawek każdej strony.
+    """
+    from .models import Employee, TrainingCourse
+
+    keys = {
+        'courses_list': lambda: [None],
+        'employee_courses': lambda: Employee.objects.values_list('pk', flat=True),
+        'course_participants': lambda: TrainingCourse.objects.values_list('pk', flat=True),
+    }
+    counts = {}
+    for page in pages or PAGES:
+        counts[page] = sum(1 for key in list(keys[page]()) if publish(page, key))
+    return counts
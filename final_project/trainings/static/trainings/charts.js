@@ -0,0 +1,76 @@
+/*
+ * Rysuje wykresy słupkowe (SVG) z danych JSON zwracanych przez widok chart_data.
+ *
+ * Użycie w szablonie: <div class="chart" data-chart-url="{% url 'chart_data' chart='coach_hours' %}"></div>
+ * Dane wykresu: {"title": ..., "unit": ..., "labels": [...], "values": [...]}; wartość null to brak danych.
+ */
+(function () {
+    'use strict';
+
+    var SVG_NS = 'http://www.w3.org/2000/svg';
+    var BAR_WIDTH = 36;
+    var GAP = 12;
+    var HEIGHT = 240;
+    var MARGIN = {top: 20, right: 10, bottom: 90, left: 50};
+
+    function element(name, attributes, text) {
+        var node = document.createElementNS(SVG_NS, name);
+        Object.keys(attributes).forEach(function (key) {
+            node.setAttribute(key, attributes[key]);
+        });
+        if (text !== undefined) {
+            node.textContent = text;
+        }
+        return node;
+    }
+
+    function draw(container, chart) {
+        var values = chart.values.map(function (value) { return value === null ? 0 : value; });
+        var max = Math.max.apply(null, values.concat([0])) || 1;
+        var width = MARGIN.left + MARGIN.right + chart.labels.length * (BAR_WIDTH + GAP);
+        var svg = element('svg', {
+            width: width, height: HEIGHT + MARGIN.top + MARGIN.bottom, role: 'img', 'aria-label': chart.title
+        });
+
+        svg.appendChild(element('line', {
+            x1: MARGIN.left, y1: MARGIN.top + HEIGHT, x2: width - MARGIN.right, y2: MARGIN.top + HEIGHT, stroke: 'black'
+        }));
+        svg.appendChild(element('text', {x: 0, y: MARGIN.top + 4, 'font-size': 11}, max + ' ' + chart.unit));
+
+        chart.labels.forEach(function (label, i) {
+            var x = MARGIN.left + GAP / 2 + i * (BAR_WIDTH + GAP);
+            var barHeight = Math.round(values[i] / max * HEIGHT);
+            var bar = element('rect', {
+                x: x, y: MARGIN.top + HEIGHT - barHeight, width: BAR_WIDTH, height: barHeight, fill: 'blue'
+            });
+            bar.appendChild(element('title', {}, label + ': ' + (chart.values[i] === null ? '-' : chart.values[i] + ' ' + chart.unit)));
+            svg.appendChild(bar);
+            var labelX = x + BAR_WIDTH / 2;
+            var labelY = MARGIN.top + HEIGHT + 12;
+            svg.appendChild(element('text', {
+                x: labelX, y: labelY, 'font-size': 11, 'text-anchor': 'end',
+                transform: 'rotate(-45 ' + labelX + ' ' + labelY + ')'
+            }, label));
+        });
+
+        var heading = document.createElement('h3');
+        heading.textContent = chart.title;
+        container.replaceChildren(heading, svg);
+    }
+
+    function load(container) {
+        fetch(container.dataset.chartUrl, {credentials: 'same-origin'})
+            .then(function (response) {
+                if (!response.ok) {
+                    throw new Error(response.status);
+                }
+                return response.json();
+            })
+            .then(function (chart) { draw(container, chart); })
+            .catch(function () { container.textContent = 'Nie udało się wczytać wykresu.'; });
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        document.querySelectorAll('.chart[data-chart-url]').forEach(load);
+    });
+}());
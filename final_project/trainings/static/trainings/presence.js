@@ -0,0 +1,145 @@
+/*
+ * Lista obecności działająca bez dostępu do sieci (szablon course_presence_list.html).
+ *
+ * Każda zmiana pola wyboru trafia do kolejki w localStorage (uczestnik, obecność, czas zmiany na urządzeniu).
+ * Kolejka jest wysyłana jedną porcją do widoku presence_sync po SYNC_DELAY ms od ostatniej zmiany, po powrocie
+ * połączenia i przy otwarciu strony. Wysyłana porcja ma klucz idempotencji i jest zapisywana w localStorage
+ * do czasu odpowiedzi - ponowienie (także po zamknięciu strony) wysyła ją z tym samym kluczem.
+ * Service worker (presence_sw.js) przechowuje stronę, aby otwierała się bez sieci.
+ */
+(function () {
+    'use strict';
+
+    var SYNC_DELAY = 1000;
+    var RETRY_DELAY = 10000;
+
+    var form = document.getElementById('presence-form');
+    if (!form || !window.fetch || !window.localStorage) {
+        return;
+    }
+    var status = document.getElementById('presence-status');
+    var csrfToken = form.querySelector('input[name="csrfmiddlewaretoken"]').value;
+    var queueKey = 'presence-queue:' + form.dataset.course;
+    var inflightKey = 'presence-inflight:' + form.dataset.course;
+    var timer = null;
+    var sending = false;
+
+    function load(name, fallback) {
+        try {
+            return JSON.parse(localStorage.getItem(name)) || fallback;
+        } catch (e) {
+            return fallback;
+        }
+    }
+
+    function save(name, value) {
+        localStorage.setItem(name, JSON.stringify(value));
+    }
+
+    function pendingChanges() {
+        var inflight = load(inflightKey, null);
+        return load(queueKey, []).concat(inflight ? inflight.changes : []);
+    }
+
+    function show(message) {
+        var pending = pendingChanges().length;
+        status.textContent = message || (pending ? 'Niewysłane zmiany: ' + pending : 'Wszystkie zmiany zapisane.');
+    }
+
+    function newKey() {
+        if (window.crypto && crypto.randomUUID) {
+            return crypto.randomUUID();
+        }
+        return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2);
+    }
+
+    function schedule(delay) {
+        clearTimeout(timer);
+        timer = setTimeout(sync, delay);
+    }
+
+    function sync() {
+        if (sending) {
+            return;
+        }
+        var inflight = load(inflightKey, null);
+        if (!inflight) {
+            var queue = load(queueKey, []);
+            if (!queue.length) {
+                show();
+                return;
+            }
+            inflight = {key: newKey(), changes: queue};
+            save(inflightKey, inflight);
+            localStorage.removeItem(queueKey);
+        }
+        sending = true;
+        fetch(form.dataset.syncUrl, {
+            method: 'POST',
+            credentials: 'same-origin',
+            headers: {'Content-Type': 'application/json', 'X-CSRFToken': csrfToken},
+            body: JSON.stringify(inflight)
+        }).then(function (response) {
+            if (response.redirected || response.status === 403) {
+                throw new Error('Sesja wygasła - zaloguj się ponownie, aby wysłać zmiany.');
+            }
+            if (response.status === 400) {
+                // Porcja odrzucona przez serwer nie zostanie przyjęta także po ponowieniu
+                localStorage.removeItem(inflightKey);
+                return response.json().then(function (result) {
+                    throw new Error('Zmiany odrzucone: ' + result.error);
+                });
+            }
+            if (!response.ok) {
+                throw new Error('Błąd serwera - zmiany zostaną wysłane ponownie.');
+            }
+            return response.json();
+        }).then(function () {
+            localStorage.removeItem(inflightKey);
+            sending = false;
+            if (load(queueKey, []).length) {
+                schedule(0);
+            } else {
+                show();
+            }
+        }, function (error) {
+            sending = false;
+            show(error instanceof TypeError ? 'Brak połączenia - niewysłane zmiany: ' + pendingChanges().length
+                                            : error.message);
+            schedule(RETRY_DELAY);
+        });
+    }
+
+    // Strona z pamięci podręcznej (bez sieci) pokazuje stan z chwili pobrania - nakładane są niewysłane zmiany
+    pendingChanges().sort(function (a, b) { return a.at - b.at; }).forEach(function (change) {
+        var checkbox = form.querySelector('input[type="checkbox"][name="' + change.participant + '"]');
+        if (checkbox) {
+            checkbox.checked = change.present === true;
+        }
+    });
+
+    form.addEventListener('change', function (event) {
+        var checkbox = event.target;
+        if (checkbox.type !== 'checkbox') {
+            return;
+        }
+        var queue = load(queueKey, []);
+        queue.push({participant: parseInt(checkbox.name, 10), present: checkbox.checked, at: Date.now()});
+        save(queueKey, queue);
+        show();
+        schedule(SYNC_DELAY);
+    });
+    form.addEventListener('submit', function (event) {
+        event.preventDefault();
+        schedule(0);
+    });
+    window.addEventListener('online', function () {
+        schedule(0);
+    });
+
+    form.querySelector('button[type="submit"]').textContent = 'Wyślij zmiany teraz';
+    if ('serviceWorker' in navigator) {
+        navigator.serviceWorker.register(form.dataset.serviceWorker);
+    }
+    sync();
+}());
@@ -0,0 +1,104 @@
+/*
+ * Stanowisko skanowania kodów QR uczestników (szablon course_scanner.html).
+ *
+ * Czytnik kodów działający jak klawiatura wpisuje token do pola formularza i zatwierdza go klawiszem Enter.
+ * Zeskanowane tokeny trafiają do kolejki wysyłanej porcjami (po BATCH_SIZE tokenów lub po FLUSH_DELAY ms
+ * od pierwszego skanu) do widoku checkin; w razie błędu sieci porcja wraca do kolejki i jest ponawiana.
+ */
+(function () {
+    'use strict';
+
+    var BATCH_SIZE = 50;
+    var FLUSH_DELAY = 300;
+    var RETRY_DELAY = 2000;
+
+    var form = document.getElementById('scanner');
+    if (!form) {
+        return;
+    }
+    var input = form.querySelector('input[name="token"]');
+    var log = document.getElementById('scanner-log');
+    var counter = document.getElementById('scanner-present');
+    var participants = JSON.parse(document.getElementById('scanner-participants').textContent);
+    var queue = [];
+    var timer = null;
+    var sending = false;
+    var present = 0;
+
+    function message(text) {
+        var item = document.createElement('li');
+        item.textContent = text;
+        log.insertBefore(item, log.firstChild);
+    }
+
+    function report(ids, text) {
+        ids.forEach(function (id) {
+            message((participants[id] || 'Uczestnik ' + id) + ': ' + text);
+        });
+    }
+
+    function schedule(delay) {
+        if (timer === null) {
+            timer = setTimeout(flush, delay);
+        }
+    }
+
+    function flush() {
+        timer = null;
+        if (sending || queue.length === 0) {
+            return;
+        }
+        var batch = queue.splice(0, BATCH_SIZE);
+        sending = true;
+        fetch(form.dataset.checkinUrl, {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({key: form.dataset.scannerKey, tokens: batch})
+        }).then(function (response) {
+            return response.json().then(function (result) {
+                if (!response.ok) {
+                    throw new Error(result.error);
+                }
+                return result;
+            });
+        }).then(function (result) {
+            present += result.present.length;
+            counter.textContent = present;
+            report(result.present, 'obecny');
+            report(result.already, 'obecność zarejestrowana wcześniej');
+            report(result.unknown, 'nie jest zapisany na to szkolenie');
+            if (result.invalid) {
+                message('Nieprawidłowe kody: ' + result.invalid);
+            }
+        }).catch(function (error) {
+            if (error instanceof TypeError) {
+                // Błąd sieci - porcja wraca na początek kolejki
+                queue = batch.concat(queue);
+                return new Promise(function (resolve) { setTimeout(resolve, RETRY_DELAY); });
+            }
+            message(error.message);
+        }).then(function () {
+            sending = false;
+            if (queue.length) {
+                schedule(0);
+            }
+        });
+    }
+
+    form.addEventListener('submit', function (event) {
+        event.preventDefault();
+        var token = input.value.trim();
+        input.value = '';
+        if (token) {
+            queue.push(token);
+            if (queue.length >= BATCH_SIZE) {
+                clearTimeout(timer);
+                timer = null;
+                flush();
+            } else {
+                schedule(FLUSH_DELAY);
+            }
+        }
+    });
+    input.focus();
+}());
@@ -0,0 +1,43 @@
+"""
+Magazyn plików statycznych: nazwy z hashem treści (manifest) oraz wstępnie skompresowane kopie
+plików tekstowych (.gz i .br) tworzone podczas collectstatic.
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+from .middleware import brotli
+
+COMPRESS_EXTENSIONS = ('.css', '.js', '.mjs', '.map', '.svg', '.json', '.txt', '.html')
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage, który po nadaniu nazw z hashem zapisuje obok plików tekstowych
+    ich wersje skompresowane gzip (poziom 9) i Brotli (jakość 11), o ile są mniejsze od oryginału.
+    """
+    def post_process(self, paths, dry_run=False, **options):
+        compress = []
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            yield name, hashed_name, processed
+            if not isinstance(processed, Exception) and name.endswith(COMPRESS_EXTENSIONS):
+                compress.extend((name, hashed_name))
+        if not dry_run:
+            for name in dict.fromkeys(compress):
+                self.compress_file(name)
+
+    def compress_file(self, name):
+        """
+        Zapisuje skompresowane kopie pliku jako name.gz i name.br.
+
+        :param name (str): Nazwa pliku w magazynie.
+        """
+        with self.open(name) as source:
+            content = source.read()
+        variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants['.br'] = brotli.compress(content, quality=11)
+        for suffix, compressed in variants.items():
+            if len(compressed) < len(content):
+                with open(self.path(name + suffix), 'wb') as target:
+                    target.write(compressed)
@@ -0,0 +1,53 @@
+{% load static %}/*
+ * Service worker listy obecności (trainings.views.PresenceServiceWorkerView).
+ *
+ * Strony list obecności i skrypt presence.js są pobierane najpierw z sieci, a bez sieci - z pamięci
+ * podręcznej, więc prowadzący może otworzyć listę i zaznaczać obecność bez połączenia. Zmiany czekają
+ * w localStorage przeglądarki i są wysyłane przez presence.js, gdy połączenie wróci.
+ */
+'use strict';
+
+var CACHE = 'presence-v1';
+var ASSETS = ['{% static "trainings/presence.js" %}'];
+var PRESENCE_PAGE = /\/courses\/\d+\/presence_list\/$/;
+
+self.addEventListener('install', function (event) {
+    event.waitUntil(caches.open(CACHE).then(function (cache) {
+        return cache.addAll(ASSETS);
+    }).then(function () {
+        return self.skipWaiting();
+    }));
+});
+
+self.addEventListener('activate', function (event) {
+    event.waitUntil(caches.keys().then(function (names) {
+        return Promise.all(names.filter(function (name) {
+            return name.indexOf('presence-') === 0 && name !== CACHE;
+        }).map(function (name) {
+            return caches.delete(name);
+        }));
+    }).then(function () {
+        return self.clients.claim();
+    }));
+});
+
+self.addEventListener('fetch', function (event) {
+    var url = new URL(event.request.url);
+    if (event.request.method !== 'GET' || url.origin !== self.location.origin
+            || !(PRESENCE_PAGE.test(url.pathname) || ASSETS.indexOf(url.pathname) !== -1)) {
+        return;
+    }
+    event.respondWith(fetch(event.request).then(function (response) {
+        if (response.ok && !response.redirected) {
+            var copy = response.clone();
+            caches.open(CACHE).then(function (cache) {
+                cache.put(event.request, copy);
+            });
+        }
+        return response;
+    }).catch(function () {
+        return caches.match(event.request).then(function (cached) {
+            return cached || Response.error();
+        });
+    }));
+});
@@ -1,14 +1,61 @@
+import csv
+import gzip
+import io
+import json
+import os
+import runpy
+import sqlite3
+import threading
+import zipfile
+
+import numpy as np
 import pytest
 
+from asgiref.sync import async_to_sync
 from datetime import timedelta
 
 from django.contrib.auth.models import User
+from django.db import connection
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ValidationError
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.core.management import CommandError, call_command
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.templatetags.static import static
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
-from django.test import Client
-
-from .forms import AddParticipantForm
-from .models import Employee, TrainingCourse, Participant, PresenceList
+from django.test import Client, RequestFactory
+
+from . import snapshots
+from .analytics import attendance_stats
+from .bulk_enrollment import bulk_enroll
+from .checkin import participant_token, scanner_key
+from .forecasting import enrollment_limit, fit, load_model, predict_no_show
+from .middleware import CompressionMiddleware
+from .matrix import added_conflicts, apply_matrix_diff, enrollment_bitsets, matrix_diff
+from .forms import AddCourseForm, AddParticipantForm, EditCourseFutureForm, EditParticipantForm
+from .importers import import_people
+from .models import (
+    ENROLLMENT_ACTIVE, ENROLLMENT_CANCELLED, Employee, Enrollment, OrgRollup, PresenceSyncBatch, TrainingCourse, Participant
+)
+from .purge import delete_courses_sql, purge_deleted
+from .reminders import send_reminders
+from .rollups import level_rows
+from .search import SearchResults
+from .signals import apply_sqlite_pragmas
+from .views import (
+    CourseDetailsView,
+    CourseParticipantsView,
+    CoursesForTodayView,
+    CoursesView,
+    EmployeeCoursesView
+)
 
 
 @pytest.mark.django_db
@@ -327,7 +374,7 @@ def test_course_presence_list_view_save_to_db(authenticated_client, training_cou
 
     # Check if presence records were saved correctly
     for participant in training_course.participant_set.all():
-        presence_record = PresenceList.objects.get(participant=participant, training_course=training_course)
+        presence_record = Enrollment.objects.get(participant=participant, training_course=training_course)
         assert presence_record.present is True
 
 
@@ -342,7 +389,7 @@ def test_course_participants_view(authenticated_client, training_course, partici
     assert 'presence_list' in response.context
 
     assert response.context['course'].topic == 'Python Course'
-    assert response.context['participants'].count() == 1
+    assert len(response.context['participants']) == 1
     assert response.context['participants'][0].first_name == 'Anna'
     assert response.context['presence_list'] is None
 
@@ -350,7 +397,7 @@ def test_course_participants_view(authenticated_client, training_course, partici
 @pytest.mark.django_db
 def test_course_participants_view_with_presence_list(authenticated_client, past_training_course_took_place, participant):
     # Simulate marking some participants as present
-    PresenceList.objects.create(participant=participant, training_course=past_training_course_took_place, present=True)
+    Enrollment.objects.create(participant=participant, training_course=past_training_course_took_place, present=True)
 
     url = reverse('course_participants', kwargs={'pk': past_training_course_took_place.pk})
     response = authenticated_client.get(url)
@@ -436,4 +483,1422 @@ def test_participants_list_view(authenticated_client, participant, training_cour
 
     participants_courses = response.context['participants_courses']
     assert participant in participants_courses
-    assert list(participants_courses[participant]) == list(participant.training_course.all())
\ No newline at end of file
+    assert list(participants_courses[participant]) == list(participant.training_course.all())
+
+
+@pytest.mark.django_db
+def test_sqlite_pragmas_applied_on_connection_created():
+    with override_settings(SQLITE_PRAGMAS={'cache_size': -1234}):
+        connection_created.send(sender=connection.__class__, connection=connection)
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA cache_size')
+        assert cursor.fetchone()[0] == -1234
+
+
+def test_sqlite_production_profile_uses_production_pragmas(monkeypatch, settings):
+    monkeypatch.setenv('DJANGO_DB_PROFILE', 'production')
+    production = runpy.run_path(str(settings.BASE_DIR / 'final_project' / 'settings.py'))
+    assert production['SQLITE_PRAGMAS'] == settings.PRODUCTION_SQLITE_PRAGMAS
+    assert production['DATABASES']['default']['CONN_MAX_AGE'] == 600
+
+
+def test_sqlite_production_pragmas_parallel_readers_and_writers(settings, tmp_path):
+    # Równoległe zapisy i odczyty na pliku bazy z profilem produkcyjnym nie mogą kończyć się
+    # błędem "database is locked".
+    pragmas = settings.PRODUCTION_SQLITE_PRAGMAS
+    db_path = tmp_path / 'concurrency.sqlite3'
+    setup = sqlite3.connect(db_path)
+    apply_sqlite_pragmas(setup, pragmas)
+    setup.execute('CREATE TABLE presence (id INTEGER PRIMARY KEY, present INTEGER)')
+    setup.commit()
+    assert setup.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    setup.close()
+
+    errors = []
+
+    def writer():
+        conn = sqlite3.connect(db_path, timeout=20)
+        apply_sqlite_pragmas(conn, pragmas)
+        try:
+            for _ in range(100):
+                with conn:
+                    conn.execute('INSERT INTO presence (present) VALUES (1)')
+        except sqlite3.OperationalError as e:
+            errors.append(e)
+        finally:
+            conn.close()
+
+    def reader():
+        conn = sqlite3.connect(db_path, timeout=20)
+        apply_sqlite_pragmas(conn, pragmas)
+        try:
+            for _ in range(200):
+                conn.execute('SELECT COUNT(*) FROM presence').fetchone()
+        except sqlite3.OperationalError as e:
+            errors.append(e)
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=writer) for _ in range(4)] + \
+              [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    conn = sqlite3.connect(db_path)
+    assert conn.execute('SELECT COUNT(*) FROM presence').fetchone()[0] == 400
+    conn.close()
+
+
+def test_read_views_are_async():
+    for view in (CoursesForTodayView, CourseDetailsView, CourseParticipantsView, CoursesView, EmployeeCoursesView):
+        assert view.view_is_async
+
+
+@pytest.mark.django_db
+def test_async_view_redirects_anonymous_user(client):
+    url = reverse('courses_today')
+    response = client.get(url)
+
+    assert response.status_code == 302
+    assert response.url == f"/login/?redirect_to={url}"
+
+
+@pytest.mark.django_db
+def test_course_details_view_future_course_coach_choices(authenticated_client, employee):
+    course = TrainingCourse.objects.create(
+        topic='Future Course',
+        start_time=timezone.now() + timedelta(days=3),
+        end_time=timezone.now() + timedelta(days=3, hours=2),
+        category=1,
+        path=1,
+        formula=1,
+        participants_limit=5,
+        coach=employee
+    )
+    response = authenticated_client.get(reverse('course_details', kwargs={'pk': course.pk}))
+
+    assert response.status_code == 200
+    assert f'<option value="{employee.pk}" selected>{employee.name}</option>' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_export_courses_csv(authenticated_client, training_course):
+    response = authenticated_client.get(reverse('export', kwargs={'dataset': 'courses', 'fmt': 'csv'}))
+
+    assert response.status_code == 200
+    assert response.streaming
+    assert response['Content-Disposition'] == 'attachment; filename=courses.csv'
+    content = b''.join(response.streaming_content).decode('utf-8-sig')
+    rows = list(csv.reader(io.StringIO(content)))
+    assert rows[0][:2] == ['id', 'topic']
+    assert rows[1][1] == 'Python Course'
+    assert rows[1][8] == 'Jan Kowalski'
+
+
+@pytest.mark.django_db
+def test_export_participants_jsonl(authenticated_client, participant, training_course):
+    response = authenticated_client.get(reverse('export', kwargs={'dataset': 'participants', 'fmt': 'jsonl'}))
+
+    assert response.status_code == 200
+    lines = b''.join(response.streaming_content).decode().splitlines()
+    record = json.loads(lines[0])
+    assert record['last_name'] == 'Nowak'
+    assert record['gender'] == 'kobieta'
+    assert record['course_id'] == training_course.id
+
+
+@pytest.mark.django_db
+def test_export_coach_hours_xlsx(authenticated_client, training_course):
+    response = authenticated_client.get(reverse('export', kwargs={'dataset': 'coach_hours', 'fmt': 'xlsx'}))
+
+    assert response.status_code == 200
+    archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+    assert '[Content_Types].xml' in archive.namelist()
+    sheet = archive.read('xl/worksheets/sheet1.xml').decode()
+    assert '<t>Kowalski</t>' in sheet
+    assert '<c><v>2.0</v></c>' in sheet     # 2 godziny szkolenia
+
+
+@pytest.mark.django_db
+def test_export_streams_asynchronously_under_asgi(async_client, user, training_course):
+    async_client.force_login(user)
+
+    async def export():
+        response = await async_client.get(reverse('export', kwargs={'dataset': 'courses', 'fmt': 'csv'}))
+        return response, [chunk async for chunk in response.streaming_content]
+
+    response, chunks = async_to_sync(export)()
+    # Synchroniczny generator byłby pod ASGI wczytany w całości przed wysłaniem
+    assert response.is_async
+    assert 'Python Course' in b''.join(chunks).decode('utf-8-sig')
+
+
+@pytest.mark.django_db
+def test_export_unknown_dataset(authenticated_client):
+    response = authenticated_client.get(reverse('export', kwargs={'dataset': 'salaries', 'fmt': 'csv'}))
+
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_import_people_command_employees(tmp_path):
+    path = tmp_path / 'employees.csv'
+    path.write_text(
+        'first_name,last_name,gender,e_mail,phone_number,position,company,team,team_leader,supervisor\n'
+        'Jan,Kowalski,2,jan@example.com,123456789,Developer,Company,Team,Leader,Boss\n'
+        'Ewa,Nowak,1,ewa@example.com,12345,Tester,Company,Team,Leader,Boss\n'
+        'Adam,Mickiewicz,3,not-an-email,123456789,Poet,Company,Team,Leader,Boss\n',
+        encoding='utf-8')
+    report = tmp_path / 'report.csv'
+    out = io.StringIO()
+
+    call_command('import_people', 'employees', str(path), '--batch-size', '2', '--report', str(report), stdout=out)
+
+    employee = Employee.objects.get()
+    assert employee.name == 'Jan Kowalski'
+    assert employee.phone_number == 123456789
+    errors = list(csv.reader(report.open(encoding='utf-8')))
+    assert [line for line, _ in errors[1:]] == ['3', '4']
+    assert 'Numer telefonu musi składać się z 9 cyfr.' in errors[1][1]
+    assert 'gender' in errors[2][1] and 'e_mail' in errors[2][1]
+    assert 'Utworzono osób: 1' in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_import_employees_refreshes_org_rollups(authenticated_client, django_capture_on_commit_callbacks, employee):
+    call_command('refresh_org_rollups')
+    content = (
+        'first_name,last_name,gender,e_mail,phone_number,position,company,team,team_leader,supervisor\n'
+        'Ewa,Nowak,1,ewa@example.com,987654321,Tester,Company,Good Team,Team Leader,Supervisor\n'
+        'Adam,Nowak,2,adam@example.com,987654322,Analityk,Other Company,Team,Leader,Boss\n'
+    ).encode()
+    upload = SimpleUploadedFile('employees.csv', content, content_type='text/csv')
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = authenticated_client.post(reverse('import_people'), {'kind': 'employees', 'file': upload})
+
+    assert response.context['result'].created == 2
+    assert dict(OrgRollup.objects.values_list('company', 'employees')) == {'Company': 2, 'Other Company': 1}
+    assert OrgRollup.objects.get(company='Company').active_coaches == 0
+
+
+@pytest.mark.django_db
+def test_import_people_participants_with_enrollments(authenticated_client, employee):
+    course = TrainingCourse.objects.create(
+        topic='Future Course',
+        start_time=timezone.now() + timedelta(days=3),
+        end_time=timezone.now() + timedelta(days=3, hours=2),
+        category=1,
+        path=1,
+        formula=1,
+        participants_limit=1,
+        coach=employee
+    )
+    content = (
+        'first_name,last_name,gender,e_mail,phone_number,training_course\n'
+        f'Anna,Nowak,1,anna@example.com,987654321,{course.id}\n'
+        f'Jan,Nowak,2,jan@example.com,987654322,{course.id}\n'
+        'Ola,Nowak,1,ola@example.com,987654323,\n'
+    ).encode()
+    upload = SimpleUploadedFile('participants.csv', content, content_type='text/csv')
+
+    response = authenticated_client.post(reverse('import_people'), {'kind': 'participants', 'file': upload})
+
+    assert response.status_code == 200
+    result = response.context['result']
+    assert (result.created, result.enrolled) == (2, 1)
+    assert result.errors[0][0] == 3
+    assert 'Limit uczestników został osiągnięty' in result.errors[0][1]
+    assert list(course.participant_set.values_list('first_name', flat=True)) == ['Anna']
+    assert Participant.objects.filter(first_name='Ola').exists()
+
+
+@pytest.mark.django_db
+def test_import_people_enrollments_skip_existing(tmp_path, participant, training_course, participant_without_course):
+    path = tmp_path / 'enrollments.csv'
+    path.write_text(
+        'participant,training_course\n'
+        f'{participant.id},{training_course.id}\n'
+        f'{participant_without_course.id},{training_course.id}\n'
+        f'999999,{training_course.id}\n',
+        encoding='utf-8')
+
+    call_command('import_people', 'enrollments', str(path), stdout=io.StringIO(), stderr=io.StringIO())
+
+    assert training_course.participant_set.count() == 2
+
+
+@pytest.mark.django_db
+def test_import_people_rejects_double_booking(employee, participant, participant_without_course, training_course):
+    overlapping = TrainingCourse.objects.create(
+        topic='Excel', start_time=training_course.start_time + timedelta(hours=1),
+        end_time=training_course.end_time + timedelta(hours=1), category=1, path=1, formula=1,
+        participants_limit=5, coach=employee)
+    later = TrainingCourse.objects.create(
+        topic='Word', start_time=training_course.end_time, end_time=training_course.end_time + timedelta(hours=3),
+        category=1, path=1, formula=1, participants_limit=5, coach=employee)
+
+    # Kolizja z istniejącym zapisem i między dwoma zapisami z pliku - tylko kolidujące wiersze są odrzucane
+    result = import_people('enrollments', io.StringIO(
+        'participant,training_course\n'
+        f'{participant.id},{overlapping.id}\n'
+        f'{participant_without_course.id},{overlapping.id}\n'
+        f'{participant_without_course.id},{later.id}\n'))
+    assert result.enrolled == 1
+    assert result.errors == [
+        (2, 'Szkolenie Excel odbywa się w tym samym czasie co szkolenie Python Course.'),
+        (4, 'Szkolenie Word odbywa się w tym samym czasie co szkolenie Excel.'),
+    ]
+    assert list(overlapping.enrollment_set.values_list('participant_id', flat=True)) == [participant_without_course.id]
+    assert not later.enrollment_set.exists()
+
+    # Nowy uczestnik zapisywany na dwa szkolenia w tym samym czasie
+    result = import_people('participants', io.StringIO(
+        'first_name,last_name,gender,e_mail,phone_number,training_course\n'
+        f'Jan,Kowalski,2,jan@example.com,987654322,{training_course.id};{overlapping.id}\n'
+        f'Ewa,Kowalska,1,ewa@example.com,987654323,{training_course.id};{later.id}\n'))
+    assert (result.created, result.enrolled) == (1, 2)
+    assert result.errors == [
+        (2, 'training_course: Szkolenie Excel odbywa się w tym samym czasie co szkolenie Python Course.')]
+    assert not Participant.objects.filter(first_name='Jan').exists()
+
+
+@pytest.mark.django_db
+def test_course_presence_list_view_updates_enrollments(authenticated_client, training_course, participant,
+                                                        participant_without_course):
+    participant_without_course.training_course.add(training_course)
+    Enrollment.objects.filter(participant=participant_without_course).update(present=True)
+
+    url = reverse('course_presence_list', kwargs={'pk': training_course.pk})
+    response = authenticated_client.post(url, {str(participant.id): 'on'})
+
+    assert response.status_code == 302
+    presence = dict(Enrollment.objects.filter(training_course=training_course).values_list('participant_id', 'present'))
+    assert presence == {participant.id: True, participant_without_course.id: False}
+
+
+@pytest.mark.django_db
+def test_course_duration_seconds_generated_column(training_course, past_training_course):
+    course = TrainingCourse.objects.get(pk=training_course.pk)
+    assert course.duration_seconds == 2 * 3600
+    assert course.duration == timedelta(hours=2)
+
+    training_course.end_time = training_course.start_time + timedelta(hours=5)
+    training_course.save()
+    assert training_course.duration == timedelta(hours=5)
+    assert list(TrainingCourse.objects.filter(duration_seconds__gt=4 * 3600)) == [training_course]
+
+
+@pytest.mark.django_db
+def test_courses_view_filters_by_duration(authenticated_client, training_course, past_training_course):
+    training_course.end_time = training_course.start_time + timedelta(hours=5)
+    training_course.save()
+
+    response = authenticated_client.get(reverse('courses_list'), {'min_hours': 3, 'order': '-duration_seconds'})
+
+    assert response.status_code == 200
+    assert list(response.context['courses']) == [training_course]
+    hours = {row['path']: row['hours'] for row in response.context['hours_per_path']}
+    assert sum(hours.values()) == 5.0
+
+
+@pytest.mark.django_db
+def test_course_forms_reject_coach_double_booking(employee, training_course):
+    data = {
+        'topic': 'Overlapping',
+        'start_time': timezone.localtime(training_course.start_time + timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M'),
+        'end_time': timezone.localtime(training_course.end_time + timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M'),
+        'category': 1,
+        'path': 1,
+        'formula': 1,
+        'participants_limit': 10,
+        'coach': employee.id
+    }
+    form = AddCourseForm(data)
+    assert not form.is_valid()
+    assert 'Python Course' in form.non_field_errors()[0]
+
+    # Edycja szkolenia nie koliduje sama ze sobą
+    form = EditCourseFutureForm(data, instance=training_course)
+    assert form.is_valid(), form.errors
+
+
+@pytest.mark.django_db
+def test_find_conflicts_command(employee, training_course):
+    def add_course(topic, start_hours, end_hours):
+        return TrainingCourse.objects.create(
+            topic=topic, category=1, path=1, formula=1, participants_limit=10, coach=employee,
+            start_time=training_course.start_time + timedelta(hours=start_hours),
+            end_time=training_course.start_time + timedelta(hours=end_hours))
+
+    overlapping = add_course('Overlapping', 1, 3)
+    nested = add_course('Nested', 1, 2)
+    add_course('Adjacent', 3, 4)    # zaczyna się dokładnie po zakończeniu - brak konfliktu
+
+    out = io.StringIO()
+    call_command('find_conflicts', stdout=out)
+
+    output = out.getvalue()
+    assert 'Znalezione konflikty: 3' in output
+    assert f'[{training_course.pk}] Python Course <-> [{overlapping.pk}] Overlapping' in output
+    assert f'[{overlapping.pk}] Overlapping <-> [{nested.pk}] Nested' in output
+
+
+@pytest.mark.django_db
+def test_free_coaches_view_ranks_by_load(authenticated_client, monkeypatch, employee, training_course):
+    other = Employee.objects.create(first_name='Anna', last_name='Wolna', gender=1, e_mail='anna@example.com',
+                                    phone_number=123456789, position='Trener', company='ABC', team='T',
+                                    team_leader='L', supervisor='S')
+    start = training_course.start_time - timedelta(hours=1)
+    params = {
+        'start_time': timezone.localtime(start).strftime('%Y-%m-%d %H:%M:%S'),
+        'end_time': timezone.localtime(start + timedelta(hours=4)).strftime('%Y-%m-%d %H:%M:%S'),
+        'duration': 50,
+    }
+
+    response = authenticated_client.get(reverse('free_coaches'), params)
+
+    assert response.status_code == 200
+    coaches = response.json()['coaches']
+    assert [coach['id'] for coach in coaches] == [other.id, employee.id]
+    assert coaches[0]['load_hours'] == 0
+    assert coaches[1]['load_hours'] == 2.0
+    assert len(coaches[1]['slots']) == 2      # godzina przed szkoleniem i godzina po nim
+
+    # Nowe szkolenie unieważnia zapisaną oś czasu - trener nie ma już wolnego okna
+    TrainingCourse.objects.create(topic='Busy', category=1, path=1, formula=1, participants_limit=10, coach=other,
+                                  start_time=start, end_time=start + timedelta(hours=4))
+    response = authenticated_client.get(reverse('free_coaches'), {**params, 'duration': 90})
+    assert response.json()['coaches'] == []
+
+    # Zmiana w innym procesie (z osobnym cache) unieważnia oś czasu zapisaną w cache tego procesu
+    with monkeypatch.context() as worker:
+        worker.setattr('trainings.scheduling.cache', LocMemCache('other-worker', {}))
+        TrainingCourse.objects.filter(topic='Busy').delete()
+    response = authenticated_client.get(reverse('free_coaches'), {**params, 'duration': 90})
+    assert [coach['id'] for coach in response.json()['coaches']] == [other.id]
+
+
+@pytest.mark.django_db
+def test_free_coaches_view_validation(authenticated_client):
+    response = authenticated_client.get(reverse('free_coaches'), {
+        'start_time': '2030-01-01 10:00:00', 'end_time': '2030-01-01 09:00:00', 'duration': 30})
+
+    assert response.status_code == 400
+    assert '__all__' in response.json()['errors']
+
+
+def create_overlapping_course(course, topic='Overlapping'):
+    return TrainingCourse.objects.create(
+        topic=topic, category=1, path=1, formula=1, participants_limit=10, coach=course.coach,
+        start_time=course.start_time + timedelta(hours=1), end_time=course.end_time + timedelta(hours=1))
+
+
+@pytest.mark.django_db
+def test_participant_forms_reject_double_booking(participant, training_course):
+    overlapping = create_overlapping_course(training_course)
+
+    form = EditParticipantForm({'participant': participant.id, 'training_course': overlapping.id})
+    assert not form.is_valid()
+    assert 'Python Course' in form.errors['training_course'][0]
+
+    # Anulowany zapis nie blokuje nowego
+    Enrollment.objects.filter(participant=participant).update(status=2)
+    form = EditParticipantForm({'participant': participant.id, 'training_course': overlapping.id})
+    assert form.is_valid(), form.errors
+
+    form = AddParticipantForm({
+        'first_name': 'Jan', 'last_name': 'Nowy', 'gender': 2, 'e_mail': 'jan@example.com',
+        'phone_number': '123456789', 'training_course': [training_course.id, overlapping.id],
+    })
+    assert not form.is_valid()
+    assert form.errors['training_course'] == [
+        "Szkolenie Overlapping odbywa się w tym samym czasie co szkolenie Python Course."]
+
+
+@pytest.mark.django_db
+def test_find_double_bookings_command(participant, participant_without_course, training_course):
+    overlapping = create_overlapping_course(training_course)
+    # Zaczyna się dokładnie w chwili zakończenia pierwszego szkolenia - brak konfliktu
+    later = TrainingCourse.objects.create(
+        topic='Later', category=1, path=1, formula=1, participants_limit=10, coach=training_course.coach,
+        start_time=training_course.end_time, end_time=training_course.end_time + timedelta(hours=2))
+    Enrollment.objects.create(participant=participant, training_course=overlapping)
+    Enrollment.objects.create(participant=participant_without_course, training_course=training_course)
+    Enrollment.objects.create(participant=participant_without_course, training_course=later)
+
+    out = io.StringIO()
+    call_command('find_double_bookings', stdout=out)
+
+    output = out.getvalue()
+    assert 'Znalezione podwójne zapisy: 1' in output
+    assert f'Anna Nowak: [{training_course.pk}] Python Course <-> [{overlapping.pk}] Overlapping' in output
+
+
+@pytest.mark.django_db
+def test_search_view_prefix_and_ranking(authenticated_client, employee, training_course, participant):
+    response = authenticated_client.get(reverse('search'), {'q': 'pyth'})
+
+    assert response.status_code == 200
+    page = response.context['page']
+    assert page.paginator.count == 1
+    assert page[0] == {'kind': 'course', 'object': training_course}
+
+    # Wyzwalacze aktualizują indeks, wyszukiwanie ignoruje polskie znaki
+    training_course.topic = 'Zarządzanie czasem'
+    training_course.save()
+    response = authenticated_client.get(reverse('search'), {'q': 'zarzadz'})
+    assert [result['object'] for result in response.context['page']] == [training_course]
+    assert authenticated_client.get(reverse('search'), {'q': 'pyth'}).context['page'].paginator.count == 0
+
+    # Imię i nazwisko w tytule jest wyżej niż dopasowanie w szczegółach, filtr rodzaju
+    response = authenticated_client.get(reverse('search'), {'q': 'nowak'})
+    assert [result['kind'] for result in response.context['page']] == ['participant']
+    response = authenticated_client.get(reverse('search'), {'q': 'nowak', 'kind': 'employee'})
+    assert response.context['page'].paginator.count == 0
+
+
+@pytest.mark.django_db
+def test_search_pagination_and_rebuild_command(authenticated_client, employee):
+    TrainingCourse.objects.bulk_create([
+        TrainingCourse(topic=f'Excel {i}', category=1, path=1, formula=1, participants_limit=10, coach=employee,
+                       start_time=timezone.now(), end_time=timezone.now() + timedelta(hours=1))
+        for i in range(25)])
+
+    response = authenticated_client.get(reverse('search'), {'q': 'excel', 'page': 2})
+    page = response.context['page']
+    assert page.paginator.count == 25
+    assert len(page.object_list) == 5
+
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM trainings_search")
+    out = io.StringIO()
+    call_command('rebuild_search_index', stdout=out)
+    assert 'Zaindeksowano szkoleń: 25, pracowników: 1' in out.getvalue()
+    assert authenticated_client.get(reverse('search'), {'q': 'exc'}).context['page'].paginator.count == 25
+
+
+@pytest.mark.django_db
+def test_api_courses_fields_include_and_pagination(authenticated_client, employee, training_course, participant):
+    for i in range(2):
+        TrainingCourse.objects.create(topic=f'Course {i}', category=1, path=1, formula=1, participants_limit=10,
+                                      coach=employee, start_time=timezone.now() + timedelta(days=i + 1),
+                                      end_time=timezone.now() + timedelta(days=i + 1, hours=1))
+    url = reverse('api', kwargs={'resource': 'courses'})
+
+    response = authenticated_client.get(url, {'fields': 'id,topic', 'include': 'coach,participants', 'limit': 2})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data['results'][0] == {
+        'id': training_course.id,
+        'topic': 'Python Course',
+        'coach': {'id': employee.id, 'first_name': 'Jan', 'last_name': 'Kowalski', 'e_mail': employee.e_mail},
+        'participants': [{'id': participant.id, 'first_name': 'Anna', 'last_name': 'Nowak',
+                          'e_mail': 'nowak@example.com', 'present': None}],
+    }
+    assert data['results'][1]['participants'] == []
+
+    response = authenticated_client.get(data['next'])
+    assert [course['topic'] for course in response.json()['results']] == ['Course 1']
+    assert response.json()['next'] is None
+
+
+@pytest.mark.django_db
+def test_api_constant_queries_and_conditional_get(authenticated_client, employee, training_course, participant):
+    url = reverse('api', kwargs={'resource': 'participants'})
+    authenticated_client.get(url)   # sesja i użytkownik
+
+    with CaptureQueriesContext(connection) as few:
+        response = authenticated_client.get(url, {'include': 'courses'})
+    for i in range(5):
+        Participant.objects.create(first_name='P', last_name=str(i), gender=1, e_mail='p@example.com',
+                                   phone_number=123456789).training_course.add(training_course)
+    with CaptureQueriesContext(connection) as many:
+        authenticated_client.get(url, {'include': 'courses'})
+    assert len(few) == len(many)
+
+    etag = response['ETag']
+    response = authenticated_client.get(url, {'include': 'courses'}, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200     # dane się zmieniły
+    response = authenticated_client.get(url, {'include': 'courses'}, HTTP_IF_NONE_MATCH=response['ETag'])
+    assert response.status_code == 304
+
+    response = authenticated_client.get(url, {'fields': 'password'})
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_compression_middleware(authenticated_client, training_course):
+    brotli = pytest.importorskip('brotli')
+    url = reverse('api', kwargs={'resource': 'courses'})
+    response = authenticated_client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+    assert response['Content-Encoding'] == 'br'
+    assert 'Python Course' in brotli.decompress(response.content).decode()
+    assert 'Accept-Encoding' in response['Vary']
+
+    response = authenticated_client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+    assert response['Content-Encoding'] == 'gzip'
+    assert 'Python Course' in gzip.decompress(response.content).decode()
+
+    # Strony HTML bez sekretów są kompresowane algorytmem Brotli, a strony z tokenem CSRF i odpowiedzi
+    # ustawiające ciasteczka - tylko gzipem z losowym dopełnieniem (BREACH)
+    response = authenticated_client.get(reverse('participants_list'), HTTP_ACCEPT_ENCODING='gzip, br')
+    assert response['Content-Encoding'] == 'br'
+    assert 'Lista uczestników' in brotli.decompress(response.content).decode()
+    response = authenticated_client.get(reverse('courses_list'), HTTP_ACCEPT_ENCODING='gzip, br')
+    assert response['Content-Encoding'] == 'gzip'
+    assert 'csrfmiddlewaretoken' in gzip.decompress(response.content).decode()
+    response = authenticated_client.get(reverse('courses_list'), HTTP_ACCEPT_ENCODING='br')
+    assert not response.has_header('Content-Encoding')
+    middleware = CompressionMiddleware(lambda request: None)
+    request = RequestFactory().get(url, HTTP_ACCEPT_ENCODING='gzip, br')
+    response = HttpResponse('{"token": "%s"}' % get_token(request) * 20, content_type='application/json')
+    assert middleware.process_response(request, response)['Content-Encoding'] == 'gzip'
+    response = HttpResponse('{"courses": []}' * 20, content_type='application/json')
+    response.set_cookie('sessionid', 'x')
+    assert middleware.process_response(RequestFactory().get(url, HTTP_ACCEPT_ENCODING='gzip, br'),
+                                       response)['Content-Encoding'] == 'gzip'
+
+    # Eksport strumieniowy jest kompresowany porcjami, XLSX (ZIP) - nie
+    response = authenticated_client.get(reverse('export', kwargs={'dataset': 'courses', 'fmt': 'csv'}),
+                                        HTTP_ACCEPT_ENCODING='br')
+    assert response['Content-Encoding'] == 'br'
+    assert 'Python Course' in brotli.decompress(b''.join(response.streaming_content)).decode('utf-8-sig')
+    response = authenticated_client.get(reverse('export', kwargs={'dataset': 'courses', 'fmt': 'xlsx'}),
+                                        HTTP_ACCEPT_ENCODING='br')
+    assert not response.has_header('Content-Encoding')
+
+    response = authenticated_client.post(reverse('courses_list'),
+                                         {'save_one_course': '', 'course_id': training_course.id},
+                                         HTTP_ACCEPT_ENCODING='gzip, br')
+    assert response['Content-Type'] == 'application/pdf'
+    assert not response.has_header('Content-Encoding')
+
+
+@pytest.mark.django_db
+def test_collectstatic_precompresses_hashed_assets(client, settings, tmp_path):
+    brotli = pytest.importorskip('brotli')
+    settings.STATIC_ROOT = tmp_path
+    settings.STORAGES = {**settings.STORAGES,
+                         'staticfiles': {'BACKEND': 'trainings.storage.CompressedManifestStaticFilesStorage'}}
+    call_command('collectstatic', interactive=False, verbosity=0)
+
+    url = static('flatpickr/flatpickr.min.js')
+    assert url != '/static/flatpickr/flatpickr.min.js'     # nazwa z hashem z manifestu
+
+    response = client.get(url, HTTP_ACCEPT_ENCODING='gzip, br')
+    assert response.status_code == 200
+    assert response['Content-Encoding'] == 'br'
+    assert 'immutable' in response['Cache-Control']
+    content = brotli.decompress(b''.join(response.streaming_content))
+    assert content == (tmp_path / 'flatpickr' / 'flatpickr.min.js').read_bytes()
+
+    response = client.get('/static/flatpickr/flatpickr.min.js')
+    assert not response.has_header('Content-Encoding')
+    assert 'immutable' not in response['Cache-Control']
+    assert client.get('/static/../settings.py').status_code == 404
+
+
+@pytest.mark.django_db
+def test_cached_authentication_skips_user_query(authenticated_client, user, participant):
+    url = reverse('participants_list')
+    authenticated_client.get(url)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = authenticated_client.get(url)
+    assert response.status_code == 200
+    assert [query for query in queries if 'trainings_participant' in query['sql']]
+    assert not [query for query in queries if 'auth_user' in query['sql']]
+
+    # Zmiana hasła unieważnia wpis w pamięci podręcznej i sesję
+    user.set_password('nowehaslo')
+    user.save()
+    response = authenticated_client.get(url)
+    assert response.status_code == 302
+    assert response.url.startswith('/login/')
+
+
+@pytest.mark.django_db
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+def test_signed_cookie_sessions_need_no_queries_for_auth(client, user):
+    client.login(username='testuser', password='testpassword')
+    url = reverse('participants_list')
+    client.get(url)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200
+    # Jedyne zapytanie to lista uczestników - bez odczytu sesji i użytkownika
+    assert len(queries) == 1
+    assert 'trainings_participant' in queries[0]['sql']
+
+    client.get(reverse('logout'))
+    assert client.get(url).status_code == 302
+
+
+@pytest.fixture
+def snapshot_settings(settings, tmp_path):
+    settings.SNAPSHOTS_ENABLED = True
+    settings.SNAPSHOT_ROOT = tmp_path
+    # Publikacja w tle nie rusza w trakcie testu - zlecone migawki są publikowane przez flush()
+    settings.SNAPSHOT_DEBOUNCE = 3600
+    yield settings
+    snapshots.publisher.cancel()
+
+
+@pytest.mark.django_db
+def test_snapshot_served_until_data_changes(authenticated_client, training_course, participant, snapshot_settings):
+    url = reverse('course_participants', kwargs={'pk': training_course.pk})
+    assert snapshots.publish_all() == {'courses_list': 1, 'employee_courses': 1, 'course_participants': 1}
+
+    with open(snapshots.snapshot_path('course_participants', training_course.pk), encoding='utf-8') as f:
+        assert f.readline().startswith('<!-- snapshot-version: ')
+        body = f.read()
+    response = authenticated_client.get(url)
+    assert response.content.decode() == body
+    assert 'Anna' in body
+
+    # Formularze migawki dostają token CSRF bieżącego użytkownika
+    response = authenticated_client.get(reverse('courses_list'))
+    assert snapshots.CSRF_PLACEHOLDER not in response.content.decode()
+    assert response.cookies['csrftoken'].value
+    assert training_course.topic in response.content.decode()
+
+    # Po zmianie danych nieaktualna migawka nie jest serwowana, a jej odświeżenie jest zlecone
+    participant.first_name = 'Agata'
+    participant.save()
+    response = authenticated_client.get(url)
+    assert 'Agata' in response.content.decode()
+    assert ('course_participants', training_course.pk) in snapshots.publisher.pending
+
+    assert snapshots.publisher.flush() == 1
+    with open(snapshots.snapshot_path('course_participants', training_course.pk), encoding='utf-8') as f:
+        assert 'Agata' in f.read()
+    assert authenticated_client.get(url).content.decode().count('Agata') == 1
+
+    # Znacznik zmiany jest zapisany w bazie - inny proces serwera (z własnym, pustym cache) też nie serwuje
+    # nieaktualnej migawki
+    participant.first_name = 'Ola'
+    participant.save()
+    cache.clear()
+    assert 'Ola' in authenticated_client.get(url).content.decode()
+
+
+@pytest.mark.django_db
+def test_publish_snapshots_command_and_deleted_course(training_course, snapshot_settings):
+    call_command('publish_snapshots', 'course_participants')
+    path = snapshots.snapshot_path('course_participants', training_course.pk)
+    with open(path, encoding='utf-8') as f:
+        assert training_course.topic in f.read()
+
+    with pytest.raises(CommandError):
+        call_command('publish_snapshots', 'unknown_page')
+
+    # Migawka usuniętego szkolenia jest kasowana przy ponownej publikacji
+    pk = training_course.pk
+    training_course.delete()
+    snapshots.publisher.flush()
+    assert not os.path.exists(path)
+    assert not os.path.exists(snapshots.snapshot_path('course_participants', pk))
+
+
+@pytest.mark.django_db
+def test_snapshot_refreshed_after_presence_and_import(authenticated_client, training_course, participant,
+                                                      participant_without_course, snapshot_settings):
+    training_course.took_place = True
+    training_course.save()
+    snapshots.publisher.flush()
+    assert snapshots.publish('course_participants', training_course.pk)
+    path = snapshots.snapshot_path('course_participants', training_course.pk)
+
+    # Lista obecności zapisuje zmiany przez bulk_update, bez sygnałów post_save
+    authenticated_client.post(reverse('course_presence_list', kwargs={'pk': training_course.pk}),
+                              {str(participant.id): 'on'})
+    assert ('course_participants', training_course.pk) in snapshots.publisher.pending
+    snapshots.publisher.flush()
+    with open(path, encoding='utf-8') as f:
+        assert '<td>True</td>' in f.read()
+    assert '<td>True</td>' in authenticated_client.get(
+        reverse('course_participants', kwargs={'pk': training_course.pk})).content.decode()
+
+    # Import zapisów (bulk_create)
+    import_people('enrollments', io.StringIO(
+        f'participant,training_course\n{participant_without_course.id},{training_course.id}\n'))
+    assert snapshots.publisher.flush() == 1
+    with open(path, encoding='utf-8') as f:
+        assert f.read().count('nowak@example.com') == 2
+
+
+@pytest.mark.django_db
+def test_attendance_stats_groups(employee, training_course, past_training_course_took_place, participant):
+    other_coach = Employee.objects.create(
+        first_name='Ewa', last_name='Lis', gender=1, e_mail='lis@example.com', phone_number=111222333,
+        position='Trainer', company='Other Company', team='Team', team_leader='Leader', supervisor='Supervisor')
+    webinar = TrainingCourse.objects.create(
+        topic='Webinar', start_time=past_training_course_took_place.start_time,
+        end_time=past_training_course_took_place.end_time, category=4, path=3, formula=2,
+        participants_limit=5, coach=other_coach, took_place=True)
+    people = [Participant.objects.create(first_name=f'P{i}', last_name='Test', gender=1,
+                                         e_mail=f'p{i}@example.com', phone_number=i) for i in range(4)]
+    Enrollment.objects.bulk_create([
+        Enrollment(participant=people[0], training_course=past_training_course_took_place, present=True),
+        Enrollment(participant=people[1], training_course=past_training_course_took_place, present=False),
+        Enrollment(participant=people[2], training_course=webinar, present=True),
+        Enrollment(participant=people[3], training_course=webinar, status=2, present=False),
+    ])
+    # bulk_create pomija sygnały - wymuszenie przeliczenia raportu zapisem szkolenia
+    webinar.save()
+
+    stats = attendance_stats()
+    assert stats['total'] == {'enrolled': 4, 'checked': 3, 'present': 2, 'rate': round(2 / 3, 4)}
+    coaches = {group['label']: group for group in stats['dimensions']['coach']}
+    assert coaches['Jan Kowalski'] == {'key': employee.pk, 'label': 'Jan Kowalski', 'enrolled': 3,
+                                       'checked': 2, 'present': 1, 'rate': 0.5}
+    assert coaches['Ewa Lis']['rate'] == 1.0
+    assert [(group['label'], group['enrolled']) for group in stats['dimensions']['path']] == [
+        ('efektywność osobista', 3), ('przywództwo', 1)]
+    assert {group['key']: group['enrolled'] for group in stats['dimensions']['company']} == {
+        'Company': 3, 'Other Company': 1}
+    month = f'{timezone.localtime(training_course.start_time):%Y-%m}'
+    assert month in [group['key'] for group in stats['dimensions']['month']]
+
+
+@pytest.mark.django_db
+def test_attendance_report_and_json(authenticated_client, monkeypatch, past_training_course_took_place,
+                                    participant_without_course, training_course):
+    Enrollment.objects.create(participant=participant_without_course,
+                              training_course=past_training_course_took_place, present=False)
+    response = authenticated_client.get(reverse('attendance_stats'), {'by': 'path,formula'})
+    assert response.status_code == 200
+    data = response.json()
+    assert set(data['dimensions']) == {'path', 'formula'}
+    assert data['total']['rate'] == 0.0
+
+    # Zapis obecności unieważnia raport w cache
+    enrollment = Enrollment.objects.get(participant=participant_without_course)
+    enrollment.present = True
+    enrollment.save()
+    assert authenticated_client.get(reverse('attendance_stats')).json()['total']['rate'] == 1.0
+
+    # Lista obecności (bulk_update) i import zapisów (bulk_create) też unieważniają raport
+    authenticated_client.post(reverse('course_presence_list', kwargs={'pk': past_training_course_took_place.pk}))
+    assert authenticated_client.get(reverse('attendance_stats')).json()['total']['rate'] == 0.0
+    import_people('enrollments', io.StringIO(
+        f'participant,training_course\n{participant_without_course.id},{training_course.id}\n'))
+    assert authenticated_client.get(reverse('attendance_stats')).json()['total']['enrolled'] == 2
+
+    # Wersja raportu jest zapisana w bazie - zmiana w innym procesie (z osobnym cache) unieważnia raport w tym
+    with monkeypatch.context() as worker:
+        worker.setattr('trainings.analytics.cache', LocMemCache('other-worker', {}))
+        Enrollment.objects.filter(participant=participant_without_course, training_course=training_course).delete()
+    assert authenticated_client.get(reverse('attendance_stats')).json()['total']['enrolled'] == 1
+
+    assert authenticated_client.get(reverse('attendance_stats'), {'by': 'weather'}).status_code == 400
+    response = authenticated_client.get(reverse('attendance_report'))
+    assert response.status_code == 200
+    assert 'Jan Kowalski' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_chart_data_endpoints(authenticated_client, employee, training_course, past_training_course_took_place,
+                              participant):
+    enrollment = Enrollment.objects.create(participant=participant, training_course=past_training_course_took_place,
+                                           present=True)
+    response = authenticated_client.get(reverse('chart_data', kwargs={'chart': 'coach_hours'}))
+    assert response.status_code == 200
+    assert response.json() == {'title': 'Czas trwania szkoleń według pracowników', 'unit': 'h',
+                               'labels': ['Jan Kowalski'], 'values': [4.0]}
+
+    month = f'{timezone.localtime(training_course.start_time):%Y-%m}'
+    data = authenticated_client.get(reverse('chart_data', kwargs={'chart': 'courses_per_month'})).json()
+    assert dict(zip(data['labels'], data['values']))[month] >= 1
+    assert sum(data['values']) == 2
+
+    url = reverse('chart_data', kwargs={'chart': 'attendance_by_path'})
+    response = authenticated_client.get(url)
+    assert response.json()['labels'] == ['efektywność osobista']
+    assert response.json()['values'] == [100.0]
+    assert authenticated_client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code == 304
+
+    enrollment.present = False
+    enrollment.save()
+    assert authenticated_client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).json()['values'] == [0.0]
+    assert authenticated_client.get(reverse('chart_data', kwargs={'chart': 'pie'})).status_code == 404
+
+
+@pytest.mark.django_db
+def test_employees_page_draws_chart_in_browser(authenticated_client, employee, training_course):
+    response = authenticated_client.get(reverse('employees_list'))
+    content = response.content.decode()
+    assert static('trainings/charts.js') in content
+    assert reverse('chart_data', kwargs={'chart': 'coach_hours'}) in content
+
+    # Dane wykresu to ułamek rozmiaru obrazu PNG generowanego na serwerze
+    data = authenticated_client.get(reverse('chart_data', kwargs={'chart': 'coach_hours'}))
+    png = authenticated_client.post(reverse('employees_list'), {'generate_chart': True}).context['chart']
+    assert len(data.content) * 20 < len(png)
+
+
+def test_noshow_model_recovers_factor_effects():
+    rng = np.random.default_rng(0)
+    courses = 4000
+    levels = {
+        'path': rng.integers(1, 5, courses),
+        'category': rng.integers(1, 5, courses),
+        'formula': rng.integers(1, 3, courses),
+        'weekday': rng.integers(0, 7, courses),
+        'coach': rng.integers(1, 41, courses),
+    }
+    # Nieobecność: 15% bazowo, +20 p.p. dla szkoleń online, +10 p.p. dla trenera nr 7
+    true_rate = 0.15 + 0.2 * (levels['formula'] == 1) + 0.1 * (levels['coach'] == 7)
+    weights = rng.integers(5, 30, courses).astype(float)
+    rates = rng.binomial(weights.astype(int), true_rate) / weights
+
+    model = fit(levels, rates, weights)
+    coefficients = model['coefficients']
+    assert coefficients['formula']['1'] - coefficients['formula']['2'] == pytest.approx(0.2, abs=0.02)
+    others = [value for coach, value in coefficients['coach'].items() if coach != '7']
+    assert coefficients['coach']['7'] - np.mean(others) == pytest.approx(0.1, abs=0.03)
+    assert max(abs(value) for value in coefficients['weekday'].values()) < 0.03
+    assert model['courses'] == courses
+
+
+@pytest.mark.django_db
+def test_overbooking_uses_fitted_noshow_model(settings, employee, training_course, past_training_course_took_place):
+    people = [Participant.objects.create(first_name=f'P{i}', last_name='Test', gender=1,
+                                         e_mail=f'p{i}@example.com', phone_number=i) for i in range(10)]
+    # Historia: połowa zapisanych nie przyszła
+    Enrollment.objects.bulk_create([
+        Enrollment(participant=person, training_course=past_training_course_took_place, present=i % 2 == 0)
+        for i, person in enumerate(people)])
+    training_course.participants_limit = 10
+    training_course.save()
+    Enrollment.objects.bulk_create([Enrollment(participant=person, training_course=training_course)
+                                    for person in people])
+    data = {'first_name': 'Jan', 'last_name': 'Nowy', 'gender': 2, 'e_mail': 'jan@example.com',
+            'phone_number': '123456789', 'training_course': [training_course.id]}
+
+    # Bez modelu limit uczestników jest twardy
+    assert load_model() is None
+    assert not AddParticipantForm(data).is_valid()
+
+    call_command('fit_noshow_model')
+    assert predict_no_show(training_course) == pytest.approx(0.5)
+    # Nadrezerwacja ograniczona do 10% limitu, mimo prognozy 50% nieobecnych
+    assert enrollment_limit(training_course) == 11
+    assert AddParticipantForm(data).is_valid()
+
+    settings.OVERBOOKING_MAX_RATE = 0
+    assert enrollment_limit(training_course) == 10
+    assert not AddParticipantForm(data).is_valid()
+
+
+@pytest.mark.django_db
+def test_org_rollups_follow_employee_and_course_changes(django_capture_on_commit_callbacks, employee, training_course):
+    call_command('refresh_org_rollups')
+    with django_capture_on_commit_callbacks(execute=True):
+        other = Employee.objects.create(first_name='Ewa', last_name='Nowak', gender=1, e_mail='ewa@example.com',
+                                        phone_number=987654321, position='Trener', company='Company',
+                                        team='Other Team', team_leader='Leader', supervisor='Supervisor')
+    company = level_rows('company').get(company='Company')
+    assert (company['staff'], company['coaches'], company['course_count']) == (2, 1, 1)
+    assert company['total'] == training_course.duration_seconds == 2 * 3600
+
+    # Zmiana trenera przenosi godziny do zespołu nowego trenera
+    with django_capture_on_commit_callbacks(execute=True):
+        training_course.coach = other
+        training_course.save()
+    teams = {row['team']: row for row in level_rows('team')}
+    assert (teams['Good Team']['coaches'], teams['Good Team']['total']) == (0, 0)
+    assert (teams['Other Team']['coaches'], teams['Other Team']['total']) == (1, 2 * 3600)
+
+    # Zmiana przełożonego przenosi pracownika między grupami
+    with django_capture_on_commit_callbacks(execute=True):
+        other.supervisor = 'New Supervisor'
+        other.save()
+    supervisors = {row['supervisor']: row for row in level_rows('supervisor')}
+    assert supervisors['Supervisor']['staff'] == 1
+    assert supervisors['New Supervisor']['total'] == 2 * 3600
+
+    # Pełna przebudowa daje te same wiersze co odświeżanie przyrostowe
+    incremental = sorted(OrgRollup.objects.values_list('company', 'team', 'team_leader', 'supervisor',
+                                                       'employees', 'active_coaches', 'courses', 'total_seconds'))
+    call_command('refresh_org_rollups')
+    assert sorted(OrgRollup.objects.values_list('company', 'team', 'team_leader', 'supervisor', 'employees',
+                                                'active_coaches', 'courses', 'total_seconds')) == incremental
+
+
+@pytest.mark.django_db
+def test_org_rollup_views(authenticated_client, django_assert_max_num_queries, employee, training_course):
+    Employee.objects.bulk_create([
+        Employee(first_name=f'E{i}', last_name='Test', gender=1, e_mail=f'e{i}@example.com', phone_number=i,
+                 position='Analityk', company=f'Company {i % 3}', team='Team', team_leader='Leader',
+                 supervisor='Supervisor') for i in range(60)])
+    call_command('refresh_org_rollups')
+
+    with django_assert_max_num_queries(6):
+        response = authenticated_client.get(reverse('org_rollup'), {'level': 'company'})
+    rows = list(response.context['page'])
+    assert rows[0]['company'] == 'Company' and rows[0]['hours'] == 2 and rows[0]['utilisation'] == 1
+    assert {row['company']: row['staff'] for row in rows[1:]} == {f'Company {i}': 20 for i in range(3)}
+
+    # Przejście do pracowników grupy i podział na strony
+    url = reverse('org_employees')
+    with django_assert_max_num_queries(6):
+        response = authenticated_client.get(url, {'company': 'Company 1', 'page': 2})
+    assert response.context['page'].paginator.count == 20
+    assert response.context['page'].number == 1
+    response = authenticated_client.get(url, {'supervisor': 'Supervisor'})
+    assert response.context['page'].paginator.count == 61
+    assert response.context['page'][0] == employee
+    assert f'{url}?company=Company%201' in authenticated_client.get(reverse('org_rollup')).content.decode()
+
+    response = authenticated_client.get(reverse('org_rollup_export', kwargs={'fmt': 'csv'}), {'level': 'team'})
+    lines = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8-sig'))))
+    assert lines[0][:4] == ['company', 'team', 'employees', 'active_coaches']
+    assert lines[1][:4] == ['Company', 'Good Team', '1', '1']
+    assert authenticated_client.get(reverse('org_rollup_export', kwargs={'fmt': 'pdf'})).status_code == 404
+
+
+@pytest.mark.django_db
+def test_bulk_enrollment_view(authenticated_client, django_assert_max_num_queries, participant, training_course):
+    people = Participant.objects.bulk_create([
+        Participant(first_name=f'P{i}', last_name='Test', gender=1, e_mail=f'p{i}@example.com', phone_number=i)
+        for i in range(6)])
+    overlapping_course = TrainingCourse.objects.create(
+        topic='Overlapping Course', start_time=training_course.start_time + timedelta(hours=1),
+        end_time=training_course.end_time + timedelta(hours=1), category=1, path=1, formula=1,
+        participants_limit=5, coach=training_course.coach, took_place=None)
+    Enrollment.objects.create(participant=people[0], training_course=overlapping_course)
+    ids = [person.pk for person in people]
+
+    with django_assert_max_num_queries(15):
+        response = authenticated_client.post(reverse('bulk_enrollment'), {
+            'training_course': training_course.pk,
+            'participant_ids': f'{participant.pk}, abc\n999999 {" ".join(map(str, ids))} {ids[1]}',
+        })
+    result = response.context['result']
+    # Limit 5 miejsc: jedno zajęte, uczestnik z kolizją odrzucony, kolejni do wyczerpania miejsc
+    assert result.added == ids[1:5]
+    assert result.skipped == [(participant.pk, 'Uczestnik jest już zapisany na to szkolenie.')]
+    assert [value for value, _ in result.rejected] == ['abc', 999999, ids[0], ids[5]]
+    assert 'Overlapping Course' in result.rejected[2][1]
+    assert training_course.participant_set.count() == 5
+
+    # Plik CSV z nagłówkiem participant; wszyscy są już zapisani lub brak miejsc
+    upload = SimpleUploadedFile('ids.csv', f'name,participant\nx,{ids[1]}\ny,{ids[5]}\n'.encode())
+    result = authenticated_client.post(reverse('bulk_enrollment'), {
+        'training_course': training_course.pk, 'file': upload}).context['result']
+    assert (result.added, [pk for pk, _ in result.skipped], [pk for pk, _ in result.rejected]) == ([], [ids[1]], [ids[5]])
+
+
+@pytest.mark.django_db
+def test_bulk_enrollment_api(authenticated_client, training_course, past_training_course):
+    people = Participant.objects.bulk_create([
+        Participant(first_name=f'P{i}', last_name='Test', gender=1, e_mail=f'p{i}@example.com', phone_number=i)
+        for i in range(3)])
+    url = reverse('api_bulk_enrollment', kwargs={'pk': training_course.pk})
+
+    response = authenticated_client.post(url, {'participants': [people[0].pk, str(people[1].pk)]},
+                                         content_type='application/json')
+    assert response.json() == {'added': [people[0].pk, people[1].pk], 'skipped': [], 'rejected': []}
+
+    response = authenticated_client.post(url, f'participant\n{people[1].pk}\n{people[2].pk}\n',
+                                         content_type='text/csv')
+    assert response.json()['added'] == [people[2].pk]
+    assert response.json()['skipped'][0]['participant'] == people[1].pk
+    assert training_course.participant_set.count() == 3
+
+    assert authenticated_client.post(url, {'participants': [{}]}, content_type='application/json').status_code == 400
+    assert authenticated_client.post(url, 'nie json', content_type='application/json').status_code == 400
+    past_url = reverse('api_bulk_enrollment', kwargs={'pk': past_training_course.pk})
+    assert authenticated_client.post(past_url, {'participants': []}, content_type='application/json').status_code == 404
+
+
+@pytest.mark.django_db
+def test_enrollment_matrix_diff(django_assert_max_num_queries, employee, training_course):
+    courses = [training_course] + [TrainingCourse.objects.create(
+        topic=f'Course {i}', start_time=training_course.start_time + timedelta(days=i),
+        end_time=training_course.end_time + timedelta(days=i), category=1, path=1, formula=1,
+        participants_limit=100, coach=employee, took_place=None) for i in range(1, 4)]
+    course_ids = [course.pk for course in courses]
+    people = Participant.objects.bulk_create([
+        Participant(first_name=f'P{i}', last_name='Test', gender=1, e_mail=f'p{i}@example.com', phone_number=i)
+        for i in range(80)])
+    ids = [person.pk for person in people]
+    Enrollment.objects.bulk_create([Enrollment(participant=person, training_course=courses[1]) for person in people])
+
+    with django_assert_max_num_queries(1):
+        original = enrollment_bitsets(course_ids, ids)
+    assert set(original.values()) == {0b10}
+
+    # Wszyscy przechodzą ze szkolenia 1 na szkolenia 2 i 3
+    added, removed = matrix_diff(course_ids, original, dict.fromkeys(ids, 0b1100))
+    assert (len(added), len(removed)) == (160, 80)
+    with django_assert_max_num_queries(12):
+        assert apply_matrix_diff(added, removed) == (160, 80)
+    assert set(enrollment_bitsets(course_ids, ids).values()) == {0b1100}
+
+    # Przekroczenie limitu pierwszego szkolenia (5 miejsc) - nic nie jest zapisywane
+    added, removed = matrix_diff(course_ids, dict.fromkeys(ids, 0b1100), dict.fromkeys(ids, 0b1101))
+    with pytest.raises(ValidationError, match='Python Course'):
+        apply_matrix_diff(added, removed)
+    assert not Enrollment.objects.filter(training_course=training_course).exists()
+
+
+@pytest.mark.django_db
+def test_enrollment_matrix_rejects_double_booking(django_assert_num_queries, employee, training_course, participant,
+                                                  participant_without_course):
+    overlapping = TrainingCourse.objects.create(
+        topic='Excel', start_time=training_course.start_time + timedelta(hours=1),
+        end_time=training_course.end_time + timedelta(hours=1), category=1, path=1, formula=1,
+        participants_limit=5, coach=employee)
+    later = TrainingCourse.objects.create(
+        topic='Word', start_time=training_course.end_time, end_time=training_course.end_time + timedelta(hours=3),
+        category=1, path=1, formula=1, participants_limit=5, coach=employee)
+
+    # Kolizja z istniejącym zapisem i między dwoma nowymi zapisami - nic nie jest zapisywane
+    added = [(participant.pk, overlapping.pk), (participant_without_course.pk, overlapping.pk),
+             (participant_without_course.pk, later.pk)]
+    # Jedno zapytanie o szkolenia i jedno o zapisy, niezależnie od liczby szkoleń
+    with django_assert_num_queries(2):
+        assert len(added_conflicts(added)) == 2
+    with pytest.raises(ValidationError) as error:
+        apply_matrix_diff(added, [])
+    assert error.value.messages == [
+        'Anna Nowak: szkolenie Excel odbywa się w tym samym czasie co szkolenie Python Course.',
+        'Anna Nowak: szkolenie Word odbywa się w tym samym czasie co szkolenie Excel.',
+    ]
+    assert not Enrollment.objects.filter(training_course__in=[overlapping, later]).exists()
+
+    # Przeniesienie na szkolenie w tym samym terminie (wypisanie z kolidującego) jest dozwolone
+    assert apply_matrix_diff([(participant.pk, overlapping.pk)], [(participant.pk, training_course.pk)]) == (1, 1)
+    assert dict(participant.enrollment_set.values_list('training_course_id', 'status')) == {
+        training_course.pk: ENROLLMENT_CANCELLED, overlapping.pk: ENROLLMENT_ACTIVE}
+
+
+@pytest.mark.django_db
+def test_enrollment_matrix_view_applies_only_changed_cells(authenticated_client, participant, training_course):
+    other = Participant.objects.create(first_name='Ewa', last_name='Zielińska', gender=1, e_mail='ewa@example.com',
+                                       phone_number=123456789)
+    url = reverse('enrollment_matrix') + f'?courses={training_course.pk}'
+    response = authenticated_client.get(url)
+    rows = {row['participant']: row for row in response.context['rows']}
+    assert rows[participant]['cells'] == [(training_course.pk, True)]
+    assert rows[other]['cells'] == [(training_course.pk, False)]
+
+    # W międzyczasie ktoś inny wypisał uczestnika; użytkownik zmienia tylko drugi wiersz
+    Enrollment.objects.filter(participant=participant).delete()
+    response = authenticated_client.post(url, {
+        'columns': str(training_course.pk),
+        'row': [f'{participant.pk}:{rows[participant]["bits"]}', f'{other.pk}:{rows[other]["bits"]}'],
+        'cell': [f'{participant.pk}:{training_course.pk}', f'{other.pk}:{training_course.pk}'],
+    })
+    assert response.context['message'] == 'Zapisano uczestników: 1, wypisano uczestników: 0.'
+    assert list(training_course.participant_set.all()) == [other]
+
+    assert authenticated_client.post(url, {'columns': 'x'}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_cancelled_enrollment_frees_place_and_can_be_restored(authenticated_client, settings, participant,
+                                                              participant_without_course, training_course):
+    settings.OVERBOOKING_MAX_RATE = 0
+    training_course.participants_limit = 1
+    training_course.save()
+    Enrollment.objects.filter(participant=participant).update(present=True)
+
+    # Wypisanie w macierzy anuluje zapis - uczestnik znika z list, a miejsce się zwalnia
+    assert apply_matrix_diff([], [(participant.pk, training_course.pk)]) == (0, 1)
+    assert Enrollment.objects.get(participant=participant).status == ENROLLMENT_CANCELLED
+    response = authenticated_client.get(reverse('course_participants', kwargs={'pk': training_course.pk}))
+    assert not response.context['enrollments']
+    assert not authenticated_client.get(reverse('participants_list')).context['participants_courses'][participant]
+    assert authenticated_client.get(
+        reverse('course_details', kwargs={'pk': training_course.pk})).context['participants_count'] == 0
+    assert bulk_enroll(training_course, [participant_without_course.pk]).added == [participant_without_course.pk]
+    assert bulk_enroll(training_course, [participant.pk]).rejected == [
+        (participant.pk, "Limit uczestników został osiągnięty.")]
+
+    # Ponowny zapis przywraca anulowany wiersz jako nowy zapis
+    apply_matrix_diff([], [(participant_without_course.pk, training_course.pk)])
+    response = authenticated_client.post(reverse('edit_participant'), {
+        'participant': participant.pk, 'training_course': training_course.pk})
+    assert response.status_code == 302
+    enrollment = Enrollment.objects.get(participant=participant)
+    assert (enrollment.status, enrollment.present) == (ENROLLMENT_ACTIVE, None)
+    assert enrollment_bitsets([training_course.pk], [participant.pk, participant_without_course.pk]) == {
+        participant.pk: 1, participant_without_course.pk: 0}
+
+
+@pytest.mark.django_db
+def test_qr_checkin(authenticated_client, django_assert_num_queries, participant, participant_without_course,
+                    training_course):
+    response = authenticated_client.get(reverse('course_scanner', kwargs={'pk': training_course.pk}))
+    key = response.context['scanner_key']
+    badges = authenticated_client.get(reverse('course_badges', kwargs={'pk': training_course.pk})).context['badges']
+    token = badges[0]['token']
+    assert badges[0]['participant'] == participant
+
+    # Punkt końcowy nie używa sesji: bez logowania, bez ciasteczek i bez tokenu CSRF
+    client = Client(enforce_csrf_checks=True)
+    tokens = [token, participant_token(participant_without_course.pk), token[:-1] + 'x', 'abc']
+    # Oznaczenie obecności, zapisy pozostałych uczestników i nowa wersja raportu frekwencji
+    with django_assert_num_queries(3):
+        response = client.post(reverse('checkin'), {'key': key, 'tokens': tokens}, content_type='application/json')
+    assert response.json() == {'present': [participant.pk], 'already': [], 'unknown': [participant_without_course.pk],
+                               'invalid': 2}
+    assert not response.cookies and 'Cookie' not in response.get('Vary', '')
+    assert Enrollment.objects.get(participant=participant).present is True
+
+    # Ponowne skanowanie nie zmienia danych
+    with django_assert_num_queries(2):
+        response = client.post(reverse('checkin'), {'key': key, 'tokens': [token]}, content_type='application/json')
+    assert response.json()['already'] == [participant.pk]
+
+
+@pytest.mark.django_db
+def test_qr_checkin_rejects_bad_scanner_key(settings, participant, training_course, past_training_course):
+    client = Client()
+    url = reverse('checkin')
+    tokens = [participant_token(participant.pk)]
+    # Klucz innego szkolenia - uczestnik nie jest na nie zapisany
+    response = client.post(url, {'key': scanner_key(past_training_course.pk), 'tokens': tokens},
+                           content_type='application/json')
+    assert response.json()['unknown'] == [participant.pk]
+    # Token uczestnika nie jest kluczem stanowiska (inna sól podpisu)
+    assert client.post(url, {'key': tokens[0], 'tokens': tokens}, content_type='application/json').status_code == 403
+    assert client.post(url, {'key': scanner_key(training_course.pk), 'tokens': 'x'},
+                       content_type='application/json').status_code == 400
+
+    settings.CHECKIN_SCANNER_MAX_AGE = -1
+    response = client.post(url, {'key': scanner_key(training_course.pk), 'tokens': tokens},
+                           content_type='application/json')
+    assert response.status_code == 403
+    assert Enrollment.objects.get(participant=participant).present is None
+
+
+@pytest.mark.django_db
+def test_presence_sync_last_write_wins(authenticated_client, django_assert_max_num_queries, participant,
+                                       participant_without_course, training_course):
+    url = reverse('presence_sync', kwargs={'pk': training_course.pk})
+    now_ms = int(timezone.now().timestamp() * 1000)
+    changes = [
+        {'participant': participant.pk, 'present': False, 'at': now_ms - 60000},
+        {'participant': participant.pk, 'present': True, 'at': now_ms - 30000},
+        {'participant': participant_without_course.pk, 'present': True, 'at': now_ms - 30000},
+    ]
+    # Sesja, użytkownik, szkolenie, klucz porcji, zapisy, jedna aktualizacja, zapis klucza i wersja raportu
+    # frekwencji - bez względu na liczbę zmian
+    with django_assert_max_num_queries(11):
+        response = authenticated_client.post(url, {'key': 'batch-1', 'changes': changes},
+                                             content_type='application/json')
+    assert response.json() == {'applied': [participant.pk], 'stale': [], 'unknown': [participant_without_course.pk]}
+    enrollment = Enrollment.objects.get(participant=participant)
+    assert enrollment.present is True
+
+    # Starsza zmiana z innego urządzenia, która dotarła później, nie nadpisuje nowszej
+    response = authenticated_client.post(url, {'key': 'batch-2', 'changes': [
+        {'participant': participant.pk, 'present': None, 'at': now_ms - 45000}]}, content_type='application/json')
+    assert response.json()['stale'] == [participant.pk]
+
+    # Zmiana z formularza listy obecności jest nowsza niż zmiany zapisane wcześniej bez sieci
+    authenticated_client.post(reverse('course_presence_list', kwargs={'pk': training_course.pk}), {})
+    response = authenticated_client.post(url, {'key': 'batch-3', 'changes': [
+        {'participant': participant.pk, 'present': True, 'at': now_ms - 1000}]}, content_type='application/json')
+    assert response.json()['stale'] == [participant.pk]
+    assert Enrollment.objects.get(participant=participant).present is False
+
+    # Ponowienie porcji zwraca zapisany wynik i niczego nie zmienia
+    with django_assert_max_num_queries(4):
+        response = authenticated_client.post(url, {'key': 'batch-1', 'changes': changes},
+                                             content_type='application/json')
+    assert response.json()['applied'] == [participant.pk]
+    assert Enrollment.objects.get(participant=participant).present is False
+
+
+@pytest.mark.django_db
+def test_presence_page_works_offline(authenticated_client, participant, training_course):
+    url = reverse('presence_sync', kwargs={'pk': training_course.pk})
+    for body in ('nie json', {'key': 'x'}, {'key': 'x', 'changes': [{'participant': '1', 'present': True, 'at': 0}]},
+                 {'key': '', 'changes': []}):
+        response = authenticated_client.post(url, body, content_type='application/json')
+        assert response.status_code == 400
+
+    response = authenticated_client.get(reverse('course_presence_list', kwargs={'pk': training_course.pk}))
+    content = response.content.decode()
+    assert static('trainings/presence.js') in content
+    assert url in content
+
+    response = authenticated_client.get(reverse('presence_service_worker'))
+    assert response['Content-Type'] == 'application/javascript'
+    assert static('trainings/presence.js') in response.content.decode()
+    # Zasięg service workera (katalog skryptu) obejmuje strony list obecności
+    assert reverse('course_presence_list', kwargs={'pk': training_course.pk}).startswith(
+        reverse('presence_service_worker').rsplit('/', 1)[0] + '/')
+
+
+@pytest.mark.django_db
+def test_send_reminders(django_assert_max_num_queries, mailoutbox, participant, participant_without_course,
+                        training_course):
+    TrainingCourse.objects.filter(pk=training_course.pk).update(start_time=timezone.now() + timedelta(hours=3))
+    participant_without_course.training_course.add(training_course)
+    later = TrainingCourse.objects.create(
+        topic='Django', start_time=timezone.now() + timedelta(days=3), end_time=timezone.now() + timedelta(days=3, hours=2),
+        category=1, path=1, formula=2, participants_limit=5, coach=training_course.coach)
+    participant.training_course.add(later)
+
+    # Dwa zapytania o szkolenia i zapisy oraz oznaczenie porcji - bez zapytań dla każdej wiadomości
+    with django_assert_max_num_queries(6):
+        result = send_reminders(lead_time=timedelta(hours=24), batch_size=10)
+    assert result == {'courses': 1, 'sent': 2, 'skipped': 0}
+    assert [message.to for message in mailoutbox] == [[participant.e_mail], [participant_without_course.e_mail]]
+    assert 'Python Course' in mailoutbox[0].subject
+    assert training_course.coach.name in mailoutbox[0].body
+    assert not Enrollment.objects.filter(training_course=training_course, reminder_sent_at__isnull=True).exists()
+    assert Enrollment.objects.get(training_course=later).reminder_sent_at is None
+
+    # Kolejne uruchomienie nie wysyła przypomnień ponownie
+    out = io.StringIO()
+    call_command('send_reminders', '--hours', '24', stdout=out)
+    assert 'Wysłano przypomnień: 0' in out.getvalue()
+    assert len(mailoutbox) == 2
+    with pytest.raises(CommandError):
+        call_command('send_reminders', '--batch-size', '0')
+
+
+class FailingEmailBackend(LocmemEmailBackend):
+    """
+    Serwer poczty przyjmujący tylko określoną liczbę wiadomości.
+    """
+    def __init__(self, accepted, **kwargs):
+        super().__init__(**kwargs)
+        self.accepted = accepted
+        self.opened = 0
+
+    def open(self):
+        self.opened += 1
+
+    def send_messages(self, messages):
+        if self.accepted < len(messages):
+            raise ConnectionError('Serwer poczty niedostępny')
+        self.accepted -= len(messages)
+        return super().send_messages(messages)
+
+
+@pytest.mark.django_db
+def test_send_reminders_resumes_after_failure(mailoutbox, participant, participant_without_course, training_course):
+    TrainingCourse.objects.filter(pk=training_course.pk).update(start_time=timezone.now() + timedelta(hours=3))
+    participant_without_course.training_course.add(training_course)
+    third = Participant.objects.create(first_name='Ewa', last_name='Lis', gender=1, e_mail='lis@example.com',
+                                       phone_number=1)
+    third.training_course.add(training_course)
+
+    connection = FailingEmailBackend(accepted=1)
+    with pytest.raises(ConnectionError):
+        send_reminders(lead_time=timedelta(hours=24), batch_size=2, connection=connection)
+    assert connection.opened == 1
+    assert len(mailoutbox) == 1
+    # Oznaczenie niewysłanych przypomnień z przerwanej porcji zostało cofnięte
+    assert Enrollment.objects.filter(reminder_sent_at__isnull=False).count() == 1
+
+    delays = []
+    result = send_reminders(lead_time=timedelta(hours=24), batch_size=2, rate=1000,
+                            connection=FailingEmailBackend(accepted=10), sleep=delays.append)
+    assert result['sent'] == 2
+    assert len(delays) == 2
+    assert len(mailoutbox) == 3
+    assert not Enrollment.objects.filter(reminder_sent_at__isnull=True).exists()
+
+
+@pytest.mark.django_db
+def test_deleted_course_is_hidden_until_purged(authenticated_client, django_capture_on_commit_callbacks, employee,
+                                               participant, training_course):
+    call_command('refresh_org_rollups', stdout=io.StringIO())
+    with django_capture_on_commit_callbacks(execute=True):
+        response = authenticated_client.post(reverse('courses_list'), {'delete': True, 'course_id': training_course.pk})
+    assert response.status_code == 302
+
+    # Szkolenie znika od razu ze stron, raportów, zestawień i wyszukiwania, a zapisy czekają na usunięcie
+    assert not TrainingCourse.objects.filter(pk=training_course.pk).exists()
+    assert TrainingCourse.all_objects.filter(pk=training_course.pk).exists()
+    assert Enrollment.objects.filter(training_course_id=training_course.pk).exists()
+    assert authenticated_client.get(reverse('course_details', kwargs={'pk': training_course.pk})).status_code == 404
+    assert not participant.training_course.exists()
+    assert attendance_stats()['total']['enrolled'] == 0
+    assert OrgRollup.objects.get(company=employee.company).courses == 0
+    assert authenticated_client.get(reverse('search'), {'q': 'pyth'}).context['page'].paginator.count == 0
+    response = authenticated_client.get(reverse('api', kwargs={'resource': 'presence'}))
+    assert response.json()['results'] == []
+
+    # Pracownik bez aktywnych szkoleń może zostać usunięty; z bazy znika po usunięciu jego szkoleń
+    authenticated_client.post(reverse('employees_list'), {'delete': True, 'employee_id': employee.pk})
+    assert not Employee.objects.filter(pk=employee.pk).exists()
+
+    out = io.StringIO()
+    call_command('purge_deleted', '--pause', '0', stdout=out)
+    assert 'Usunięto szkolenia: 1, pracowników: 1, zapisy: 1' in out.getvalue()
+    assert not TrainingCourse.all_objects.exists()
+    assert not Employee.all_objects.exists()
+    assert not Enrollment.objects.exists()
+    assert Participant.objects.filter(pk=participant.pk).exists()
+
+
+@pytest.mark.django_db
+def test_purge_deleted_in_batches(django_assert_max_num_queries, participant, participant_without_course,
+                                  training_course, past_training_course):
+    for number in range(3):
+        Participant.objects.create(first_name='Jan', last_name=f'Nr {number}', gender=2, e_mail='jan@example.com',
+                                   phone_number=number).training_course.add(training_course)
+    participant_without_course.training_course.add(past_training_course)
+    PresenceSyncBatch.objects.create(key='batch', training_course=training_course)
+    training_course.soft_delete()
+
+    statements = []
+    def record(execute, sql, params, many, context):
+        statements.append(sql)
+        return execute(sql, params, many, context)
+
+    delays = []
+    with connection.execute_wrapper(record):
+        result = purge_deleted(batch_size=2, pause=0.5, sleep=delays.append)
+    assert result == {'enrollments': 4, 'presence_batches': 1, 'courses': 1, 'employees': 0, 'batches': 6}
+    # Każda porcja to osobna transakcja z jednym zapytaniem DELETE, z przerwą między porcjami
+    assert sum(sql.startswith('DELETE') for sql in statements) == 6
+    assert delays == [0.5] * 5
+    assert list(Enrollment.objects.values_list('training_course_id', flat=True)) == [past_training_course.pk]
+
+    # Szkolenie z zapisami (np. dopisanymi po odczycie listy szkoleń) zostaje do kolejnego przebiegu
+    past_training_course.soft_delete()
+    with connection.cursor() as cursor:
+        cursor.execute(delete_courses_sql(1), [past_training_course.pk])
+        assert cursor.rowcount == 0
+    # Odczyt szkoleń i po jednym DELETE dla zapisów, porcji synchronizacji, szkoleń i pracowników
+    # (w teście transakcja porcji to punkt zapisu: SAVEPOINT, DELETE, RELEASE)
+    with django_assert_max_num_queries(1 + 4 * 3):
+        assert purge_deleted(batch_size=10, pause=0)['courses'] == 1
+    assert not TrainingCourse.all_objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_soft_delete_migration_is_reversible(training_course):
+    training_course.soft_delete()
+
+    # Wyzwalacze indeksu z warunkiem na deleted_at nie mogą blokować usunięcia kolumny
+    call_command('migrate', 'trainings', '0011', verbosity=0)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT rowid FROM trainings_search WHERE trainings_search MATCH 'python'")
+        assert cursor.fetchall() == [(training_course.pk * 4 + 1,)]
+    call_command('migrate', 'trainings', '0003', verbosity=0)
+
+    call_command('migrate', verbosity=0)
+    assert TrainingCourse.objects.get().deleted_at is None
+    course = TrainingCourse.objects.create(
+        topic='Excel', category=1, path=1, formula=1, participants_limit=10, coach=training_course.coach,
+        start_time=timezone.now(), end_time=timezone.now() + timedelta(hours=1))
+    course.soft_delete()
+    assert SearchResults('excel').count() == 0
@@ -0,0 +1,78 @@
+"""
+Krótkotrwała pamięć podręczna zalogowanych użytkowników w obrębie procesu.
+
+Kluczem jest (backend, ID użytkownika, skrót hasła zapisany w sesji), więc zmiana hasła tworzy
+nowy klucz, a wpisy dla starego skrótu są usuwane sygnałem post_save modelu User (tak samo
+przy wylogowaniu). Inne procesy mogą zwracać nieaktualny obiekt najwyżej przez
+settings.AUTH_USER_CACHE_TTL sekund; wartość 0 wyłącza pamięć podręczną.
+"""
+import copy
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+
+MAX_ENTRIES = 10000
+
+_users = {}
+_lock = threading.Lock()
+
+
+def _cache_key(session):
+    user_id = session.get(SESSION_KEY)
+    auth_hash = session.get(HASH_SESSION_KEY)
+    if user_id is None or auth_hash is None:
+        return None
+    return session.get(BACKEND_SESSION_KEY), str(user_id), auth_hash
+
+
+def get_cached_user(request):
+    """
+    Zwraca użytkownika zalogowanego w sesji żądania, korzystając z pamięci podręcznej procesu.
+
+    :param request: Obiekt żądania HTTP.
+
+    return:
+        User | AnonymousUser: Kopia obiektu użytkownika (zmiany w jednym żądaniu nie przechodzą na kolejne).
+    """
+    ttl = getattr(settings, 'AUTH_USER_CACHE_TTL', 0)
+    key = _cache_key(request.session) if ttl else None
+    if key is not None:
+        entry = _users.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return copy.copy(entry[1])
+
+    user = auth.get_user(request)
+    if key is not None and user.is_authenticated:
+        with _lock:
+            if len(_users) >= MAX_ENTRIES:
+                now = time.monotonic()
+                for stale in [k for k, (expires, _) in _users.items() if expires <= now]:
+                    del _users[stale]
+                if len(_users) >= MAX_ENTRIES:
+                    _users.clear()
+            _users[key] = (time.monotonic() + ttl, copy.copy(user))
+    return user
+
+
+aget_cached_user = sync_to_async(get_cached_user)
+
+
+def forget_user(user_id):
+    """
+    Usuwa z pamięci podręcznej wszystkie wpisy użytkownika (po wylogowaniu lub zmianie danych/hasła).
+
+    :param user_id: ID użytkownika.
+    """
+    user_id = str(user_id)
+    with _lock:
+        for key in [key for key in _users if key[1] == user_id]:
+            del _users[key]
+
+
+def clear():
+    with _lock:
+        _users.clear()
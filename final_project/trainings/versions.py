@@ -0,0 +1,47 @@
+"""
+Wersje danych współdzielone przez wszystkie procesy serwera.
+
+Projekt nie konfiguruje wspólnego cache (CACHES), więc domyślny LocMemCache działa osobno w każdym
+procesie - znacznik zmiany zapisany w cache unieważniałby wpisy tylko w procesie, który obsłużył
+zmianę, a pozostałe zwracałyby nieaktualne dane. Wersje przechowywane są więc w tabeli DataVersion:
+zmiana to jedno zapytanie INSERT ... ON CONFLICT DO UPDATE, a odczyt jedno zapytanie po kluczu
+głównym. Wpisy w cache procesu mają wersję w kluczu, więc zmiana wersji w dowolnym procesie
+unieważnia je we wszystkich. Zmiana wykonana w transakcji, która zostanie wycofana, jest wycofywana razem z nią.
+"""
+import time
+
+from .models import DataVersion
+
+
+def bump(*keys):
+    """
+    Ustawia nową wersję (bieżący czas w nanosekundach) podanych danych.
+
+    :param keys (str): Nazwy wersjonowanych danych.
+
+    return:
+        int: Nowa wersja.
+    """
+    version = time.time_ns()
+    DataVersion.objects.bulk_create([DataVersion(key=key, version=version) for key in keys],
+                                    update_conflicts=True, unique_fields=['key'], update_fields=['version'])
+    return version
+
+
+def get_versions(keys):
+    """
+    Zwraca wersje podanych danych jednym zapytaniem.
+
+    :param keys (iterable): Nazwy wersjonowanych danych.
+
+    return:
+        dict: {nazwa: wersja}; dane, które jeszcze się nie zmieniły, są pomijane.
+    """
+    return dict(DataVersion.objects.filter(key__in=keys).values_list('key', 'version'))
+
+
+def get_version(key):
+    """
+    Zwraca wersję danych (0, jeśli jeszcze się nie zmieniły).
+    """
+    return get_versions([key]).get(key, 0)
@@ -1,35 +1,162 @@
 import base64
+import hashlib
 import io
-import matplotlib.pyplot as plt
+import json
+import mimetypes
+import os
 
+from asgiref.sync import sync_to_async
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 from weasyprint import HTML
 
+from django.conf import settings
+from django.core import signing
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
 from django.contrib.auth import login, logout
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import get_object_or_404, redirect, render
+from django.contrib.auth.views import redirect_to_login
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation, ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, Q, Sum
+from django.shortcuts import aget_object_or_404, get_object_or_404, redirect, render
 from django.template.loader import render_to_string
 from django.urls import reverse_lazy
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
 from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
 from django.views.generic import FormView, View
-from django.http import HttpResponse
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+)
 
+from . import snapshots
+from .analytics import DIMENSIONS, attendance_stats, invalidate_attendance_stats
+from .api import RESOURCES, ApiError
+from .bulk_enrollment import MAX_PARTICIPANTS, bulk_enroll, read_participant_ids
+from .checkin import (
+    MAX_BATCH as CHECKIN_MAX_BATCH, check_in, participant_token, qr_svg, scanner_course, scanner_key
+)
+from .charts import CHARTS, coach_hours, render_bar_chart_png
+from .exports import DATASET_LABELS, async_chunks, stream_export, stream_table
+from .middleware import accepted_encoding
 from .models import (
+    ENROLLMENT_ACTIVE,
+    PATHS,
     TrainingCourse,
     Employee,
     Participant,
-    PresenceList
+    Enrollment,
+    reenrollment
 )
 from .forms import (
     AddCourseForm,
     AddEmployeeForm,
     AddParticipantForm,
+    BulkEnrollmentForm,
+    CourseFilterForm,
     EditCourseFutureForm,
     EditCoursePastForm,
     EditEmployeeForm,
     EditParticipantForm,
-    LoginForm
+    EnrollmentMatrixForm,
+    FreeCoachSearchForm,
+    ImportPeopleForm,
+    LoginForm,
+    OrgReportForm,
+    SearchForm
 )
+from .importers import DEFAULT_BATCH_SIZE, import_people
+from .matrix import apply_matrix_diff, decode_bits, encode_bits, enrollment_bitsets, matrix_diff
+from .rollups import LEVELS as ORG_LEVELS, employee_totals, level_rows, with_rates
+from .scheduling import free_coaches
+from .presence_sync import SyncError, apply_changes, parse_changes
+from .search import SearchResults
+
+
+# Ograniczona pula wątków, do której widoki asynchroniczne przekazują blokujące renderowanie
+# szablonów HTML i plików PDF, tak aby nie blokować pętli zdarzeń serwera ASGI.
+RENDER_EXECUTOR = ThreadPoolExecutor(max_workers=settings.ASYNC_RENDER_WORKERS, thread_name_prefix='render')
+
+
+async def afetch(queryset):
+    """
+    Asynchronicznie wykonuje zapytanie i zwraca ten sam queryset z wypełnioną pamięcią podręczną wyników.
+
+    Dzięki temu szablon (renderowany poza pętlą zdarzeń) iteruje po gotowych obiektach
+    i nie wykonuje już zapytań do bazy danych.
+
+    :param queryset: QuerySet do wykonania.
+
+    return:
+        QuerySet: Wykonany queryset.
+    """
+    async for _ in queryset:
+        pass
+    return queryset
+
+
+def course_enrollments(course):
+    """
+    Zwraca aktywne (nieanulowane) zapisy na szkolenie wraz z danymi uczestników (jedno zapytanie z JOIN).
+
+    :param course: Szkolenie.
+
+    return:
+        QuerySet: Zapisy na szkolenie z uczestnikami.
+    """
+    return Enrollment.objects.filter(training_course=course, status=ENROLLMENT_ACTIVE).select_related(
+        'participant').order_by('pk')
+
+
+async def arender(request, template_name, ctx):
+    """
+    Renderuje szablon w puli RENDER_EXECUTOR.
+
+    :param request: Obiekt żądania HTTP.
+    :param template_name: Nazwa szablonu.
+    :param ctx: Kontekst szablonu (bez leniwych zapytań do bazy danych).
+
+    return:
+        HttpResponse: Odpowiedź HTTP z wyrenderowanym szablonem.
+    """
+    return await sync_to_async(render, thread_sensitive=False, executor=RENDER_EXECUTOR)(request, template_name, ctx)
+
+
+def render_pdf_response(template_name, ctx, filename):
+    """
+    Renderuje szablon HTML do pliku PDF i zwraca go jako załącznik.
+
+    :param template_name: Nazwa szablonu HTML.
+    :param ctx: Kontekst szablonu.
+    :param filename: Nazwa pobieranego pliku.
+
+    return:
+        HttpResponse: Odpowiedź HTTP zawierająca plik PDF.
+    """
+    html_string = render_to_string(template_name, ctx)  # Renderuje szablon HTML
+    html = HTML(string=html_string)     # Tworzy obiekt HTML z wygenerowanego stringu HTML
+    result = html.write_pdf() # Generuje plik PDF z obiektu HTML i zapisuje go w result
+
+    # Utwórz odpowiedź z plikiem PDF
+    response = HttpResponse(content_type='application/pdf')     # Tworzy odpowiedź HTTP z typem zawartości application/pdf
+    # Ustawia nagłówek Content-Disposition, który sugeruje przeglądarce,
+    # że odpowiedź zawiera plik do pobrania
+    response['Content-Disposition'] = f'attachment; filename={filename}'
+    response.write(result)      # Zapisuje wygenerowany PDF do odpowiedzi
+    return response
+
+
+async def arender_pdf_response(template_name, ctx, filename):
+    """
+    Asynchroniczna wersja render_pdf_response wykonywana w puli RENDER_EXECUTOR.
+    """
+    return await sync_to_async(render_pdf_response, thread_sensitive=False, executor=RENDER_EXECUTOR)(
+        template_name, ctx, filename)
 
 
 class MainView(View):
@@ -48,7 +175,10 @@ class MainView(View):
         return:
             HttpResponse: Odpowiedź HTTP z wyrenderowanym szablonem 'main.html'.
         """
-        return render(request, 'main.html')
+        ctx = {
+            'exports': DATASET_LABELS
+        }
+        return render(request, 'main.html', ctx)
 
 
 class AuthenticatedView(LoginRequiredMixin, View):
@@ -63,6 +193,28 @@ class AuthenticatedView(LoginRequiredMixin, View):
     redirect_field_name = 'redirect_to'
 
 
+class AsyncAuthenticatedView(View):
+    """
+    Bazowa klasa widoków asynchronicznych (ASGI), dostępnych tylko dla zalogowanych użytkowników.
+
+    Użytkownik jest pobierany asynchronicznie (request.auser()) i zapisywany w request.user,
+    dzięki czemu szablony renderowane poza pętlą zdarzeń nie odpytują ponownie bazy danych.
+
+    Atrybuty:
+    - login_url (str): URL strony logowania, na którą użytkownik zostanie przekierowany, jeśli nie jest zalogowany.
+    - redirect_field_name (str): Nazwa parametru URL, który określa, gdzie przekierować użytkownika po zalogowaniu.
+    """
+    login_url = AuthenticatedView.login_url
+    redirect_field_name = AuthenticatedView.redirect_field_name
+
+    async def dispatch(self, request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path(), self.login_url, self.redirect_field_name)
+        request.user = user
+        return await super().dispatch(request, *args, **kwargs)
+
+
 class EmployeesView(AuthenticatedView):
     """
     Widok do zarządzania danymi pracowników, dostępny tylko dla zalogowanych użytkowników.
@@ -82,19 +234,15 @@ class EmployeesView(AuthenticatedView):
         return:
             employees_data: Lista słowników zawierających obiekty pracowników i ich łączny czas trwania szkoleń.
         """
-        employees = Employee.objects.all()
+        # Suma czasów trwania liczona w bazie danych jednym zapytaniem
+        employees = Employee.objects.annotate(total_seconds=Sum(
+            'trainingcourse__duration_seconds', filter=Q(trainingcourse__deleted_at__isnull=True)))
         employees_data = []
 
         for employee in employees:
-            total_duration = timedelta(seconds=0)
-            courses = TrainingCourse.objects.filter(coach=employee)
-
-            for course in courses:
-                total_duration += course.duration
-
             employees_data.append({
                 'employee': employee,
-                'total_duration': total_duration,
+                'total_duration': timedelta(seconds=employee.total_seconds or 0),
             })
         return employees_data
 
@@ -138,41 +286,18 @@ class EmployeesView(AuthenticatedView):
                 }
                 return render(request, 'employees_list.html', ctx)
             else:
-                employee.delete()
+                # Pracownik znika od razu, a z bazy usuwa go polecenie purge_deleted
+                employee.soft_delete()
                 return redirect('employees_list')
 
         elif 'generate_chart' in request.POST:
-            employees_data = self.get_employees_data()
-            employees_names = []
-            total_durations = []
-
-            for data in employees_data:
-                employees_names.append(f"{data['employee'].first_name} {data['employee'].last_name}")
-                total_durations.append(data['total_duration'].total_seconds() / 3600)
-
-            plt.figure(figsize=(10, 6))         # Rozmiar wykresu
-            # Wykres słupkowy, pracownicy na osi x, czas na osi y, kolor
-            plt.bar(employees_names, total_durations, color='blue')
-            # Etykiety
-            plt.xlabel('Pracownicy')
-            plt.ylabel('Przepracowane godziny')
-            plt.title('Czas trwania szkoleń według pracowników')
-            plt.xticks(rotation=45, ha='right')
-            # Optymalizuje układ wykresu, aby uniknąć nachodzenia elementów
-            plt.tight_layout()
-
-            # Zapisanie wykresu do pamięci
-            buffer = io.BytesIO()   # Tworzy bufor w pamięci
-            plt.savefig(buffer, format='png')   # Zapisuje wykres jako png do bufora
-            buffer.seek(0)  # Ustawia wskaźnik odczytu na początek bufora
-            image_png = buffer.getvalue()   # Odczytuje zawartość bufora
-            buffer.close()  # Zamyka bufor
-
+            # Wykres PNG generowany na serwerze (bez JavaScriptu); strona rysuje ten sam wykres z danych JSON
+            image_png = render_bar_chart_png(coach_hours(), 'Pracownicy', 'Przepracowane godziny')
             # Konwertuje obraz PNG na string base64, który może być łatwo osadzony w kodzie HTML jako obraz
             graph = base64.b64encode(image_png).decode('utf-8')
 
             ctx = {
-                'employees_data': employees_data,
+                'employees_data': self.get_employees_data(),
                 'chart': graph
             }
 
@@ -327,7 +452,7 @@ class AddParticipantView(AuthenticatedView):
         return render(request, 'add_participant.html', ctx)
 
 
-class CoursesView(AuthenticatedView):
+class CoursesView(AsyncAuthenticatedView):
     """
     Widok do zarządzania szkoleniami, dostępny tylko dla zalogowanych użytkowników.
 
@@ -337,10 +462,11 @@ class CoursesView(AuthenticatedView):
     - post: Obsługuje żądania POST, generując pliki PDF dla przeszłych szkoleń lub konkretnego szkolenia.
 
     Dziedziczenie:
-    Klasa dziedziczy po AuthenticatedView, co oznacza, że wymaga autoryzacji użytkownika przed dostępem.
+    Klasa dziedziczy po AsyncAuthenticatedView, co oznacza, że wymaga autoryzacji użytkownika przed dostępem
+    i obsługuje żądania asynchronicznie.
     """
     @staticmethod
-    def generate_course_pdf(course_id):
+    async def generate_course_pdf(course_id):
         """
         Generuje plik PDF dla konkretnego szkolenia na podstawie jego ID.
 
@@ -350,37 +476,19 @@ class CoursesView(AuthenticatedView):
             HttpResponse: Odpowiedź HTTP zawierająca plik PDF z danymi szkolenia.
         """
         # Pobierz szkolenie na podstawie ID
-        course = get_object_or_404(TrainingCourse, pk=course_id)
-        participants = Participant.objects.filter(training_course=course)
-
-        # Sprawdź, czy szkolenie już się odbyło
-        if course.took_place:
-            presence_list = PresenceList.objects.filter(training_course=course).select_related('participant')
-        else:
-            presence_list = None
+        course = await aget_object_or_404(TrainingCourse.objects.select_related('coach'), pk=course_id)
+        # Uczestnicy wraz z obecnością - jedno zapytanie do tabeli zapisów
+        enrollments = await afetch(course_enrollments(course))
 
         # Kontekst dla szablonu PDF
         ctx = {
             'course': course,
-            'participants': participants,
-            'presence_list': presence_list,
+            'enrollments': enrollments,
         }
-
-        # Generowanie PDF
-        html_string = render_to_string('pdf/course_pdf.html', ctx)  # Renderuje szablon HTML
-        html = HTML(string=html_string)     # Tworzy obiekt HTML z wygenerowanego stringu HTML
-        result = html.write_pdf() # Generuje plik PDF z obiektu HTML i zapisuje go w result
-
-        # Utwórz odpowiedź z plikiem PDF
-        response = HttpResponse(content_type='application/pdf')     # Tworzy odpowiedź HTTP z typem zawartości application/pdf
-        # Ustawia nagłówek Content-Disposition, który sugeruje przeglądarce,
-        # że odpowiedź zawiera plik do pobrania, z nazwą pliku na podstawie tematu szkolenia
-        response['Content-Disposition'] = f'attachment; filename=course_{course.topic}.pdf'
-        response.write(result)      # Zapisuje wygenerowany PDF do odpowiedzi
-        return response
+        return await arender_pdf_response('pdf/course_pdf.html', ctx, f'course_{course.topic}.pdf')
 
     @staticmethod
-    def generate_past_courses_pdf():
+    async def generate_past_courses_pdf():
         """
         Generuje plik PDF zawierający listę przeszłych szkoleń.
 
@@ -388,32 +496,50 @@ class CoursesView(AuthenticatedView):
             HttpResponse: Odpowiedź HTTP zawierająca plik PDF z listą przeszłych szkoleń.
         """
         today = timezone.now().date()
-        past_courses = TrainingCourse.objects.filter(end_time__date__lte=today)
-        html_string = render_to_string('pdf/courses_past_pdf.html', {'courses': past_courses})
-        html = HTML(string=html_string)
-        result = html.write_pdf()
-
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = 'attachment; filename=past_courses.pdf'
-        response.write(result)
-        return response
-
-    def get(self, request):
+        past_courses = await afetch(
+            TrainingCourse.objects.filter(end_time__date__lte=today)
+            .select_related('coach')
+            .annotate(participants_count=Count('enrollment', filter=Q(enrollment__status=ENROLLMENT_ACTIVE))))
+        return await arender_pdf_response('pdf/courses_past_pdf.html', {'courses': past_courses},
+                                          'past_courses.pdf')
+
+    async def get(self, request):
         """
-        Wyświetla listę szkoleń posortowanych po czasie rozpoczęcia.
+        Wyświetla listę szkoleń posortowanych po czasie rozpoczęcia (lub po czasie trwania), opcjonalnie
+        zawężoną do szkoleń o podanym czasie trwania, wraz z łączną liczbą godzin szkoleń w każdej ścieżce.
 
         :param request: Obiekt żądania HTTP.
 
         return:
             HttpResponse: Renderowana strona HTML z listą szkoleń.
         """
-        courses = TrainingCourse.objects.all().order_by('start_time')
+        # Lista bez filtrów jest serwowana z migawki, jeśli ta jest aktualna
+        if not request.GET:
+            response = await sync_to_async(snapshots.serve_snapshot)(request, 'courses_list')
+            if response is not None:
+                return response
+            snapshots.schedule_missing(request, 'courses_list')
+
+        form = CourseFilterForm(request.GET)
+        courses = TrainingCourse.objects.all()
+        if form.is_valid():
+            courses = form.filter(courses)
+        else:
+            courses = courses.order_by('start_time')
+
+        hours_per_path = [
+            {'path': dict(PATHS).get(row['path']), 'hours': round((row['total_seconds'] or 0) / 3600, 2)}
+            async for row in courses.order_by('path').values('path').annotate(
+                total_seconds=Sum('duration_seconds'))
+        ]
         ctx = {
-            'courses': courses
+            'form': form,
+            'courses': await afetch(courses),
+            'hours_per_path': hours_per_path,
         }
-        return render(request, 'courses_list.html', ctx)
+        return await arender(request, 'courses_list.html', ctx)
 
-    def post(self, request):
+    async def post(self, request):
         """
         Obsługuje żądania POST, generując pliki PDF dla przeszłych szkoleń lub konkretnego szkolenia.
 
@@ -423,19 +549,20 @@ class CoursesView(AuthenticatedView):
             HttpResponse: Odpowiedź HTTP zawierająca wygenerowany plik PDF.
         """
         if 'save_past_courses' in request.POST:
-            response = self.generate_past_courses_pdf()
+            response = await self.generate_past_courses_pdf()
             return response
 
         elif 'save_one_course' in request.POST:
             course_id = request.POST.get('course_id')
-            response = self.generate_course_pdf(course_id)
+            response = await self.generate_course_pdf(course_id)
             return response
 
         elif 'delete' in request.POST:
             course_id = request.POST.get('course_id')
-            course = get_object_or_404(TrainingCourse, id=course_id)
+            course = await aget_object_or_404(TrainingCourse, id=course_id)
 
-            course.delete()
+            # Szkolenie znika od razu, a zapisy uczestników usuwa porcjami polecenie purge_deleted
+            await course.asoft_delete()
             return redirect('courses_list')
 
 
@@ -485,7 +612,7 @@ class AddCourseView(AuthenticatedView):
         return render(request, 'add_course.html', ctx)
 
 
-class CourseDetailsView(AuthenticatedView):
+class CourseDetailsView(AsyncAuthenticatedView):
     """
     Widok szczegółowych informacji o szkoleniu.
 
@@ -494,9 +621,10 @@ class CourseDetailsView(AuthenticatedView):
     - post: Obsługuje żądania POST, zapisuje zmiany w szkoleniu lub generuje raport PDF dla szkolenia.
 
     Dziedziczenie:
-    Klasa dziedziczy po AuthenticatedView, co oznacza, że wymaga autoryzacji użytkownika przed dostępem.
+    Klasa dziedziczy po AsyncAuthenticatedView, co oznacza, że wymaga autoryzacji użytkownika przed dostępem
+    i obsługuje żądania asynchronicznie.
     """
-    def get(self, request, pk):
+    async def get(self, request, pk):
         """
         Renderuje szczegółowe informacje o szkoleniu oraz formularz edycji.
 
@@ -506,12 +634,17 @@ class CourseDetailsView(AuthenticatedView):
         return:
             HttpResponse: Renderowane szczegółowe informacje o szkoleniu wraz z formularzem edycji.
         """
-        course = get_object_or_404(TrainingCourse, pk=pk)
-        participants_count = course.participant_set.count()
+        course = await aget_object_or_404(TrainingCourse.objects.select_related('coach'), pk=pk)
+        participants_count = await course.enrollment_set.filter(status=ENROLLMENT_ACTIVE).acount()
 
         today = timezone.now().date()
         if course.start_time.date() > today:
             form = EditCourseFutureForm(instance=course)
+            # Lista trenerów pobierana asynchronicznie, aby renderowanie formularza nie odpytywało bazy danych
+            coach_field = form.fields['coach']
+            coach_field.choices = [('', coach_field.empty_label)] + [
+                (employee.pk, str(employee)) async for employee in coach_field.queryset
+            ]
         else:
             form = EditCoursePastForm(instance=course)
 
@@ -521,11 +654,11 @@ class CourseDetailsView(AuthenticatedView):
             'participants_count': participants_count,
             'today': today
         }
-        return render(request, 'course_details.html', ctx)
+        return await arender(request, 'course_details.html', ctx)
 
-    def post(self, request, pk):
+    def save_course(self, request, pk):
         """
-        Obsługuje żądania POST, zapisuje zmiany w szkoleniu lub generuje raport PDF dla szkolenia.
+        Zapisuje zmiany w szkoleniu (wywoływana synchronicznie przez sync_to_async).
 
         :param request: Obiekt żądania HTTP.
         :param pk: Klucz główny (ID) szkolenia.
@@ -542,27 +675,40 @@ class CourseDetailsView(AuthenticatedView):
         else:
             form = EditCoursePastForm(request.POST, instance=course)
 
-        if 'save' in request.POST:
-            if form.is_valid():
-                form.save()
-                return redirect('course_details', pk=pk)
+        if form.is_valid():
+            form.save()
+            return redirect('course_details', pk=pk)
 
-            participants_count = course.participant_set.count()
-            ctx = {
-                'course': course,
-                'form': form,
-                'participants_count': participants_count,
-                'today': today
-            }
-            return render(request, 'course_details.html', ctx)
+        participants_count = course.enrollment_set.filter(status=ENROLLMENT_ACTIVE).count()
+        ctx = {
+            'course': course,
+            'form': form,
+            'participants_count': participants_count,
+            'today': today
+        }
+        return render(request, 'course_details.html', ctx)
+
+    async def post(self, request, pk):
+        """
+        Obsługuje żądania POST, zapisuje zmiany w szkoleniu lub generuje raport PDF dla szkolenia.
+
+        :param request: Obiekt żądania HTTP.
+        :param pk: Klucz główny (ID) szkolenia.
+
+        return:
+            HttpResponseRedirect: Przekierowanie do widoku szczegółowych informacji o szkoleniu po pomyślnym zapisie zmian.
+            HttpResponse: Renderowany formularz HTML z błędami walidacji, jeśli dane formularza są niepoprawne.
+        """
+        if 'save' in request.POST:
+            return await sync_to_async(self.save_course)(request, pk)
 
         elif 'save_to_pdf' in request.POST:
             course_id = request.POST.get('course_id')
-            response = CoursesView.generate_course_pdf(course_id)
+            response = await CoursesView.generate_course_pdf(course_id)
             return response
 
 
-class EmployeeCoursesView(AuthenticatedView):
+class EmployeeCoursesView(AsyncAuthenticatedView):
     """
     Widok szczegółowych informacji o szkoleniach przypisanych do pracownika.
 
@@ -571,9 +717,27 @@ class EmployeeCoursesView(AuthenticatedView):
     - post: Obsługuje żądania POST, generuje raport PDF zawierający szczegóły szkoleń przypisanych do pracownika.
 
     Dziedziczenie:
-    Klasa dziedziczy po AuthenticatedView, co oznacza, że wymaga autoryzacji użytkownika przed dostępem.
+    Klasa dziedziczy po AsyncAuthenticatedView, co oznacza, że wymaga autoryzacji użytkownika przed dostępem
+    i obsługuje żądania asynchronicznie.
     """
-    def get(self, request, pk):
+    @staticmethod
+    async def get_employee_courses(pk):
+        """
+        Pobiera pracownika, prowadzone przez niego szkolenia i ich łączny czas trwania.
+
+        :param pk: Klucz główny (ID) pracownika.
+
+        return:
+            tuple: (pracownik, szkolenia, łączny czas trwania szkoleń).
+        """
+        employee = await aget_object_or_404(Employee, pk=pk)
+        courses = TrainingCourse.objects.filter(coach=employee)
+        totals = await courses.aaggregate(total_seconds=Sum('duration_seconds'))
+        courses = await afetch(courses)
+        total_duration = timedelta(seconds=totals['total_seconds'] or 0)
+        return employee, courses, total_duration
+
+    async def get(self, request, pk):
         """
         Renderuje szczegółowe informacje o szkoleniach przypisanych do pracownika.
 
@@ -583,18 +747,20 @@ class EmployeeCoursesView(AuthenticatedView):
         return:
             HttpResponse: Renderowane szczegółowe informacje o szkoleniach przypisanych do pracownika.
         """
-        employee = get_object_or_404(Employee, pk=pk)
-        courses = TrainingCourse.objects.filter(coach=employee)
-        total_duration = sum([course.duration for course in courses], timedelta())
+        response = await sync_to_async(snapshots.serve_snapshot)(request, 'employee_courses', pk)
+        if response is not None:
+            return response
+        employee, courses, total_duration = await self.get_employee_courses(pk)
+        snapshots.schedule_missing(request, 'employee_courses', pk)
 
         ctx = {
             'employee': employee,
             'courses': courses,
             'total_duration': total_duration
         }
-        return render(request, 'employee_courses.html', ctx)
+        return await arender(request, 'employee_courses.html', ctx)
 
-    def post(self, request, pk):
+    async def post(self, request, pk):
         """
         Obsługuje żądania POST, generuje raport PDF zawierający szczegóły szkoleń przypisanych do pracownika.
 
@@ -604,24 +770,15 @@ class EmployeeCoursesView(AuthenticatedView):
         return:
             HttpResponse: Generowany raport PDF zawierający szczegóły szkoleń przypisanych do pracownika.
         """
-        employee = get_object_or_404(Employee, pk=pk)
-        courses = TrainingCourse.objects.filter(coach=employee)
-        total_duration = sum([course.duration for course in courses], timedelta())
-
-        # Generate PDF
-        html_string = render_to_string('pdf/employee_courses_pdf.html',
-                                       {'employee': employee, 'courses': courses, 'total_duration': total_duration})
-        html = HTML(string=html_string)
-        result = html.write_pdf()
-
-        # Create a response with the PDF file
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename={employee.first_name}_{employee.last_name}_courses.pdf'
-        response.write(result)
-        return response
+        employee, courses, total_duration = await self.get_employee_courses(pk)
 
+        return await arender_pdf_response(
+            'pdf/employee_courses_pdf.html',
+            {'employee': employee, 'courses': courses, 'total_duration': total_duration},
+            f'{employee.first_name}_{employee.last_name}_courses.pdf')
 
-class CoursesForTodayView(AuthenticatedView):
+
+class CoursesForTodayView(AsyncAuthenticatedView):
     """
     Widok listy szkoleń zaplanowanych na dzisiaj.
 
@@ -629,9 +786,10 @@ class CoursesForTodayView(AuthenticatedView):
     - get: Renderuje listę szkoleń zaplanowanych na dzisiaj.
 
     Dziedziczenie:
-    Klasa dziedziczy po AuthenticatedView, co oznacza, że wymaga autoryzacji użytkownika przed dostępem.
+    Klasa dziedziczy po AsyncAuthenticatedView, co oznacza, że wymaga autoryzacji użytkownika przed dostępem
+    i obsługuje żądania asynchronicznie.
     """
-    def get(self, request):
+    async def get(self, request):
         """
         Renderuje listę szkoleń zaplanowanych na dzisiaj.
 
@@ -641,12 +799,12 @@ class CoursesForTodayView(AuthenticatedView):
             HttpResponse: Renderowana lista szkoleń zaplanowanych na dzisiaj.
         """
         today = timezone.now().date()
-        courses_today = TrainingCourse.objects.filter(start_time__date=today)
+        courses_today = await afetch(TrainingCourse.objects.filter(start_time__date=today))
 
         ctx = {
             'courses_today': courses_today,
         }
-        return render(request, 'courses_for_today.html', ctx)
+        return await arender(request, 'courses_for_today.html', ctx)
 
 
 class CoursePresenceListView(AuthenticatedView):
@@ -671,11 +829,12 @@ class CoursePresenceListView(AuthenticatedView):
             HttpResponse: Renderowana lista uczestników i ich obecność na danym szkoleniu.
         """
         course = get_object_or_404(TrainingCourse, pk=pk)
-        participants = course.participant_set.all()
+        enrollments = list(course_enrollments(course))
 
         ctx = {
             'course': course,
-            'participants': participants,
+            'enrollments': enrollments,
+            'participants': [enrollment.participant for enrollment in enrollments],
         }
         return render(request, 'course_presence_list.html', ctx)
 
@@ -690,26 +849,152 @@ class CoursePresenceListView(AuthenticatedView):
             HttpResponseRedirect: Przekierowanie na stronę szczegółów szkolenia po zapisaniu obecności.
         """
         course = get_object_or_404(TrainingCourse, pk=pk)
-        participants = course.participant_set.all()
-
-        # Obsługa zapisu obecności
-        for participant in participants:
-            present = request.POST.get(str(participant.id)) == 'on'
-            # Sprawdź, czy uczestnik jest już na liście obecności.
-            # Metoda get_or_create jest używana do próby pobrania obiektu z bazy danych.
-            # Jeśli taki obiekt nie istnieje, zostanie utworzony nowy obiekt z podanymi parametrami.
-            # obj: Obiekt modelu (instancja), który został pobrany lub utworzony
-            # created: Flaga (True lub False), która wskazuje,
-            # czy obiekt został utworzony (True), czy pobrany z bazy danych (False)
-            obj, created = PresenceList.objects.get_or_create(participant=participant, training_course=course)
-            obj.present = present
-            obj.save()
+        enrollments = list(Enrollment.objects.filter(training_course=course, status=ENROLLMENT_ACTIVE))
+
+        # Obsługa zapisu obecności - obecność jest polem zapisu na szkolenie,
+        # więc wszystkie zmiany trafiają do bazy jednym zapytaniem UPDATE
+        now = timezone.now()
+        changed = []
+        for enrollment in enrollments:
+            present = request.POST.get(str(enrollment.participant_id)) == 'on'
+            if enrollment.present != present:
+                enrollment.present = present
+                # Czas zmiany porównywany przy synchronizacji zmian zapisanych bez sieci (trainings.presence_sync)
+                enrollment.present_changed_at = now
+                changed.append(enrollment)
+        Enrollment.objects.bulk_update(changed, ['present', 'present_changed_at'])
+        if changed:
+            # bulk_update nie wysyła sygnałów post_save
+            snapshots.mark_changed('course_participants', course.pk)
+            invalidate_attendance_stats()
 
         # Po zapisaniu obecności przekieruj na stronę z listą obecności
         return redirect('course_details', pk=pk)
 
 
-class CourseParticipantsView(AuthenticatedView):
+class PresenceSyncView(AuthenticatedView):
+    """
+    Synchronizacja zmian obecności zapisanych przez listę obecności bez dostępu do sieci.
+
+    Metody:
+    - post: Stosuje porcję zmian (ostatni zapis wygrywa) i zwraca wynik jako JSON.
+
+    Dziedziczenie:
+    Klasa dziedziczy po AuthenticatedView, co oznacza, że wymaga autoryzacji użytkownika przed dostępem.
+    """
+    def post(self, request, pk):
+        """
+        :param request: Obiekt żądania HTTP z treścią JSON {"key": klucz porcji, "changes": [...]}.
+        :param pk (int): ID szkolenia.
+
+        return:
+            JsonResponse: {'applied', 'stale', 'unknown'} (listy ID uczestników) lub {'error': komunikat}
+                          ze statusem 400.
+        """
+        course = get_object_or_404(TrainingCourse, pk=pk)
+        try:
+            key, changes = parse_changes(json.loads(request.body))
+        except ValueError:
+            return JsonResponse({'error': 'Nieprawidłowy JSON.'}, status=400)
+        except SyncError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        return JsonResponse(apply_changes(course, key, changes))
+
+
+class PresenceServiceWorkerView(View):
+    """
+    Service worker listy obecności - przechowuje stronę listy obecności i jej skrypt, aby lista
+    otwierała się bez dostępu do sieci. Jest serwowany spod /courses/, bo zasięg service workera
+    to katalog, z którego pochodzi skrypt.
+
+    Metody:
+    - get: Zwraca skrypt service workera.
+    """
+    def get(self, request):
+        response = render(request, 'presence_sw.js', content_type='application/javascript')
+        patch_cache_control(response, no_cache=True)
+        return response
+
+
+class CourseScannerView(AuthenticatedView):
+    """
+    Stanowisko skanowania kodów QR uczestników szkolenia.
+
+    Metody:
+    - get: Renderuje stronę skanera z kluczem stanowiska; zeskanowane kody są wysyłane porcjami do CheckInView.
+
+    Dziedziczenie:
+    Klasa dziedziczy po AuthenticatedView, co oznacza, że wymaga autoryzacji użytkownika przed dostępem.
+    """
+    def get(self, request, pk):
+        course = get_object_or_404(TrainingCourse, pk=pk)
+        ctx = {
+            'course': course,
+            'scanner_key': scanner_key(course.pk),
+            'participants': {
+                participant_id: f'{first_name} {last_name}'
+                for participant_id, first_name, last_name in Enrollment.objects.filter(
+                    training_course=course, status=ENROLLMENT_ACTIVE).values_list(
+                    'participant_id', 'participant__first_name', 'participant__last_name')
+            },
+        }
+        return render(request, 'course_scanner.html', ctx)
+
+
+class CourseBadgesView(AuthenticatedView):
+    """
+    Identyfikatory uczestników szkolenia z kodami QR do rejestracji obecności.
+
+    Metody:
+    - get: Renderuje identyfikatory do wydruku.
+
+    Dziedziczenie:
+    Klasa dziedziczy po AuthenticatedView, co oznacza, że wymaga autoryzacji użytkownika przed dostępem.
+    """
+    def get(self, request, pk):
+        course = get_object_or_404(TrainingCourse, pk=pk)
+        badges = []
+        for enrollment in course_enrollments(course):
+            token = participant_token(enrollment.participant_id)
+            badges.append({'participant': enrollment.participant, 'token': token, 'qr': qr_svg(token)})
+        return render(request, 'course_badges.html', {'course': course, 'badges': badges})
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class CheckInView(View):
+    """
+    Rejestracja obecności zeskanowanymi kodami QR uczestników.
+
+    Żądanie jest uwierzytelniane kluczem stanowiska skanowania (podpisanym, przypisanym do szkolenia),
+    a nie sesją, więc widok nie odczytuje sesji ani użytkownika i nie renderuje szablonów.
+
+    Metody:
+    - post: Oznacza obecność uczestników z porcji tokenów i zwraca krótką odpowiedź JSON.
+    """
+    def post(self, request):
+        """
+        :param request: Obiekt żądania HTTP z treścią JSON {"key": klucz stanowiska, "tokens": [token, ...]}.
+
+        return:
+            JsonResponse: Wynik check_in() lub {'error': komunikat} ze statusem 400 albo 403.
+        """
+        try:
+            data = json.loads(request.body)
+            key, tokens = data['key'], data['tokens']
+        except (ValueError, TypeError, KeyError):
+            return JsonResponse({'error': 'Oczekiwano JSON {"key": ..., "tokens": [...]}.'}, status=400)
+        if not isinstance(tokens, list) or not all(isinstance(token, str) for token in tokens) \
+                or len(tokens) > CHECKIN_MAX_BATCH:
+            return JsonResponse({'error': f'Pole tokens musi być listą najwyżej {CHECKIN_MAX_BATCH} tokenów.'},
+                                status=400)
+        try:
+            course_id = scanner_course(key)
+        except (signing.BadSignature, TypeError, ValueError):
+            return JsonResponse({'error': 'Nieprawidłowy lub nieważny klucz stanowiska.'}, status=403)
+        return JsonResponse(check_in(course_id, tokens))
+
+
+class CourseParticipantsView(AsyncAuthenticatedView):
     """
     Widok listy uczestników danego szkolenia.
 
@@ -717,9 +1002,10 @@ class CourseParticipantsView(AuthenticatedView):
     - get: Renderuje listę uczestników szkolenia wraz z ich obecnością (jeśli szkolenie już się odbyło).
 
     Dziedziczenie:
-    Klasa dziedziczy po AuthenticatedView, co oznacza, że wymaga autoryzacji użytkownika przed dostępem.
+    Klasa dziedziczy po AsyncAuthenticatedView, co oznacza, że wymaga autoryzacji użytkownika przed dostępem
+    i obsługuje żądania asynchronicznie.
     """
-    def get(self, request, pk):
+    async def get(self, request, pk):
         """
         Renderuje listę uczestników danego szkolenia.
 
@@ -729,21 +1015,22 @@ class CourseParticipantsView(AuthenticatedView):
         return:
             HttpResponse: Renderowana lista uczestników danego szkolenia.
         """
-        course = get_object_or_404(TrainingCourse, pk=pk)
-        participants = course.participant_set.all()
-
-        # Sprawdź, czy szkolenie już się odbyło
-        if course.took_place:
-            presence_list = PresenceList.objects.filter(training_course=course).select_related('participant')
-        else:
-            presence_list = None
+        response = await sync_to_async(snapshots.serve_snapshot)(request, 'course_participants', pk)
+        if response is not None:
+            return response
+        course = await aget_object_or_404(TrainingCourse, pk=pk)
+        snapshots.schedule_missing(request, 'course_participants', pk)
+        # Uczestnicy wraz z obecnością - jedno zapytanie do tabeli zapisów
+        enrollments = await afetch(course_enrollments(course))
 
         ctx = {
             'course': course,
-            'participants': participants,
-            'presence_list': presence_list,
+            'enrollments': enrollments,
+            'participants': [enrollment.participant for enrollment in enrollments],
+            # Obecność jest pokazywana tylko dla szkoleń, które się odbyły
+            'presence_list': enrollments if course.took_place else None,
         }
-        return render(request, 'course_participants.html', ctx)
+        return await arender(request, 'course_participants.html', ctx)
 
 
 class EditParticipantView(AuthenticatedView):
@@ -784,11 +1071,13 @@ class EditParticipantView(AuthenticatedView):
             training_course = form.cleaned_data['training_course']
 
             # Sprawdzamy, czy uczestnik jest już zapisany na szkolenie
-            if training_course in participant.training_course.all():
+            if Enrollment.objects.filter(participant=participant, training_course=training_course,
+                                         status=ENROLLMENT_ACTIVE).exists():
                 message = 'Uczestnik jest już zapisany na to szkolenie.'
             else:
-                # Dodajemy uczestnika do szkolenia
-                participant.training_course.add(training_course)
+                # Dodajemy uczestnika do szkolenia (anulowany wcześniej zapis jest przywracany)
+                Enrollment.objects.update_or_create(participant=participant, training_course=training_course,
+                                                    defaults=reenrollment(timezone.now()))
                 message = 'Uczestnik został dodany do szkolenia.'
 
                 course_id = training_course.id
@@ -799,6 +1088,180 @@ class EditParticipantView(AuthenticatedView):
         return render(request, 'edit_participant.html', {'form': form})
 
 
+class BulkEnrollmentView(AuthenticatedView):
+    """
+    Widok masowego zapisu uczestników na szkolenie (lista ID lub plik CSV).
+
+    Metody:
+    - get: Renderuje formularz masowego zapisu.
+    - post: Zapisuje uczestników i wyświetla listy zapisanych, pominiętych i odrzuconych.
+
+    Dziedziczenie:
+    Klasa dziedziczy po AuthenticatedView, co oznacza, że wymaga autoryzacji użytkownika przed dostępem.
+    """
+    def get(self, request):
+        """
+        Renderuje formularz masowego zapisu.
+
+        :param request: Obiekt żądania HTTP.
+
+        return:
+            HttpResponse: Renderowany formularz.
+        """
+        return render(request, 'bulk_enrollment.html', {'form': BulkEnrollmentForm()})
+
+    def post(self, request):
+        """
+        Zapisuje uczestników podanych w formularzu lub w przesłanym pliku CSV na wybrane szkolenie.
+
+        :param request: Obiekt żądania HTTP.
+
+        return:
+            HttpResponse: Renderowany formularz z wynikiem zapisu lub błędami formularza.
+        """
+        form = BulkEnrollmentForm(request.POST, request.FILES)
+        ctx = {
+            'form': form
+        }
+        if form.is_valid():
+            ctx['course'] = form.cleaned_data['training_course']
+            ctx['result'] = bulk_enroll(ctx['course'], form.cleaned_data['participants'])
+        return render(request, 'bulk_enrollment.html', ctx)
+
+
+class BulkEnrollmentApiView(AuthenticatedView):
+    """
+    API masowego zapisu uczestników na szkolenie.
+
+    Metody:
+    - post: Zapisuje uczestników z treści żądania - JSON {"participants": [ID, ...]} lub CSV (text/csv).
+
+    Dziedziczenie:
+    Klasa dziedziczy po AuthenticatedView, co oznacza, że wymaga autoryzacji użytkownika przed dostępem.
+    """
+    def post(self, request, pk):
+        """
+        :param request: Obiekt żądania HTTP.
+        :param pk (int): ID szkolenia (tylko szkolenia, które się jeszcze nie zakończyły).
+
+        return:
+            JsonResponse: {'added': [ID], 'skipped': [{'participant', 'reason'}], 'rejected': [{'participant', 'reason'}]}
+                          lub {'error': komunikat} ze statusem 400.
+        """
+        course = get_object_or_404(TrainingCourse, pk=pk, end_time__gt=timezone.now())
+        if request.content_type == 'text/csv':
+            values = read_participant_ids(io.StringIO(request.body.decode('utf-8-sig')))
+        else:
+            try:
+                values = json.loads(request.body)['participants']
+            except (ValueError, TypeError, KeyError):
+                return JsonResponse({'error': 'Oczekiwano JSON {"participants": [ID, ...]} lub pliku CSV.'},
+                                    status=400)
+            if not isinstance(values, list) or not all(isinstance(value, (int, str)) for value in values):
+                return JsonResponse({'error': 'Pole participants musi być listą identyfikatorów.'}, status=400)
+        if len(values) > MAX_PARTICIPANTS:
+            return JsonResponse(
+                {'error': f'Jednym żądaniem można zapisać najwyżej {MAX_PARTICIPANTS} uczestników.'}, status=400)
+        return JsonResponse(bulk_enroll(course, values).as_dict())
+
+
+class EnrollmentMatrixView(AuthenticatedView):
+    """
+    Macierz zapisów: uczestnicy (z podziałem na strony) × wybrane szkolenia.
+
+    Metody:
+    - get: Wyświetla macierz zapisów.
+    - post: Zapisuje zmiany macierzy (tylko pola zmienione przez użytkownika) i wyświetla ją ponownie.
+
+    Dziedziczenie:
+    Klasa dziedziczy po AuthenticatedView, co oznacza, że wymaga autoryzacji użytkownika przed dostępem.
+    """
+    paginate_by = 50
+
+    def matrix_context(self, request):
+        form = EnrollmentMatrixForm(request.GET)
+        courses = form.selected_courses()
+        page = Paginator(form.participants(), self.paginate_by).get_page(request.GET.get('page'))
+        course_ids = [course.pk for course in courses]
+        bitsets = enrollment_bitsets(course_ids, [participant.pk for participant in page.object_list])
+        rows = [
+            {
+                'participant': participant,
+                'bits': encode_bits(bitsets[participant.pk]),
+                'cells': [(course.pk, bool(bitsets[participant.pk] >> bit & 1)) for bit, course in enumerate(courses)],
+            }
+            for participant in page.object_list
+        ]
+        return {
+            'form': form,
+            'courses': courses,
+            'columns': ','.join(map(str, course_ids)),
+            'page': page,
+            'rows': rows,
+            'query': request.GET.urlencode(),
+        }
+
+    def get(self, request):
+        """
+        Wyświetla macierz zapisów dla szkoleń wybranych parametrem courses i strony uczestników (page, q).
+
+        :param request: Obiekt żądania HTTP.
+
+        return:
+            HttpResponse: Renderowana macierz zapisów.
+        """
+        return render(request, 'enrollment_matrix.html', self.matrix_context(request))
+
+    def post(self, request):
+        """
+        Zapisuje zmiany macierzy w jednej transakcji.
+
+        Formularz odsyła kolumny (columns), wyświetlone zbiory bitów wierszy (row: "ID uczestnika:bity")
+        i zaznaczone pola (cell: "ID uczestnika:ID szkolenia"); zapisywana jest różnica między nimi.
+
+        :param request: Obiekt żądania HTTP.
+
+        return:
+            HttpResponse: Renderowana macierz zapisów z podsumowaniem lub błędami.
+        """
+        ctx = self.matrix_context(request)
+        selected = {course.pk for course in ctx['courses']}
+        try:
+            course_ids = [int(course_id) for course_id in request.POST.get('columns', '').split(',') if course_id]
+            original = {}
+            for row in request.POST.getlist('row'):
+                participant_id, bits = row.split(':')
+                original[int(participant_id)] = decode_bits(bits)
+            cells = []
+            for cell in request.POST.getlist('cell'):
+                participant_id, course_id = cell.split(':')
+                cells.append((int(participant_id), int(course_id)))
+        except ValueError:
+            return HttpResponseBadRequest("Nieprawidłowe dane macierzy.")
+        if not set(course_ids) <= selected:
+            ctx['errors'] = ["Wybór szkoleń zmienił się - zapisy nie zostały zmienione."]
+            return render(request, 'enrollment_matrix.html', ctx)
+
+        column = {course_id: bit for bit, course_id in enumerate(course_ids)}
+        # Tylko istniejący uczestnicy (mogli zostać usunięci po wyświetleniu macierzy)
+        existing = set(Participant.objects.filter(pk__in=original).values_list('pk', flat=True))
+        original = {participant_id: bits for participant_id, bits in original.items() if participant_id in existing}
+        submitted = {}
+        for participant_id, course_id in cells:
+            if participant_id in original and course_id in column:
+                submitted[participant_id] = submitted.get(participant_id, 0) | 1 << column[course_id]
+
+        added, removed = matrix_diff(course_ids, original, submitted)
+        try:
+            created, deleted = apply_matrix_diff(added, removed)
+        except ValidationError as e:
+            ctx['errors'] = e.messages
+            return render(request, 'enrollment_matrix.html', ctx)
+        ctx = self.matrix_context(request)
+        ctx['message'] = f"Zapisano uczestników: {created}, wypisano uczestników: {deleted}."
+        return render(request, 'enrollment_matrix.html', ctx)
+
+
 class ParticipantsView(AuthenticatedView):
     """
     Widok listy uczestników szkoleń.
@@ -823,12 +1286,112 @@ class ParticipantsView(AuthenticatedView):
         # Tworzymy słownik, gdzie kluczem jest uczestnik, a wartością lista szkoleń
         participants_courses = {}
         for participant in participants:
-            courses = participant.training_course.all()
+            courses = TrainingCourse.objects.filter(enrollment__participant=participant,
+                                                    enrollment__status=ENROLLMENT_ACTIVE)
             participants_courses[participant] = courses
 
         return render(request, 'participants_list.html', {'participants_courses': participants_courses})
 
 
+def streaming_file_response(request, content, content_type, filename):
+    """
+    Zwraca plik wysyłany porcjami generatora bajtów.
+
+    Pod ASGI generator jest opakowywany w asynchroniczny (exports.async_chunks) - synchroniczny
+    StreamingHttpResponse wczytałby tam cały plik do pamięci przed wysłaniem pierwszego bajtu.
+
+    :param request: Obiekt żądania HTTP.
+    :param content: Generator bajtów pliku.
+    :param content_type (str): Typ MIME pliku.
+    :param filename (str): Nazwa pobieranego pliku.
+
+    return:
+        StreamingHttpResponse: Strumieniowana odpowiedź HTTP z plikiem.
+    """
+    if isinstance(request, ASGIRequest):
+        content = async_chunks(content)
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
+
+
+class ExportView(AuthenticatedView):
+    """
+    Widok strumieniowego eksportu danych (szkolenia, uczestnicy z zapisami, listy obecności, godziny trenerów)
+    w formatach CSV, JSONL i XLSX.
+
+    Metody:
+    - get: Zwraca plik eksportu jako StreamingHttpResponse.
+
+    Dziedziczenie:
+    Klasa dziedziczy po AuthenticatedView, co oznacza, że wymaga autoryzacji użytkownika przed dostępem.
+    """
+    def get(self, request, dataset, fmt):
+        """
+        Zwraca plik eksportu generowany porcjami, bez wczytywania całego zbioru danych do pamięci.
+
+        :param request: Obiekt żądania HTTP.
+        :param dataset (str): Nazwa zbioru danych ('courses', 'participants', 'presence', 'coach_hours').
+        :param fmt (str): Format pliku ('csv', 'jsonl', 'xlsx').
+
+        return:
+            StreamingHttpResponse: Strumieniowana odpowiedź HTTP z plikiem eksportu.
+        """
+        try:
+            content_type, content = stream_export(dataset, fmt)
+        except KeyError:
+            raise Http404("Nieznany zbiór danych lub format eksportu.")
+
+        return streaming_file_response(request, content, content_type, f'{dataset}.{fmt}')
+
+
+class ImportPeopleView(AuthenticatedView):
+    """
+    Widok masowego importu pracowników, uczestników i zapisów na szkolenia z pliku CSV.
+
+    Metody:
+    - get: Wyświetla formularz przesyłania pliku.
+    - post: Importuje przesłany plik i wyświetla podsumowanie wraz z raportem błędów.
+
+    Dziedziczenie:
+    Klasa dziedziczy po AuthenticatedView, co oznacza, że wymaga autoryzacji użytkownika przed dostępem.
+    """
+    # Maksymalna liczba błędów wyświetlanych na stronie
+    errors_limit = 100
+
+    def get(self, request):
+        """
+        Wyświetla formularz przesyłania pliku CSV.
+
+        :param request: Obiekt żądania HTTP.
+
+        return:
+            HttpResponse: Renderowany formularz importu.
+        """
+        return render(request, 'import_people.html', {'form': ImportPeopleForm()})
+
+    def post(self, request):
+        """
+        Importuje przesłany plik CSV, czytając go strumieniowo.
+
+        :param request: Obiekt żądania HTTP.
+
+        return:
+            HttpResponse: Renderowany formularz importu z podsumowaniem lub błędami formularza.
+        """
+        form = ImportPeopleForm(request.POST, request.FILES)
+        ctx = {
+            'form': form
+        }
+        if form.is_valid():
+            stream = io.TextIOWrapper(form.cleaned_data['file'].file, encoding='utf-8-sig', newline='')
+            result = import_people(form.cleaned_data['kind'], stream,
+                                   batch_size=form.cleaned_data['batch_size'] or DEFAULT_BATCH_SIZE)
+            ctx['result'] = result
+            ctx['errors'] = result.errors[:self.errors_limit]
+        return render(request, 'import_people.html', ctx)
+
+
 class LoginView(FormView):
     """
     Widok logowania użytkownika.
@@ -878,3 +1441,356 @@ class LogoutView(View):
         return redirect('main')
 
 
+class FreeCoachesView(AuthenticatedView):
+    """
+    Widok wyszukiwania trenerów z wolnym terminem na nowe szkolenie.
+
+    Metody:
+    - get: Zwraca w formacie JSON trenerów, którzy mają w podanym przedziale wolne okno o zadanej długości,
+      posortowanych rosnąco po obciążeniu szkoleniami w tym przedziale.
+
+    Dziedziczenie:
+    Klasa dziedziczy po AuthenticatedView, co oznacza, że wymaga autoryzacji użytkownika przed dostępem.
+    """
+    default_limit = 50
+
+    def get(self, request):
+        """
+        Obsługuje żądania GET z parametrami start_time, end_time, duration (minuty) i opcjonalnym limit.
+
+        :param request: Obiekt żądania HTTP.
+
+        return:
+            JsonResponse: Lista trenerów z wolnymi oknami lub błędy walidacji (status 400).
+        """
+        form = FreeCoachSearchForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse({'errors': form.errors}, status=400)
+
+        cd = form.cleaned_data
+        coaches = free_coaches(cd['start_time'], cd['end_time'], timedelta(minutes=cd['duration']),
+                               limit=cd['limit'] or self.default_limit)
+        return JsonResponse({'coaches': [
+            {
+                'id': coach['employee'].pk,
+                'name': coach['employee'].name,
+                'load_hours': round(coach['load'].total_seconds() / 3600, 2),
+                'slots': [{'start': start.isoformat(), 'end': end.isoformat()} for start, end in coach['slots']],
+            }
+            for coach in coaches
+        ]})
+
+
+class AttendanceReportView(AuthenticatedView):
+    """
+    Raport frekwencji na szkoleniach w podziale na ścieżkę, kategorię, formułę, trenera, miesiąc i spółkę.
+
+    Metody:
+    - get: Wyświetla tabele frekwencji dla każdego podziału.
+
+    Dziedziczenie:
+    Klasa dziedziczy po AuthenticatedView, co oznacza, że wymaga autoryzacji użytkownika przed dostępem.
+    """
+    def get(self, request):
+        stats = attendance_stats()
+        ctx = {
+            'total': stats['total'],
+            'dimensions': [(label, stats['dimensions'][dimension]) for dimension, label in DIMENSIONS.items()],
+        }
+        return render(request, 'attendance_report.html', ctx)
+
+
+class AttendanceStatsView(AuthenticatedView):
+    """
+    Statystyki frekwencji w formacie JSON.
+
+    Metody:
+    - get: Zwraca liczniki zapisów i frekwencję; parametr by (np. by=path,coach) zawęża odpowiedź
+      do wybranych podziałów.
+
+    Dziedziczenie:
+    Klasa dziedziczy po AuthenticatedView, co oznacza, że wymaga autoryzacji użytkownika przed dostępem.
+    """
+    def get(self, request):
+        requested = [name for name in request.GET.get('by', '').split(',') if name]
+        unknown = [name for name in requested if name not in DIMENSIONS]
+        if unknown:
+            return JsonResponse({'error': f"Nieznane podziały: {', '.join(unknown)}. "
+                                          f"Dozwolone: {', '.join(DIMENSIONS)}."}, status=400)
+        stats = attendance_stats()
+        return JsonResponse({
+            'total': stats['total'],
+            'dimensions': {name: stats['dimensions'][name] for name in requested or DIMENSIONS},
+        })
+
+
+def export_response(request, header, rows, fmt, filename):
+    """
+    Zwraca strumieniowany plik eksportu wierszy raportu.
+
+    Rzuca Http404, jeśli format nie istnieje.
+    """
+    try:
+        content_type, content = stream_table(header, rows, fmt)
+    except KeyError:
+        raise Http404("Nieznany format eksportu.")
+    return streaming_file_response(request, content, content_type, f'{filename}.{fmt}')
+
+
+# Kolumny eksportu zestawienia organizacyjnego: nagłówek -> klucz wiersza (po with_rates)
+ORG_ROLLUP_COLUMNS = (
+    ('employees', 'staff'),
+    ('active_coaches', 'coaches'),
+    ('courses', 'course_count'),
+    ('hours', 'hours'),
+    ('held_hours', 'held_hours'),
+    ('utilisation', 'utilisation'),
+    ('hours_per_coach', 'hours_per_coach'),
+)
+
+
+class OrgRollupView(AuthenticatedView):
+    """
+    Zestawienie godzin szkoleń i wykorzystania trenerów według spółki, zespołu lub przełożonego.
+
+    Metody:
+    - get: Wyświetla zestawienie na wybranym poziomie (z podziałem na strony) lub zwraca je jako plik eksportu.
+
+    Dziedziczenie:
+    Klasa dziedziczy po AuthenticatedView, co oznacza, że wymaga autoryzacji użytkownika przed dostępem.
+    """
+    paginate_by = 50
+
+    def get(self, request, fmt=None):
+        """
+        Obsługuje żądania GET z parametrami level ('company', 'team', 'supervisor'), filtrami struktury
+        organizacyjnej i page.
+
+        :param request: Obiekt żądania HTTP.
+        :param fmt (str): Format eksportu ('csv', 'jsonl', 'xlsx') lub None dla strony HTML.
+
+        return:
+            HttpResponse: Strona z zestawieniem lub strumieniowany plik eksportu.
+        """
+        form = OrgReportForm(request.GET)
+        form.is_valid()
+        level = form.cleaned_data.get('level') or 'company'
+        fields = ORG_LEVELS[level][1]
+        rows = level_rows(level).filter(**form.filters())
+
+        if fmt is not None:
+            header = fields + tuple(name for name, _ in ORG_ROLLUP_COLUMNS)
+            keys = fields + tuple(key for _, key in ORG_ROLLUP_COLUMNS)
+            data = map(with_rates, rows.iterator())
+            return export_response(request, header, ([row[key] for key in keys] for row in data), fmt, f'org_{level}')
+
+        page = Paginator(rows, self.paginate_by).get_page(request.GET.get('page'))
+        for row in page.object_list:
+            with_rates(row)
+            # Parametry zawężenia raportu pracowników do grupy
+            row['drill_down'] = {field: row[field] for field in fields}
+        ctx = {
+            'form': form,
+            'level': level,
+            'level_label': ORG_LEVELS[level][0],
+            'fields': fields,
+            'page': page,
+            'query': request.GET.copy(),
+        }
+        ctx['query'].pop('page', None)
+        return render(request, 'org_rollup.html', ctx)
+
+
+class OrgEmployeesView(AuthenticatedView):
+    """
+    Pracownicy grupy organizacyjnej (spółki, zespołu, lidera lub przełożonego) wraz z liczbą i czasem
+    trwania prowadzonych szkoleń.
+
+    Metody:
+    - get: Wyświetla pracowników grupy (z podziałem na strony) lub zwraca ich listę jako plik eksportu.
+
+    Dziedziczenie:
+    Klasa dziedziczy po AuthenticatedView, co oznacza, że wymaga autoryzacji użytkownika przed dostępem.
+    """
+    paginate_by = 50
+
+    def get(self, request, fmt=None):
+        """
+        :param request: Obiekt żądania HTTP z filtrami company, team, team_leader, supervisor i page.
+        :param fmt (str): Format eksportu ('csv', 'jsonl', 'xlsx') lub None dla strony HTML.
+
+        return:
+            HttpResponse: Strona z listą pracowników lub strumieniowany plik eksportu.
+        """
+        form = OrgReportForm(request.GET)
+        form.is_valid()
+        # Sumy liczone w bazie jednym zapytaniem grupującym po pracowniku
+        employees = employee_totals(Employee.objects.filter(**form.filters())).order_by(
+            '-total_seconds', 'last_name', 'first_name', 'pk')
+
+        if fmt is not None:
+            rows = employees.values_list(
+                'pk', 'first_name', 'last_name', 'position', 'company', 'team', 'team_leader', 'supervisor',
+                'courses_count', 'total_seconds', 'held_seconds')
+            return export_response(
+                request, ('employee_id', 'first_name', 'last_name', 'position', 'company', 'team', 'team_leader',
+                 'supervisor', 'courses', 'hours', 'held_hours'),
+                (row[:9] + (round(row[9] / 3600, 2), round(row[10] / 3600, 2)) for row in rows.iterator()),
+                fmt, 'org_employees')
+
+        ctx = {
+            'form': form,
+            'page': Paginator(employees, self.paginate_by).get_page(request.GET.get('page')),
+            'query': request.GET.copy(),
+        }
+        ctx['query'].pop('page', None)
+        return render(request, 'org_employees.html', ctx)
+
+
+class SearchView(AuthenticatedView):
+    """
+    Widok wyszukiwania pełnotekstowego szkoleń, pracowników i uczestników.
+
+    Metody:
+    - get: Wyświetla formularz wyszukiwania oraz wyniki posortowane według trafności, podzielone na strony.
+
+    Dziedziczenie:
+    Klasa dziedziczy po AuthenticatedView, co oznacza, że wymaga autoryzacji użytkownika przed dostępem.
+    """
+    paginate_by = 20
+
+    def get(self, request):
+        """
+        Wyszukuje obiekty pasujące do zapytania (każde słowo dopasowywane jako prefiks).
+
+        :param request: Obiekt żądania HTTP z parametrami q, kind i page.
+
+        return:
+            HttpResponse: Renderowana strona z formularzem i wynikami wyszukiwania.
+        """
+        form = SearchForm(request.GET or None)
+        page = None
+        if form.is_valid():
+            kind = form.cleaned_data['kind']
+            results = SearchResults(form.cleaned_data['q'], kinds=[kind] if kind else None)
+            page = Paginator(results, self.paginate_by).get_page(request.GET.get('page'))
+        return render(request, 'search.html', {'form': form, 'page': page})
+
+
+def conditional_json_response(request, data):
+    """
+    Zwraca dane jako JSON z nagłówkiem ETag (skrót treści) lub odpowiedź 304, jeśli klient ma aktualną wersję.
+
+    :param request: Obiekt żądania HTTP.
+    :param data: Dane do serializacji.
+
+    return:
+        HttpResponse: Odpowiedź JSON lub 304 Not Modified.
+    """
+    body = json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)
+    etag = f'"{hashlib.md5(body.encode()).hexdigest()}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+class ApiView(AuthenticatedView):
+    """
+    Tylko do odczytu API JSON (szkolenia, pracownicy, uczestnicy, listy obecności).
+
+    Metody:
+    - get: Zwraca stronę obiektów zasobu z wybranymi polami i dołączonymi relacjami.
+
+    Dziedziczenie:
+    Klasa dziedziczy po AuthenticatedView, co oznacza, że wymaga autoryzacji użytkownika przed dostępem.
+    """
+    def get(self, request, resource):
+        """
+        Obsługuje żądania GET z parametrami fields, include, after, limit i filtrami zasobu.
+        Odpowiedź ma nagłówek ETag; żądanie z aktualnym If-None-Match dostaje odpowiedź 304 bez treści.
+
+        :param request: Obiekt żądania HTTP.
+        :param resource (str): Nazwa zasobu ('courses', 'employees', 'participants', 'presence').
+
+        return:
+            HttpResponse: Odpowiedź JSON {'results': [...], 'next': adres następnej strony lub null}.
+        """
+        if resource not in RESOURCES:
+            raise Http404("Nieznany zasób API.")
+        try:
+            results, last_id = RESOURCES[resource].page(request.GET)
+        except ApiError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        next_url = None
+        if last_id is not None:
+            params = request.GET.copy()
+            params['after'] = last_id
+            next_url = f'{request.path}?{params.urlencode()}'
+
+        return conditional_json_response(request, {'results': results, 'next': next_url})
+
+
+class ChartDataView(AuthenticatedView):
+    """
+    Dane wykresów w formacie JSON, rysowanych w przeglądarce (static/trainings/charts.js).
+
+    Metody:
+    - get: Zwraca etykiety i wartości wykresu; odpowiedź ma nagłówek ETag (304 przy aktualnym If-None-Match).
+
+    Dziedziczenie:
+    Klasa dziedziczy po AuthenticatedView, co oznacza, że wymaga autoryzacji użytkownika przed dostępem.
+    """
+    def get(self, request, chart):
+        if chart not in CHARTS:
+            raise Http404("Nieznany wykres.")
+        return conditional_json_response(request, CHARTS[chart]())
+
+
+class StaticAssetView(View):
+    """
+    Widok serwujący pliki statyczne zebrane przez collectstatic (STATIC_ROOT).
+
+    Pliki z hashem w nazwie (z manifestu) dostają nagłówek Cache-Control na rok (immutable), a klient
+    obsługujący kompresję dostaje gotową wersję .br lub .gz zapisaną podczas collectstatic.
+
+    Metody:
+    - get: Zwraca plik statyczny.
+    """
+    far_future_max_age = 365 * 24 * 60 * 60
+    default_max_age = 60
+
+    def get(self, request, path):
+        """
+        :param request: Obiekt żądania HTTP.
+        :param path (str): Ścieżka pliku względem STATIC_ROOT.
+
+        return:
+            FileResponse: Plik statyczny (ew. w wersji skompresowanej).
+        """
+        try:
+            full_path = safe_join(settings.STATIC_ROOT, path)
+        except SuspiciousFileOperation:
+            raise Http404("Nie znaleziono pliku.")
+        if not os.path.isfile(full_path):
+            raise Http404("Nie znaleziono pliku.")
+
+        content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+        encoding = accepted_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        suffix = {'br': '.br', 'gzip': '.gz'}.get(encoding)
+        if suffix and os.path.isfile(full_path + suffix):
+            response = FileResponse(open(full_path + suffix, 'rb'), content_type=content_type)
+            response['Content-Encoding'] = encoding
+        else:
+            response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        hashed_names = getattr(staticfiles_storage, 'hashed_files', {}).values()
+        if path in hashed_names:
+            patch_cache_control(response, public=True, max_age=self.far_future_max_age, immutable=True)
+        else:
+            patch_cache_control(response, public=True, max_age=self.default_max_age)
+        return response